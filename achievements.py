@@ -0,0 +1,128 @@
+# --- START OF FILE achievements.py ---
+# Event-driven achievement engine. Gameplay reports stat changes with notify(stat, value); only the rules that watch
+# that stat are evaluated, unlocked achievements drop out of the index, and state is a set instead of list scans.
+
+import time
+from bisect import insort
+from collections import deque
+from settings import *
+
+WORLD_ACHIEVEMENTS = [ACH_EARTH_SEEDED, ACH_FIRE_SEEDED, ACH_WATER_SEEDED, ACH_FROST_SEEDED, ACH_UNDERWORLD_SEEDED,
+                      ACH_DESERT_SEEDED, ACH_JUNGLE_SEEDED, ACH_SPACE_SEEDED, ACH_CYBER_SEEDED, ACH_MYSTIC_SEEDED, ACH_SUPERSEED_SEEDED]
+
+# (achievement, stat, test): a number means "value >= test", a string means "value == test", otherwise test(value) -> bool.
+# "level_cleared" / "game_won" carry a dict describing the event.
+ACHIEVEMENT_RULES = [
+    (ACH_ATTRACTOR_NODE, "total_magnets_collected", 25),
+    (ACH_GRAVITY_WELL, "total_magnets_collected", 50),
+    (ACH_SEED_SINGULARITY, "total_magnets_collected", 75),
+    (ACH_MAINNET_MAGNET, "total_magnets_collected", 100),
+    (ACH_SEED_BANK_BARON, "total_seeds_accumulated", 1000),
+    (ACH_BOUNTIFUL_HARVEST, "seeds_this_level", 100),
+    (ACH_SPROUTED, "level_cleared", lambda ev: True),
+    (ACH_SPROUTED, "run_lost", lambda ev: True),
+    (ACH_WARP_SPEED_ENGAGED, "level_cleared", lambda ev: ev["time_taken"] < 2.0),
+    (ACH_NAVIGATING_THE_NOISE, "level_cleared", lambda ev: ev["inverse_controls"]),
+    (ACH_DIAMOND_HANDS, "level_cleared", lambda ev: ev["seeds_held"] >= 100),
+    (ACH_PACIFIST_RUN, "level_cleared", lambda ev: ev["level"] >= 20 and not ev["used_ability"]),
+    (ACH_TGE_ACHIEVED, "game_won", lambda ev: ev["total_time"] < 30 * 60),
+    (ACH_WIN_SEEDGUY, "game_won", lambda ev: ev["character"] == 1),
+    (ACH_WIN_JOAO, "game_won", lambda ev: ev["character"] == 2),
+    (ACH_WIN_MESKY, "game_won", lambda ev: ev["character"] == 3),
+    (ACH_WIN_CHOSEN, "game_won", lambda ev: ev["character"] == 4),
+    (ACH_SEED_HARVEST_VICTOR, "minigame_won", "Seed Harvest Frenzy"),
+    (ACH_DAVID_REVENGE_VICTOR, "minigame_won", "David’s Revenge"),
+    (ACH_INVERSE_GAUNTLET_VICTOR, "minigame_won", "Inverse Gauntlet"),
+    # Every other achievement unlocked (the engine reports this stat itself after each unlock)
+    (ACH_TRUE_SUPERSEED, "achievements_unlocked", len(MASTER_ACHIEVEMENT_LIST) - 1),
+] + [(ach, "world_reached", ach[:-len(" Seeded")]) for ach in WORLD_ACHIEVEMENTS]
+
+
+class AchievementEngine:
+    """Rules are compiled per stat into a sorted threshold list, an exact-match dict and a predicate list."""
+    def __init__(self, rules=ACHIEVEMENT_RULES):
+        self.rules = rules
+        self.save_data = None; self.save_func = None
+        self.unlocked = set()
+        # Metrics
+        self.events = 0; self.rules_evaluated = 0; self.unlocks = 0
+        self.eval_us = deque(maxlen=ACHIEVEMENT_EVAL_HISTORY)
+        self._compile()
+
+    def _compile(self):
+        self.thresholds = {} # stat -> sorted [(threshold, ach)]
+        self.exact = {} # stat -> {value: [ach]}
+        self.predicates = {} # stat -> [(ach, func)]
+        for ach, stat, test in self.rules:
+            if ach in self.unlocked: continue
+            if isinstance(test, (int, float)): insort(self.thresholds.setdefault(stat, []), (test, ach))
+            elif isinstance(test, str): self.exact.setdefault(stat, {}).setdefault(test, []).append(ach)
+            else: self.predicates.setdefault(stat, []).append((ach, test))
+
+    def bind(self, save_data, save_func=None):
+        """Attaches the loaded save dict; already-unlocked achievements are removed from the rule index."""
+        if "achievements" not in save_data or not isinstance(save_data["achievements"], list): save_data["achievements"] = []
+        self.save_data = save_data; self.save_func = save_func
+        self.unlocked = set(save_data["achievements"]) & set(MASTER_ACHIEVEMENT_LIST)
+        self._compile()
+
+    def _drop(self, ach):
+        """Removes every rule for `ach` so later events on its stats skip it."""
+        for stat, rules in self.thresholds.items(): self.thresholds[stat] = [r for r in rules if r[1] != ach]
+        for by_value in self.exact.values():
+            for value, achs in by_value.items():
+                if ach in achs: by_value[value] = [a for a in achs if a != ach]
+        for stat, rules in self.predicates.items(): self.predicates[stat] = [r for r in rules if r[0] != ach]
+
+    def notify(self, stat, value, banners=None):
+        """Evaluates the rules watching `stat`. Returns the achievements this event unlocked."""
+        start = time.perf_counter()
+        hits = []; checked = 0
+        for threshold, ach in self.thresholds.get(stat, ()): # Sorted, so stop at the first threshold above value
+            checked += 1
+            if value < threshold: break
+            hits.append(ach)
+        by_value = self.exact.get(stat)
+        if by_value is not None:
+            checked += 1; hits.extend(by_value.get(value, ()))
+        for ach, test in self.predicates.get(stat, ()):
+            checked += 1
+            if test(value): hits.append(ach)
+        self.events += 1; self.rules_evaluated += checked
+        self.eval_us.append((time.perf_counter() - start) * 1e6)
+        return [ach for ach in hits if self.unlock(ach, banners)]
+
+    def unlock(self, ach_name, banners=None):
+        """Grants an achievement once: records it, pays the tier's SUPR reward, queues a save and a banner."""
+        if ach_name not in ACHIEVEMENT_TIER_MAP: print(f"Warning: Attempted to add unknown achievement '{ach_name}'"); return False
+        if ach_name in self.unlocked or self.save_data is None: return False
+        tier = ACHIEVEMENT_TIER_MAP.get(ach_name, "Bronze"); reward = ACHIEVEMENT_SUPR_REWARDS.get(tier, 0)
+        self.unlocked.add(ach_name); self._drop(ach_name); self.unlocks += 1
+        self.save_data["achievements"].append(ach_name)
+        self.save_data["supercollateral_coins"] = self.save_data.get("supercollateral_coins", 0) + reward
+        if self.save_func: self.save_func(self.save_data)
+        if banners is not None:
+            banner_text = f"Unlocked: {ach_name} (+{reward} SUPR)"
+            banners.append({"text": banner_text, "time": time.time(), "y": -60, "tier_color": ACHIEVEMENT_TIERS.get(tier, GOLD)})
+            print(f"Achievement Banner Added: {banner_text}")
+        print(f"Achievement Unlocked: {ach_name} ({tier}, +{reward} SUPR)")
+        if ach_name != ACH_TRUE_SUPERSEED: self.notify("achievements_unlocked", len(self.unlocked - {ACH_TRUE_SUPERSEED}), banners)
+        return True
+
+    def stats(self):
+        eval_us = sorted(self.eval_us)
+        return {"events": self.events, "rules_evaluated": self.rules_evaluated, "unlocks": self.unlocks,
+                "rules_total": len(self.rules), "unlocked": len(self.unlocked),
+                "rules_per_event": self.rules_evaluated / self.events if self.events else 0.0,
+                "eval_us_mean": sum(eval_us) / len(eval_us) if eval_us else 0.0,
+                "eval_us_max": eval_us[-1] if eval_us else 0.0}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Achievements: {st['events']} stat events, {st['rules_per_event']:.2f} rules evaluated per event "
+                f"(of {st['rules_total']}), eval mean {st['eval_us_mean']:.1f}us max {st['eval_us_max']:.1f}us, "
+                f"{st['unlocks']} unlocked this session ({st['unlocked']}/{len(MASTER_ACHIEVEMENT_LIST)} total)")
+
+
+ACHIEVEMENTS = AchievementEngine()
+# --- END OF FILE achievements.py ---
@@ -0,0 +1,306 @@
+# --- START OF FILE assets.py ---
+# Asset manifest and preloading: every image and sound effect path in settings.py is decoded once, on a
+# background thread while a progress screen runs, so levels no longer hit the disk on spawns or at start.
+# Decoded and scaled pixels are also kept on disk (SURFACE_DISK_CACHE_DIR) so later starts skip decoding.
+
+import os, time, queue, threading, mmap, struct, hashlib
+import pygame
+from collections import OrderedDict
+import settings
+from settings import *
+from audio import AUDIO
+
+IMAGE_CACHE = {} # (path, alpha) -> decoded surface in display format. Shared: scale/copy it, never draw onto it.
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+OPAQUE_NAME_HINTS = ("BACKGROUND", "_BG", "TUTORIAL", "MANWHA", "GAMEOVER", "ENDSCREEN") # Loaded with convert(), not convert_alpha()
+
+
+def build_asset_manifest():
+    """
+    Lists (kind, path) for every asset path in settings.py, including dicts/lists such as WORLD_BACKGROUNDS.
+    kind is "image" (per-pixel alpha), "opaque" (full-screen art, converted without alpha), "world" (a world
+    background, kept scaled to the screen in WORLD_BACKGROUND_CACHE) or "sound".
+    Music and video are streamed by their players and are not part of the manifest.
+    """
+    manifest = []; seen = set()
+    def add(kind, path):
+        if (kind, path) not in seen: seen.add((kind, path)); manifest.append((kind, path))
+    def walk(name, value):
+        if isinstance(value, str):
+            lower = value.lower()
+            if name.endswith("_SOUND"): add("sound", value)
+            elif name == "WORLD_BACKGROUNDS": add("world", value) # Screen-sized, owned by WORLD_BACKGROUND_CACHE
+            elif lower.endswith(IMAGE_EXTENSIONS): add("opaque" if any(hint in name for hint in OPAQUE_NAME_HINTS) else "image", value)
+        elif isinstance(value, dict):
+            for item in value.values(): walk(name, item)
+        elif isinstance(value, (list, tuple)):
+            for item in value: walk(name, item)
+    for name, value in vars(settings).items():
+        if name.isupper(): walk(name, value)
+    return manifest
+
+
+# --- Disk cache of final pixels ---
+# One file per (kind, asset path, target size, alpha): a header with the asset's mtime/size, then raw RGBA/RGBX rows.
+# A header that no longer matches the asset on disk is a miss, and the entry is rewritten in place.
+DISK_CACHE_MAGIC = b"SSC1"
+DISK_CACHE_HEADER = struct.Struct("<4sqqIII") # magic, asset mtime_ns, asset size, width, height, frame count
+DISK_CACHE_STATS = {"hits": 0, "misses": 0, "writes": 0, "bytes_read": 0}
+
+
+def _disk_cache_file(kind, path, size, alpha):
+    digest = hashlib.sha1(f"{kind}|{os.path.abspath(path)}|{size}|{alpha}".encode("utf-8")).hexdigest()[:24]
+    return os.path.join(SURFACE_DISK_CACHE_DIR, f"{digest}.surf")
+
+
+def read_disk_cache(kind, path, size, alpha):
+    """
+    Returns (surface, frame_count) from the disk cache, or (None, 0) on a miss. The pixels are memory-mapped and
+    wrapped with pygame.image.frombuffer, then copied into a surface that owns them (not yet display-converted).
+    """
+    if not SURFACE_DISK_CACHE_ENABLED: return None, 0
+    try:
+        stat = os.stat(path)
+        with open(_disk_cache_file(kind, path, size, alpha), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, mtime_ns, file_size, width, height, count = DISK_CACHE_HEADER.unpack_from(mm)
+            pixel_bytes = width * height * 4
+            if (magic != DISK_CACHE_MAGIC or mtime_ns != stat.st_mtime_ns or file_size != stat.st_size
+                    or len(mm) != DISK_CACHE_HEADER.size + pixel_bytes or not width or not height):
+                DISK_CACHE_STATS["misses"] += 1; return None, 0 # Asset changed (or entry damaged): rebuild
+            view = memoryview(mm)[DISK_CACHE_HEADER.size:]
+            mapped = pygame.image.frombuffer(view, (width, height), "RGBA" if alpha else "RGBX")
+            surface = mapped.copy()
+            del mapped; view.release() # The mapping must have no exports left before it closes
+    except (OSError, ValueError, struct.error, BufferError, pygame.error):
+        DISK_CACHE_STATS["misses"] += 1; return None, 0
+    DISK_CACHE_STATS["hits"] += 1; DISK_CACHE_STATS["bytes_read"] += pixel_bytes
+    return surface, count
+
+
+def write_disk_cache(kind, path, size, alpha, surface, count=1):
+    """Stores a surface's pixels for `path`; written to a temp file and renamed so readers never see half an entry."""
+    if not SURFACE_DISK_CACHE_ENABLED: return
+    cache_file = _disk_cache_file(kind, path, size, alpha)
+    temp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+    try:
+        stat = os.stat(path)
+        os.makedirs(SURFACE_DISK_CACHE_DIR, exist_ok=True)
+        pixels = pygame.image.tobytes(surface, "RGBA" if alpha else "RGBX")
+        with open(temp_file, "wb") as f:
+            f.write(DISK_CACHE_HEADER.pack(DISK_CACHE_MAGIC, stat.st_mtime_ns, stat.st_size, surface.get_width(), surface.get_height(), count))
+            f.write(pixels)
+        os.replace(temp_file, cache_file)
+        DISK_CACHE_STATS["writes"] += 1
+    except (OSError, ValueError, pygame.error) as e:
+        print(f"Warning: Could not write surface cache for {path}: {e}")
+        try: os.remove(temp_file)
+        except OSError: pass
+
+
+def describe_disk_cache():
+    st = DISK_CACHE_STATS
+    return (f"Surface disk cache: {st['hits']} hits, {st['misses']} misses, {st['writes']} writes, "
+            f"{st['bytes_read'] / (1024 * 1024):.1f} MB mapped in")
+
+
+def _fit_source(surface):
+    """Downscales a decoded image to fit ASSET_MAX_SOURCE_SIZE (keeps aspect ratio); smaller images pass through."""
+    max_w, max_h = ASSET_MAX_SOURCE_SIZE
+    w, h = surface.get_size()
+    if w <= max_w and h <= max_h: return surface
+    factor = min(max_w / w, max_h / h)
+    size = (max(1, int(w * factor)), max(1, int(h * factor)))
+    try: return pygame.transform.smoothscale(surface, size)
+    except ValueError: return pygame.transform.scale(surface, size) # smoothscale needs 24/32-bit pixels
+
+
+def _to_display_format(surface, alpha):
+    return surface.convert_alpha() if alpha else surface.convert()
+
+
+def _load_source(path, alpha):
+    """Decoded (and size-capped) source pixels from the disk cache, or decoded from the asset and cached. Thread-safe."""
+    surface, _ = read_disk_cache("source", path, ASSET_MAX_SOURCE_SIZE, alpha)
+    if surface is None:
+        surface = _fit_source(pygame.image.load(path))
+        write_disk_cache("source", path, ASSET_MAX_SOURCE_SIZE, alpha, surface)
+    return surface
+
+
+def get_image(path, alpha=True):
+    """
+    Drop-in for pygame.image.load(path).convert_alpha() (or .convert() with alpha=False), served from IMAGE_CACHE.
+    Raises the same errors as pygame.image.load when the file is missing or undecodable.
+    """
+    key = (path, alpha)
+    surface = IMAGE_CACHE.get(key)
+    if surface is None:
+        with_alpha = IMAGE_CACHE.get((path, True))
+        if not alpha and with_alpha is not None: surface = with_alpha.convert() # Same pixels, alpha dropped
+        else: surface = _to_display_format(_load_source(path, alpha), alpha)
+        IMAGE_CACHE[key] = surface
+    return surface
+
+
+def get_scaled_image(path, size, alpha=True):
+    """
+    A new surface of `path` scaled to `size` (callers may draw on it). Scaled from the in-memory source when that is
+    loaded; otherwise read from the disk cache, so a cold start does not decode a large asset just to shrink it.
+    """
+    size = (int(size[0]), int(size[1]))
+    source = IMAGE_CACHE.get((path, alpha))
+    if source is not None: return pygame.transform.scale(source, size)
+    return _to_display_format(_load_scaled(path, size, alpha), alpha)
+
+
+def _load_scaled(path, size, alpha):
+    """Scaled pixels from the disk cache, or scaled from the source and stored. Thread-safe; not display-converted."""
+    cached, _ = read_disk_cache("scaled", path, size, alpha)
+    if cached is not None: return cached
+    scaled = pygame.transform.scale(_load_source(path, alpha), size)
+    write_disk_cache("scaled", path, size, alpha, scaled)
+    return scaled
+
+
+def _surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def image_cache_bytes():
+    return sum(_surface_bytes(surface) for surface in IMAGE_CACHE.values())
+
+
+# --- World backgrounds: 11 worlds over 100 levels, so keep the converted screen-sized ones around ---
+class WorldBackgroundCache:
+    """
+    LRU of world backgrounds, converted and scaled to the screen, bounded by max_bytes of pixel memory.
+    get() is for run_level; warm() is called on the level-clear / world-transition screens so the next level's
+    background is already in memory when the level starts. Returned surfaces are shared: blit them, never draw on them.
+    """
+    def __init__(self, max_bytes=int(WORLD_BACKGROUND_CACHE_MB * 1024 * 1024), size=(SCREEN_WIDTH, SCREEN_HEIGHT)):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.entries = OrderedDict() # path -> surface, least recently used first
+        self.bytes = 0
+        self.hits = 0; self.misses = 0; self.warms = 0; self.evictions = 0
+        self.load_ms = 0.0 # Time spent loading on get() misses (what a level start waited for)
+
+    def _load(self, path):
+        if not path or not os.path.exists(path): return None
+        try: return _to_display_format(_load_scaled(path, self.size, False), False)
+        except (pygame.error, OSError, ValueError) as e: print(f"Error loading background {path}: {e}"); return None
+
+    def has_room(self, nbytes):
+        return self.bytes + nbytes <= self.max_bytes
+
+    def put(self, path, surface):
+        if path in self.entries: self.bytes -= _surface_bytes(self.entries.pop(path))
+        nbytes = _surface_bytes(surface)
+        while self.entries and self.bytes + nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= _surface_bytes(evicted); self.evictions += 1
+        self.entries[path] = surface; self.bytes += nbytes # Always keep the newest, even if it alone is over budget
+
+    def get(self, world_name):
+        """The world's background (or None if it has none / fails to load)."""
+        path = WORLD_BACKGROUNDS.get(world_name)
+        surface = self.entries.get(path)
+        if surface is not None: self.entries.move_to_end(path); self.hits += 1; return surface
+        self.misses += 1
+        start = time.perf_counter()
+        surface = self._load(path)
+        self.load_ms += (time.perf_counter() - start) * 1000.0
+        if surface is not None: self.put(path, surface)
+        return surface
+
+    def warm(self, world_name):
+        """Loads the world's background ahead of time (no-op if it is already cached)."""
+        path = WORLD_BACKGROUNDS.get(world_name)
+        if path in self.entries: self.entries.move_to_end(path); return
+        surface = self._load(path)
+        if surface is not None: self.warms += 1; self.put(path, surface)
+
+    def describe(self):
+        lookups = self.hits + self.misses
+        return (f"World backgrounds: {len(self.entries)} cached, {self.bytes / (1024 * 1024):.1f}/{self.max_bytes / (1024 * 1024):.0f} MB, "
+                f"{self.hits}/{lookups} level starts hit, {self.warms} warmed ahead, {self.evictions} evicted, "
+                f"{self.load_ms:.1f} ms spent loading on misses")
+
+
+WORLD_BACKGROUND_CACHE = WorldBackgroundCache()
+
+
+class AssetPreloader:
+    """
+    Decodes the manifest on a daemon thread. Images come back through a queue and are converted to the display
+    format on the main thread by pump() (convert() needs the display); sounds go straight into the AUDIO cache.
+    """
+    def __init__(self, manifest=None):
+        self.manifest = manifest if manifest is not None else build_asset_manifest()
+        self.total = len(self.manifest)
+        self.done = 0; self.missing = 0; self.failed = 0
+        self.current = ""
+        self.decoded = queue.Queue()
+        self.thread = None
+        self.stop_requested = False
+        self.start_time = None; self.elapsed_ms = 0.0
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._worker, name="asset-preload", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_requested = True
+
+    def _worker(self):
+        for kind, path in self.manifest:
+            if self.stop_requested: break
+            self.current = os.path.basename(path)
+            if not os.path.exists(path): self.decoded.put((kind, path, None, "missing")); continue
+            if kind == "sound":
+                sound = AUDIO.load(path) if AUDIO.ready else None
+                self.decoded.put((kind, path, None, "ok" if sound is not None else "failed")); continue
+            try:
+                if kind == "world": surface = _load_scaled(path, WORLD_BACKGROUND_CACHE.size, False)
+                else: surface = _load_source(path, kind == "image")
+                self.decoded.put((kind, path, surface, "ok"))
+            except (pygame.error, OSError, ValueError) as e:
+                print(f"Error preloading image {path}: {e}")
+                self.decoded.put((kind, path, None, "failed"))
+
+    def pump(self, budget_ms=ASSET_PRELOAD_CONVERT_BUDGET_MS):
+        """Main thread: converts decoded images into IMAGE_CACHE for up to budget_ms. Returns True once everything is in."""
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while time.perf_counter() < deadline:
+            try: kind, path, surface, status = self.decoded.get_nowait()
+            except queue.Empty: break
+            if status == "missing": self.missing += 1
+            elif status == "failed": self.failed += 1
+            elif kind == "world": # Fill the background LRU while it has room; the rest stay warm in the disk cache
+                if WORLD_BACKGROUND_CACHE.has_room(surface.get_width() * surface.get_height() * 4): WORLD_BACKGROUND_CACHE.put(path, surface.convert())
+            elif surface is not None: IMAGE_CACHE[(path, kind == "image")] = _to_display_format(surface, kind == "image")
+            self.done += 1
+        if self.finished and not self.elapsed_ms: self.elapsed_ms = (time.perf_counter() - self.start_time) * 1000.0
+        return self.finished
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def finish(self):
+        """Blocks until the manifest is loaded (no progress screen)."""
+        if self.thread is None: self.start()
+        while not self.pump(budget_ms=50): self.thread.join(0.005)
+
+    def describe(self):
+        sounds = sum(1 for kind, path in self.manifest if kind == "sound")
+        return (f"Assets: {self.done}/{self.total} manifest entries ({self.total - sounds} images, {sounds} sounds) in {self.elapsed_ms:.0f} ms, "
+                f"{self.missing} missing, {self.failed} failed; memory: images {image_cache_bytes() / (1024 * 1024):.1f} MB, "
+                f"world backgrounds {WORLD_BACKGROUND_CACHE.bytes / (1024 * 1024):.1f} MB, "
+                f"sounds {AUDIO.memory_bytes() / (1024 * 1024):.1f} MB. {describe_disk_cache()}")
+# --- END OF FILE assets.py ---
@@ -0,0 +1,121 @@
+# --- START OF FILE audio.py ---
+# Central sound-effect playback: every *_SOUND in settings.py is decoded once, and effects play on a fixed
+# pool of mixer channels with a per-sound voice cap and priority, so a burst of pickups never re-reads disk.
+
+import os, time
+import pygame
+from collections import deque
+import settings
+from settings import *
+
+
+class AudioManager:
+    """Owns the decoded Sound objects and the effect channels. Use play_sound() from game code."""
+    def __init__(self, num_channels=AUDIO_CHANNELS):
+        self.num_channels = num_channels
+        self.sounds = {} # path -> pygame.mixer.Sound, or None if missing/undecodable (so it is not retried)
+        self.channels = []
+        self.voices = [] # Per channel: (path, priority, play sequence number) of what it last started
+        self.play_seq = 0
+        self.ready = False
+        # Metrics
+        self.plays = 0; self.cache_hits = 0; self.cache_misses = 0
+        self.dropped = 0; self.stolen = 0
+        self.latency_ms = deque(maxlen=AUDIO_LATENCY_HISTORY)
+        self.preload_ms = 0.0
+
+    def init(self, preload=True):
+        """Sets up the channel pool and, unless preload is False (assets.AssetPreloader does it), decodes every sound effect path defined in settings.py."""
+        if not pygame.mixer.get_init(): print("Audio: mixer not initialized, sound effects disabled."); return
+        pygame.mixer.set_num_channels(self.num_channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(self.num_channels)]
+        self.voices = [None] * self.num_channels
+        self.ready = True
+        if not preload: return
+        start = time.perf_counter()
+        paths = [value for name, value in vars(settings).items() if name.endswith("_SOUND") and isinstance(value, str)]
+        for path in paths: self.load(path)
+        self.preload_ms = (time.perf_counter() - start) * 1000.0
+        loaded = sum(1 for path in paths if self.sounds.get(path) is not None)
+        if DIAGNOSTIC_REPORTS: print(f"Audio: preloaded {loaded}/{len(paths)} sound effects in {self.preload_ms:.0f} ms on {self.num_channels} channels.")
+
+    def load(self, path):
+        """Decodes one sound into the cache (safe to call from a loader thread) and returns it, or None."""
+        sound = None
+        if os.path.exists(path):
+            try: sound = pygame.mixer.Sound(path)
+            except pygame.error as e: print(f"Error loading sound {path}: {e}")
+        self.sounds[path] = sound
+        return sound
+
+    def _pick_channel(self, path, priority):
+        """Free channel, else the oldest voice of the same sound over its cap, else the oldest lower-priority voice."""
+        max_voices = SOUND_VOICE_LIMITS.get(path, (AUDIO_DEFAULT_VOICES, AUDIO_DEFAULT_PRIORITY))[0]
+        free_index = None; same_sound = []; lower_priority = []
+        for i, channel in enumerate(self.channels):
+            voice = self.voices[i]
+            if voice is None or not channel.get_busy():
+                if free_index is None: free_index = i
+                continue
+            if voice[0] == path: same_sound.append(i)
+            elif voice[1] < priority: lower_priority.append(i)
+        oldest = lambda indices: min(indices, key=lambda i: self.voices[i][2])
+        if len(same_sound) >= max_voices: return oldest(same_sound), True # Restart the oldest copy
+        if free_index is not None: return free_index, False
+        if lower_priority: return oldest(lower_priority), True
+        return None, False
+
+    def play(self, path, volume=1.0):
+        """Plays a sound effect by path. Returns the Channel used, or None if it was dropped or unavailable."""
+        if not self.ready: return None
+        start = time.perf_counter()
+        self.plays += 1
+        if path in self.sounds: self.cache_hits += 1; sound = self.sounds[path]
+        else: self.cache_misses += 1; sound = self.load(path) # Paths not declared in settings.py load on first use
+        if sound is None: return None
+        priority = SOUND_VOICE_LIMITS.get(path, (AUDIO_DEFAULT_VOICES, AUDIO_DEFAULT_PRIORITY))[1]
+        index, steal = self._pick_channel(path, priority)
+        if index is None: self.dropped += 1; return None
+        channel = self.channels[index]
+        if steal: channel.stop(); self.stolen += 1
+        try:
+            channel.set_volume(volume)
+            channel.play(sound)
+        except pygame.error as e: print(f"Error playing sound {path}: {e}"); return None
+        self.play_seq += 1
+        self.voices[index] = (path, priority, self.play_seq)
+        self.latency_ms.append((time.perf_counter() - start) * 1000.0)
+        return channel
+
+    def memory_bytes(self):
+        """Approximate size of the decoded sample data held in the cache."""
+        mixer_init = pygame.mixer.get_init()
+        if not mixer_init: return 0
+        frequency, size, channels = mixer_init
+        bytes_per_second = frequency * channels * (abs(size) // 8)
+        return int(sum(sound.get_length() * bytes_per_second for sound in self.sounds.values() if sound is not None))
+
+    def stats(self):
+        latencies = sorted(self.latency_ms)
+        return {"plays": self.plays, "cache_hits": self.cache_hits, "cache_misses": self.cache_misses,
+                "hit_rate": self.cache_hits / self.plays if self.plays else 1.0, "dropped": self.dropped, "stolen": self.stolen,
+                "latency_ms_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "latency_ms_p95": latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0,
+                "latency_ms_max": latencies[-1] if latencies else 0.0, "preload_ms": self.preload_ms}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Audio: {st['plays']} plays, cache hit rate {st['hit_rate'] * 100:.0f}% ({st['cache_misses']} misses), "
+                f"{st['dropped']} dropped, {st['stolen']} voices cut, play latency mean {st['latency_ms_mean']:.3f}ms "
+                f"p95 {st['latency_ms_p95']:.3f}ms max {st['latency_ms_max']:.3f}ms")
+
+
+AUDIO = AudioManager()
+
+def init_audio(preload=True):
+    """Call once after pygame.mixer.init()."""
+    AUDIO.init(preload)
+
+def play_sound(path, volume=1.0):
+    return AUDIO.play(path, volume)
+# --- END OF FILE audio.py ---
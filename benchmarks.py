@@ -0,0 +1,276 @@
+# --- START OF FILE benchmarks.py ---
+# Micro and macro benchmarks on SDL's dummy drivers: game_objects hot paths (Enemy.update at several crowd sizes,
+# load_sprite_frames cold/disk/warm, particle bursts, the collision tests, powerup and player updates) and a full
+# run_level frame for one level per world. Results are written as JSON with environment metadata so runs can be
+# compared over time:  python benchmarks.py [--quick] [--out file.json] [--compare baseline.json] [--only name ...]
+
+import os, sys, json, time, random, platform, argparse, tempfile, subprocess
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import pygame
+from settings import *
+import assets
+import game_objects
+from game_objects import (Player, EarthEnemy, CollectibleSeed, MagnetPowerUp, FreezePowerUp, ShieldPowerUp, DoubleSeedPowerUp,
+                          Particle, PARTICLE_POOL, EnemyCollisionBroadphase, load_sprite_frames, emit_particle_burst,
+                          circle_collision, collide_circle_precise_seed)
+from level_sim import KeyState, WORLD_ENEMY_IMAGE_MAP, DEFAULT_VAULT_UPGRADES, get_scene_description
+from spawn_sampler import PoissonDiskSampler
+
+BENCHMARK_SCHEMA = 1
+
+
+def _time_runs(func, number, repeat, setup=None):
+    """Times `number` calls of func(state) per repeat (setup() builds a fresh state, untimed). Per-call microseconds."""
+    runs = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number): func(state)
+        runs.append((time.perf_counter() - start) * 1e6 / number)
+    runs.sort()
+    return {"us_median": runs[len(runs) // 2], "us_min": runs[0], "us_mean": sum(runs) / len(runs), "number": number, "repeat": repeat}
+
+
+def _place(count, spacing, seed):
+    sampler = PoissonDiskSampler((TRACK_LEFT + 40, TRACK_TOP + 40, TRACK_RIGHT - 40, TRACK_BOTTOM - 40), spacing, random.Random(seed))
+    return sampler.sample_many(count)
+
+
+# --- Micro benchmarks: each returns a list of result dicts ---
+def bench_enemy_update(repeat, quick=False):
+    """One frame of the level's enemy loop (grid broadphase + Enemy.update per enemy), as LevelSimulation.step runs it."""
+    results = []
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    for count in BENCHMARK_ENEMY_COUNTS:
+        positions = _place(count, ENEMY_SPAWN_SPACING, count)
+        def setup():
+            rng = random.Random(count)
+            return [EarthEnemy(x, y, 1.0 + 45 * 0.08, image_path=EARTH_ENEMY_IMAGE, rng=rng) for x, y in positions]
+        def frame(enemies):
+            broadphase = EnemyCollisionBroadphase(enemies)
+            for i, enemy in enumerate(enemies):
+                others = broadphase.candidates(i)
+                enemy.update(player, speed_modifier=1.0, dt=1 / FPS, other_enemies=others)
+                broadphase.resolved(i, others)
+        timing = _time_runs(frame, 5 if quick else 20, repeat, setup)
+        results.append({"name": f"enemy_update_{count}", "params": {"enemies": count, "broadphase": ENEMY_COLLISION_BROADPHASE},
+                        "us_per_enemy": timing["us_median"] / count, **timing})
+    return results
+
+
+def bench_load_sprite_frames(repeat, quick=False):
+    """Enemy sprite sheets: cold (decode + cut + scale), disk (surface disk cache hit) and warm (in-memory cache hit)."""
+    paths = sorted(set(WORLD_ENEMY_IMAGE_MAP.values()))
+    args = (0, 0, ENEMY_CUMULATIVE_SIZE_INCREASE, True)
+    def clear_memory(state=None):
+        for path in paths: game_objects.SPRITE_SHEET_CACHE.pop((path,) + args, None)
+    def load_all(state):
+        for path in paths: load_sprite_frames(path, *args)
+    results = []
+    disk_enabled = assets.SURFACE_DISK_CACHE_ENABLED
+    try:
+        assets.SURFACE_DISK_CACHE_ENABLED = False
+        timing = _time_runs(load_all, 1, max(3, repeat // 2), clear_memory)
+        results.append({"name": "load_sprite_frames_cold", "params": {"sheets": len(paths)}, **timing})
+        assets.SURFACE_DISK_CACHE_ENABLED = disk_enabled
+        if disk_enabled:
+            clear_memory(); load_all(None) # Make sure every sheet is on disk
+            timing = _time_runs(load_all, 1, repeat, clear_memory)
+            results.append({"name": "load_sprite_frames_disk", "params": {"sheets": len(paths)}, **timing})
+        load_all(None)
+        timing = _time_runs(load_all, 200 if not quick else 50, repeat)
+        results.append({"name": "load_sprite_frames_warm", "params": {"sheets": len(paths)}, **timing})
+    finally:
+        assets.SURFACE_DISK_CACHE_ENABLED = disk_enabled
+    return results
+
+
+def bench_particles(repeat, quick=False):
+    """A 50-particle burst through the pool (emit_particle_burst) and the same burst as unpooled Particle(pos) sprites."""
+    burst = 50; pos = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    PARTICLE_POOL.warm()
+    def setup():
+        PARTICLE_POOL.reclaim_all(); return pygame.sprite.Group()
+    def pooled(group):
+        emit_particle_burst(group, pos, burst, colors=SHIELD_BREAK_PARTICLE_COLORS, size_range=(4, 10))
+        for particle in group.sprites(): particle.kill() # Back to the pool for the next burst
+    def unpooled(group):
+        for _ in range(burst): group.add(Particle(pos, GOLD))
+        group.empty()
+    number = 20 if quick else 100
+    results = []
+    for name, func in (("particle_burst_pooled", pooled), ("particle_burst_unpooled", unpooled)):
+        timing = _time_runs(func, number, repeat, setup)
+        results.append({"name": name, "params": {"particles": burst}, "us_per_particle": timing["us_median"] / burst, **timing})
+    PARTICLE_POOL.reclaim_all()
+    return results
+
+
+def bench_collisions(repeat, quick=False):
+    """circle_collision (player vs enemies) and collide_circle_precise_seed (player vs seeds), 1000 pairs per call."""
+    pairs = 1000
+    player = Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    enemies = [EarthEnemy(x, y, 1.0, image_path=EARTH_ENEMY_IMAGE, rng=random.Random(i)) for i, (x, y) in enumerate(_place(pairs, 1, 7))]
+    seeds = [CollectibleSeed(x, y) for x, y in _place(pairs, 1, 8)]
+    def enemy_pairs(state):
+        for enemy in enemies: circle_collision(player, enemy)
+    def seed_pairs(state):
+        for seed in seeds: collide_circle_precise_seed(player, seed)
+    number = 5 if quick else 30
+    results = []
+    for name, func in (("circle_collision", enemy_pairs), ("collide_circle_precise_seed", seed_pairs)):
+        timing = _time_runs(func, number, repeat)
+        results.append({"name": name, "params": {"pairs": pairs}, "checks_per_sec": pairs / (timing["us_median"] / 1e6), **timing})
+    return results
+
+
+def bench_powerup_update(repeat, quick=False):
+    """BasePowerUp.update for one of each powerup type."""
+    powerups = [cls(x, y) for cls, (x, y) in zip((MagnetPowerUp, FreezePowerUp, ShieldPowerUp, DoubleSeedPowerUp), _place(4, POWERUP_SPAWN_SPACING, 9))]
+    def update_all(state):
+        for powerup in powerups: powerup.update(1 / FPS)
+    timing = _time_runs(update_all, 500 if not quick else 100, repeat)
+    return [{"name": "powerup_update", "params": {"powerups": len(powerups)}, "us_per_powerup": timing["us_median"] / len(powerups), **timing}]
+
+
+def bench_player_update(repeat, quick=False):
+    """Player.update with the right and up keys held (movement, rotation frame pick, trail) in clear weather."""
+    keys = KeyState.from_pressed((pygame.K_RIGHT, pygame.K_UP))
+    shop_upgrades = {"speed": 1, "seed_enemy": 0, "enemy_slow": 0}
+    def setup():
+        return Player(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
+    def update(player):
+        player.update(keys, 0.0, "clear", shop_upgrades, player_ref=player, dt=1 / FPS)
+    timing = _time_runs(update, 60 if quick else 240, repeat, setup) # A few seconds of movement, well inside the track
+    return [{"name": "player_update", "params": {"keys": "right+up", "weather": "clear"}, **timing}]
+
+
+# --- Macro benchmark: whole run_level frames ---
+def bench_run_level(repeat, quick=False, levels=BENCHMARK_LEVELS):
+    """
+    BENCHMARK_LEVEL_FRAMES frames of run_level per level with no input (level_seed + benchmark_frames).
+    Busy time per frame and its phases come from the level's FrameProfiler; frame_ms from the renderer.
+    The level end is saved to a temporary file so the real save_data.json is left alone.
+    """
+    import main # Deferred: importing main runs its library checks and builds the UI module
+    from save_writer import SAVE_WRITER
+    from frame_profiler import get_frame_profiler, PROFILER_PHASES
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    frames = 30 if quick else BENCHMARK_LEVEL_FRAMES
+    results = []
+    real_save_path = SAVE_WRITER.path
+    temp_dir = tempfile.mkdtemp(prefix="superspeed_bench_")
+    SAVE_WRITER.flush(); SAVE_WRITER.path = os.path.join(temp_dir, "save_data.json")
+    main.save_data.setdefault("vault_upgrades", dict(DEFAULT_VAULT_UPGRADES))
+    try:
+        for level in levels:
+            main.run_level(screen, level, 0, {"speed": 1, "seed_enemy": 0, "enemy_slow": 0}, {}, 0, -1e9,
+                           level_seed=BENCHMARK_LEVEL_SEED, benchmark_frames=frames)
+            profiler = get_frame_profiler("level")
+            p50, p95, p99 = profiler.phase_stats("total")
+            render = dict(main.LAST_LEVEL_RENDER_STATS)
+            results.append({"name": f"run_level_{level}", "params": {"level": level, "world": get_scene_description(level), "frames": frames,
+                                                                    "seed": BENCHMARK_LEVEL_SEED, "render_mode": render.get("mode")},
+                            "busy_ms_p50": p50, "busy_ms_p95": p95, "busy_ms_p99": p99,
+                            "frame_ms_mean": render.get("frame_ms_mean", 0.0), "frame_ms_p95": render.get("frame_ms_p95", 0.0),
+                            "phase_ms_p50": {phase: profiler.phase_stats(phase)[0] for phase in PROFILER_PHASES},
+                            "counts": dict(profiler.counts)})
+    finally:
+        SAVE_WRITER.flush(); SAVE_WRITER.path = real_save_path
+    return results
+
+
+BENCHMARKS = {"enemy_update": bench_enemy_update, "load_sprite_frames": bench_load_sprite_frames, "particles": bench_particles,
+              "collisions": bench_collisions, "powerup_update": bench_powerup_update, "player_update": bench_player_update,
+              "run_level": bench_run_level}
+
+
+def environment_metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import numpy; numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "git_commit": commit, "python": platform.python_version(),
+            "implementation": platform.python_implementation(), "platform": platform.platform(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpu_count": os.cpu_count(), "pygame": pygame.version.ver,
+            "sdl": ".".join(str(v) for v in pygame.get_sdl_version()), "numpy": numpy_version,
+            "video_driver": pygame.display.get_driver() if pygame.display.get_init() else os.environ.get("SDL_VIDEODRIVER"),
+            "settings": {"FPS": FPS, "DISPLAY_FPS": DISPLAY_FPS, "RENDER_MODE": RENDER_MODE, "ENEMY_COLLISION_BROADPHASE": ENEMY_COLLISION_BROADPHASE,
+                         "ENEMY_PHYSICS_ENGINE": ENEMY_PHYSICS_ENGINE, "SURFACE_DISK_CACHE_ENABLED": SURFACE_DISK_CACHE_ENABLED}}
+
+
+def _headline(result):
+    """(value, unit) used for the printed table and for --compare: lower is better for both."""
+    if "busy_ms_p50" in result: return result["busy_ms_p50"], "ms busy p50"
+    return result["us_median"], "us median"
+
+
+def run_benchmarks(names=None, quick=False, repeat=BENCHMARK_REPEAT):
+    pygame.display.init(); pygame.font.init()
+    if pygame.display.get_surface() is None: pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT)) # convert() needs a display
+    report = {"schema": BENCHMARK_SCHEMA, "quick": quick, "environment": environment_metadata(), "results": []}
+    for name in names or BENCHMARKS:
+        start = time.perf_counter()
+        results = BENCHMARKS[name](repeat, quick)
+        for result in results:
+            result["group"] = name
+            value, unit = _headline(result)
+            print(f"  {result['name']:<32} {value:>12.2f} {unit}")
+        print(f"[{name}] done in {time.perf_counter() - start:.1f}s")
+        report["results"].extend(results)
+    return report
+
+
+def compare_reports(report, baseline, threshold=BENCHMARK_REGRESSION_THRESHOLD):
+    """Prints current/baseline per benchmark and returns the names that got slower than `threshold`."""
+    old = {result["name"]: _headline(result)[0] for result in baseline.get("results", [])}
+    regressions = []
+    print(f"Compared with {baseline.get('environment', {}).get('git_commit')} ({baseline.get('environment', {}).get('timestamp')}):")
+    for result in report["results"]:
+        before = old.get(result["name"])
+        if not before: continue
+        ratio = _headline(result)[0] / before
+        flag = "  REGRESSION" if ratio > threshold else ""
+        if flag: regressions.append(result["name"])
+        print(f"  {result['name']:<32} {ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Superspeed Seeds benchmark suite (dummy SDL drivers).")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and run_level frames (smoke run)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="run only these benchmark groups")
+    parser.add_argument("--repeat", type=int, default=BENCHMARK_REPEAT)
+    parser.add_argument("--out", help=f"JSON output path (default: {BENCHMARK_OUTPUT_DIR}/<time>_<commit>.json)")
+    parser.add_argument("--compare", help="baseline JSON to compare against; exit code 1 on regressions")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.only, args.quick, max(1, args.repeat))
+    out_path = args.out
+    if out_path is None:
+        os.makedirs(BENCHMARK_OUTPUT_DIR, exist_ok=True)
+        out_path = os.path.join(BENCHMARK_OUTPUT_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{report['environment']['git_commit'] or 'nogit'}.json")
+    try:
+        with open(out_path, "w") as f: json.dump(report, f, indent=2)
+        print(f"Benchmark results written: {out_path} ({len(report['results'])} results)")
+    except OSError as e:
+        print(f"Error writing benchmark results: {e}")
+
+    regressions = []
+    if args.compare:
+        try:
+            with open(args.compare) as f: regressions = compare_reports(report, json.load(f))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error reading baseline {args.compare}: {e}")
+    pygame.quit()
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# --- END OF FILE benchmarks.py ---
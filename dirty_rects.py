@@ -0,0 +1,87 @@
+# --- START OF FILE dirty_rects.py ---
+# Optional dirty-rectangle presentation for run_level: instead of repainting the whole background and flipping,
+# only the areas drawn last frame are restored and display.update() gets just the rectangles that changed.
+
+import time
+import pygame
+from collections import deque
+from settings import *
+
+
+class DirtyRectRenderer:
+    """
+    Wraps a frame of drawing. begin() prepares the background, add() records every rect drawn this frame,
+    present() pushes the frame. mode "full" is the old path (full background blit + display.flip()).
+    mode "dirty" restores only last frame's rects from the background and updates last + current rects.
+    Anything drawn translucently must be add()ed, or it would be blended onto itself again next frame.
+    """
+    def __init__(self, screen, background=None, background_color=BLACK, mode=RENDER_MODE, history=600):
+        if mode not in ("full", "dirty"):
+            print(f"Warning: Unknown render mode '{mode}', using 'full'.")
+            mode = "full"
+        self.screen = screen
+        self.background = background
+        self.background_color = background_color
+        self.mode = mode
+        self.screen_rect = screen.get_rect()
+        self.rects = [] # Drawn this frame
+        self.prev_rects = [] # Drawn last frame (erased this frame)
+        self.full_redraw = True # First frame, and after menus/overlays painted over everything
+        self.frame_start = None
+        self.frame_ms = deque(maxlen=history)
+        self.pushed_area = deque(maxlen=history) # Fraction of the screen sent to the display per frame
+
+    def invalidate(self):
+        """Next frame repaints and flips the whole screen."""
+        self.full_redraw = True
+
+    def begin(self):
+        self.frame_start = time.perf_counter()
+        self.rects = []
+        if self.mode == "full" or self.full_redraw:
+            if self.background: self.screen.blit(self.background, (0, 0))
+            else: self.screen.fill(self.background_color)
+            return
+        screen = self.screen; background = self.background; screen_rect = self.screen_rect
+        for rect in self.prev_rects:
+            rect = rect.clip(screen_rect)
+            if not rect.width or not rect.height: continue
+            if background: screen.blit(background, rect, rect)
+            else: screen.fill(self.background_color, rect)
+
+    def add(self, rect):
+        """Records a drawn rect (as returned by blit / pygame.draw); returns it for convenience."""
+        if rect: self.rects.append(rect)
+        return rect
+
+    def add_all(self, rects):
+        for rect in rects:
+            if rect: self.rects.append(rect)
+
+    def present(self):
+        screen_area = self.screen_rect.width * self.screen_rect.height
+        if self.mode == "full" or self.full_redraw:
+            pygame.display.flip(); pushed = 1.0
+            self.full_redraw = False
+        else:
+            update_rects = [rect.clip(self.screen_rect) for rect in self.prev_rects + self.rects]
+            update_rects = [rect for rect in update_rects if rect.width and rect.height]
+            pushed = sum(rect.width * rect.height for rect in update_rects) / screen_area
+            if pushed >= DIRTY_RECT_FULL_FLIP_RATIO: pygame.display.flip(); pushed = 1.0 # Overlapping rects: one flip is cheaper
+            elif update_rects: pygame.display.update(update_rects)
+        self.prev_rects = self.rects
+        self.pushed_area.append(min(1.0, pushed))
+        if self.frame_start is not None: self.frame_ms.append((time.perf_counter() - self.frame_start) * 1000.0)
+
+    def stats(self):
+        times = sorted(self.frame_ms)
+        return {"mode": self.mode, "frames": len(times),
+                "frame_ms_mean": sum(times) / len(times) if times else 0.0,
+                "frame_ms_p95": times[int(0.95 * (len(times) - 1))] if times else 0.0,
+                "pushed_area_mean": sum(self.pushed_area) / len(self.pushed_area) if self.pushed_area else 0.0}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Render [{st['mode']}]: {st['frame_ms_mean']:.2f}ms/frame mean, p95 {st['frame_ms_p95']:.2f}ms over {st['frames']} frames, "
+                f"{st['pushed_area_mean'] * 100:.0f}% of the screen pushed per frame")
+# --- END OF FILE dirty_rects.py ---
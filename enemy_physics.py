@@ -0,0 +1,186 @@
+# --- START OF FILE enemy_physics.py ---
+# Optional NumPy structure-of-arrays physics for roaming enemies (every Enemy except David).
+# Selected with ENEMY_PHYSICS_ENGINE = "numpy" in settings.py; the per-sprite Enemy.update path stays the default.
+
+import math
+from settings import *
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+class NumpyEnemyEngine:
+    """
+    Keeps pos, vel, speed_pps, radius, homing and bounce_factor of a list of enemies in
+    contiguous arrays and steps them in one vectorized pass per frame: homing lerp, speed
+    renormalisation, enemy-enemy bounce, movement and wall bounce. Sprites keep their
+    pos_x/pos_y/vel_x/vel_y/rect attributes in sync, so drawing and collision code are unchanged.
+    """
+    HOMING_STRENGTH = 0.05 # Same as Enemy.update
+    ENEMY_RESTITUTION = 0.7 # Same as Enemy.update
+
+    def __init__(self):
+        self.sprites = []
+        self.count = 0
+        self.pos = None; self.vel = None; self.radius = None
+        self.speed_pps = None; self.homing = None; self.bounce_factor = None
+        self.animated_indices = []
+
+    def invalidate(self):
+        """Forces the per-enemy constants (speed_pps, homing, bounce_factor) to be re-read next step."""
+        self.sprites = []
+
+    def _rebuild(self, sprites):
+        from game_objects import Enemy # Local import: game_objects is heavy and only needed here
+        n = len(sprites)
+        self.sprites = list(sprites)
+        self.count = n
+        self.pos = np.empty((n, 2)); self.vel = np.empty((n, 2)); self.radius = np.empty(n)
+        self.speed_pps = np.array([e.speed_pps for e in sprites], dtype=float)
+        self.homing = np.array([bool(getattr(e, 'homing', False)) for e in sprites], dtype=bool)
+        self.bounce_factor = np.array([e.bounce_factor for e in sprites], dtype=float)
+        # Single-frame enemies without their own animation hook need no per-sprite call at all
+        self.animated_indices = [i for i, e in enumerate(sprites)
+                                 if len(e.frames) > 1 or type(e).update_animation is not Enemy.update_animation]
+
+    def step(self, sprites, dt, speed_modifier=1.0, player=None, aura_radius_sq=-1, aura_slow_factor=1.0):
+        """
+        Advances the given enemies by dt. speed_modifier covers freeze/Mesky/shop slow; enemies
+        within aura_radius_sq of the player are additionally scaled by aura_slow_factor.
+        player is the homing target (None disables homing, as in minigame_3).
+        """
+        if dt <= 0 or not sprites: return
+        if sprites != self.sprites: self._rebuild(sprites)
+        sprites = self.sprites
+        pos = self.pos; vel = self.vel
+        pos[:, 0] = [e.pos_x for e in sprites]; pos[:, 1] = [e.pos_y for e in sprites]
+        vel[:, 0] = [e.vel_x for e in sprites]; vel[:, 1] = [e.vel_y for e in sprites]
+
+        # --- Per-enemy speed modifier (freeze / Mesky / shop, then slow aura) ---
+        modifier = np.full(self.count, float(speed_modifier))
+        if aura_radius_sq > 0 and player is not None:
+            aura_dx = player.pos_x - pos[:, 0]; aura_dy = player.pos_y - pos[:, 1]
+            modifier[aura_dx*aura_dx + aura_dy*aura_dy <= aura_radius_sq] *= aura_slow_factor
+
+        for i in self.animated_indices: sprites[i].update_animation(dt, modifier[i])
+        self.radius[:] = [e.radius for e in sprites] # Animation can change the radius
+
+        active = modifier > 0.01
+        target_speed = self.speed_pps * modifier
+
+        # --- Homing: lerp velocity towards the player ---
+        if player is not None:
+            dx = player.pos_x - pos[:, 0]; dy = player.pos_y - pos[:, 1]
+            dist_sq = dx*dx + dy*dy
+            homing = self.homing & active & (dist_sq > 1)
+            if homing.any():
+                dist = np.sqrt(dist_sq[homing])
+                lerp_factor = min(self.HOMING_STRENGTH * 60 * dt, 1.0)
+                vel[homing, 0] = vel[homing, 0] * (1 - lerp_factor) + target_speed[homing] * dx[homing] / dist * lerp_factor
+                vel[homing, 1] = vel[homing, 1] * (1 - lerp_factor) + target_speed[homing] * dy[homing] / dist * lerp_factor
+
+        # --- Speed renormalisation ---
+        vel_mag_sq = vel[:, 0]**2 + vel[:, 1]**2
+        target_speed_sq = target_speed**2
+        stopped = active & (vel_mag_sq < 0.01) & (target_speed_sq > 0.01)
+        for i in np.flatnonzero(stopped): # Rare: pick a new heading with the enemy's own RNG
+            angle = sprites[i].rng.uniform(0, 2 * math.pi)
+            vel[i, 0] = target_speed[i] * math.cos(angle); vel[i, 1] = target_speed[i] * math.sin(angle)
+        rescale = active & (vel_mag_sq > 0.01) & (np.abs(vel_mag_sq - target_speed_sq) > 1.0)
+        if rescale.any():
+            vel[rescale] *= np.sqrt(target_speed_sq[rescale] / vel_mag_sq[rescale])[:, None]
+
+        self._resolve_collisions(active)
+
+        # --- Movement and wall bounce (frozen enemies stay put) ---
+        pos[active] += vel[active] * dt
+        radius = self.radius; bounce = self.bounce_factor
+        for axis, low, high in ((0, TRACK_LEFT, TRACK_RIGHT), (1, TRACK_TOP, TRACK_BOTTOM)):
+            min_c = low + radius; max_c = high - radius
+            below = active & (pos[:, axis] < min_c)
+            above = active & ~below & (pos[:, axis] > max_c)
+            pos[below, axis] = min_c[below]; vel[below, axis] = np.abs(vel[below, axis]) * bounce[below]
+            pos[above, axis] = max_c[above]; vel[above, axis] = -np.abs(vel[above, axis]) * bounce[above]
+
+        # --- Write back for drawing / player collision ---
+        for e, (x, y), (vx, vy) in zip(sprites, pos.tolist(), vel.tolist()):
+            e.pos_x = x; e.pos_y = y; e.vel_x = vx; e.vel_y = vy
+            e.rect.center = (int(x), int(y))
+
+    # --- CHANGE: Cell-sorted broad-phase instead of dense n x n distance matrices ---
+    NEIGHBOUR_CELLS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1)) # Half of the 3x3 block: each cell pair is visited once
+    ALL_PAIRS_MAX = 64 # Up to this many enemies, testing every pair is cheaper than building the grid
+
+    def _candidate_pairs(self):
+        """
+        (i, j) index arrays, i < j, of every pair sharing or touching a grid cell of side 2 * max radius
+        (so every overlapping pair is included). Enemies are sorted by cell key and each enemy looks up
+        its forward neighbour cells with searchsorted: O(n log n) memory and work instead of O(n^2).
+        """
+        n = self.count; pos = self.pos
+        if n <= self.ALL_PAIRS_MAX: return np.triu_indices(n, 1)
+        cell = max(2.0 * float(self.radius.max()), 1.0)
+        cx = np.floor(pos[:, 0] / cell).astype(np.int64); cy = np.floor(pos[:, 1] / cell).astype(np.int64)
+        cx -= cx.min() - 1; cy -= cy.min() - 1 # Keeps cx - 1 >= 0, so neighbour keys never alias across rows
+        width = int(cx.max()) + 2
+        keys = cy * width + cx
+        order = np.argsort(keys, kind="stable"); sorted_keys = keys[order]
+        owners_all = np.arange(n)
+        first = []; second = []
+        for ox, oy in self.NEIGHBOUR_CELLS:
+            target = keys + (oy * width + ox)
+            start = np.searchsorted(sorted_keys, target, "left"); counts = np.searchsorted(sorted_keys, target, "right") - start
+            total = int(counts.sum())
+            if not total: continue
+            owners = np.repeat(owners_all, counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            others = order[np.repeat(start, counts) + offsets]
+            if ox == 0 and oy == 0:
+                later = others > owners; owners = owners[later]; others = others[later]
+            first.append(np.minimum(owners, others)); second.append(np.maximum(owners, others))
+        if not first: return None, None
+        return np.concatenate(first), np.concatenate(second)
+
+    def _resolve_collisions(self, active):
+        """
+        Finds overlapping pairs among the grid candidates with one vectorized distance test, then applies
+        Enemy.update's separation + impulse to them in (i, j) index order, re-checking each pair against the
+        positions already moved by earlier pairs. Only the lower-index enemy needs to be active.
+        """
+        n = self.count
+        if n < 2: return
+        pos = self.pos; radius = self.radius
+        cand_i, cand_j = self._candidate_pairs()
+        if cand_i is None: return
+        dx = pos[cand_i, 0] - pos[cand_j, 0]; dy = pos[cand_i, 1] - pos[cand_j, 1]
+        dist_sq = dx*dx + dy*dy
+        min_dist = radius[cand_i] + radius[cand_j]
+        overlapping = (dist_sq < min_dist*min_dist) & (dist_sq > 0.01) & active[cand_i]
+        if not overlapping.any(): return
+        pair_i = cand_i[overlapping]; pair_j = cand_j[overlapping]
+        pair_order = np.argsort(pair_i * n + pair_j) # Same row-major order as the old dense upper-triangle scan
+        pairs = np.stack((pair_i[pair_order], pair_j[pair_order]), axis=1)
+
+        positions = pos.tolist(); velocities = self.vel.tolist(); radii = radius.tolist()
+        e = self.ENEMY_RESTITUTION
+        for i, j in pairs.tolist():
+            p_i = positions[i]; p_j = positions[j]
+            pdx = p_i[0] - p_j[0]; pdy = p_i[1] - p_j[1]
+            pair_dist_sq = pdx*pdx + pdy*pdy; pair_min = radii[i] + radii[j]
+            if not (pair_dist_sq < pair_min*pair_min and pair_dist_sq > 0.01): continue
+            dist = math.sqrt(pair_dist_sq); overlap = pair_min - dist
+            nx = pdx / dist; ny = pdy / dist
+            p_i[0] += nx * overlap * 0.5; p_i[1] += ny * overlap * 0.5
+            p_j[0] -= nx * overlap * 0.5; p_j[1] -= ny * overlap * 0.5
+            v_i = velocities[i]; v_j = velocities[j]
+            vel_along_normal = (v_i[0] - v_j[0]) * nx + (v_i[1] - v_j[1]) * ny
+            if vel_along_normal > 0: continue
+            impulse = -(1 + e) * vel_along_normal / 2.0
+            v_i[0] += impulse * nx; v_i[1] += impulse * ny
+            v_j[0] -= impulse * nx; v_j[1] -= impulse * ny
+        pos[:] = positions; self.vel[:] = velocities
+# --- END OF FILE enemy_physics.py ---
@@ -0,0 +1,149 @@
+# --- START OF FILE frame_profiler.py ---
+# Per-phase frame profiler for run_level and the minigames. Loops call begin_frame(), then mark(phase) at the end of
+# each phase (lap timing, so every busy millisecond lands in exactly one phase), then end_frame(counts). PROFILER_HOTKEY
+# toggles an overlay with rolling p50/p95/p99 per phase; PROFILER_EXPORT_HOTKEY (or PROFILER_AUTO_EXPORT) writes the
+# level's frames to CSV.
+
+import os, csv, time
+import pygame
+from collections import deque
+from settings import *
+
+PROFILER_PHASES = ("events", "player", "enemies", "shooters", "collisions", "sim_other", "world_draw", "hud_draw", "flip")
+PROFILER_PHASE_LABELS = {"events": "Events", "player": "Player.update", "enemies": "Enemy loop", "shooters": "Shooters/proj.",
+                         "collisions": "Collisions", "sim_other": "Other sim", "world_draw": "World draw", "hud_draw": "HUD draw",
+                         "flip": "Flip/update"}
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * (len(sorted_values) - 1) + 0.5))]
+
+
+class FrameProfiler:
+    """Rolling per-phase frame timings plus a full per-frame log (for CSV) of one level or minigame."""
+    overlay_visible = PROFILER_OVERLAY_DEFAULT # Shared by every loop, so the toggle survives level changes
+
+    def __init__(self, name, history=PROFILER_HISTORY):
+        self.name = name
+        self.samples = {phase: deque(maxlen=history) for phase in PROFILER_PHASES}
+        self.totals = deque(maxlen=history)
+        self.rows = [] # (frame, total_ms, *phase_ms, *counts) for export
+        self.count_names = ()
+        self.counts = {}
+        self.frame = None; self.last_mark = None
+        self.label = name
+        self.panel = None; self.panel_age = PROFILER_REFRESH_FRAMES
+
+    def reset(self, label=None):
+        """Starts a new level/minigame: clears the rolling windows and the CSV log."""
+        for samples in self.samples.values(): samples.clear()
+        self.totals.clear(); self.rows = []; self.count_names = (); self.counts = {}
+        self.frame = None; self.panel = None; self.panel_age = PROFILER_REFRESH_FRAMES
+        self.label = label or self.name
+
+    def begin_frame(self):
+        """Call after the frame wait (clock.tick), so idle time is not charged to any phase."""
+        self.frame = dict.fromkeys(PROFILER_PHASES, 0.0)
+        self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """Charges the time since the previous mark to `phase` (accumulates over several ticks per frame)."""
+        if self.frame is None: return
+        now = time.perf_counter()
+        self.frame[phase] += (now - self.last_mark) * 1000.0
+        self.last_mark = now
+
+    def end_frame(self, counts=None):
+        frame = self.frame
+        if frame is None: return
+        self.frame = None
+        total = 0.0
+        for phase in PROFILER_PHASES:
+            self.samples[phase].append(frame[phase]); total += frame[phase]
+        self.totals.append(total)
+        if counts is not None:
+            self.counts = counts
+            if not self.count_names: self.count_names = tuple(counts)
+        if len(self.rows) < PROFILER_CSV_MAX_ROWS:
+            self.rows.append((len(self.rows), total) + tuple(frame[phase] for phase in PROFILER_PHASES) + tuple(self.counts.get(n, 0) for n in self.count_names))
+
+    def handle_event(self, event):
+        """Hotkeys: toggle the overlay / export the current log. Returns True if the event was used."""
+        if event.type != pygame.KEYDOWN: return False
+        if event.key == PROFILER_HOTKEY:
+            FrameProfiler.overlay_visible = not FrameProfiler.overlay_visible; self.panel_age = PROFILER_REFRESH_FRAMES; return True
+        if event.key == PROFILER_EXPORT_HOTKEY: self.export_csv(); return True
+        return False
+
+    def phase_stats(self, phase):
+        values = sorted(self.samples[phase]) if phase != "total" else sorted(self.totals)
+        return _percentile(values, 0.50), _percentile(values, 0.95), _percentile(values, 0.99)
+
+    def _build_panel(self):
+        font = FONT_IMPACT_XXSM
+        line_h = font.get_linesize()
+        columns = (0, 150, 215, 280) # Label, p50, p95, p99
+        lines = [(f"{self.label} ({len(self.totals)} frames)", None, None, None), ("Phase (ms)", "p50", "p95", "p99")]
+        for phase in PROFILER_PHASES:
+            lines.append((PROFILER_PHASE_LABELS[phase],) + tuple(f"{v:.2f}" for v in self.phase_stats(phase)))
+        total_stats = self.phase_stats("total")
+        lines.append(("Frame total",) + tuple(f"{v:.2f}" for v in total_stats))
+        budget_ms = 1000.0 / DISPLAY_FPS if DISPLAY_FPS > 0 else 1000.0 / FPS
+        count_items = [f"{name} {value}" for name, value in self.counts.items()]
+        extra = [", ".join(count_items[i:i + 4]) for i in range(0, len(count_items), 4)] # Entity counts, four per line
+        extra.append(f"Budget {budget_ms:.1f}ms | F3 overlay | F4 CSV")
+        width = 350; height = (len(lines) + len(extra)) * line_h + 12
+        panel = pygame.Surface((width, height), pygame.SRCALPHA); panel.fill((0, 0, 0, 170))
+        y = 6
+        for i, line in enumerate(lines):
+            over_budget = i == len(lines) - 1 and total_stats[1] > budget_ms
+            color = RED if over_budget else (GOLD if i < 2 else WHITE)
+            for x, text in zip(columns, line):
+                if text is not None: panel.blit(font.render(text, True, color), (6 + x, y))
+            y += line_h
+        for text in extra:
+            panel.blit(font.render(text, True, CYAN), (6, y)); y += line_h
+        return panel
+
+    def draw(self, screen, topleft=PROFILER_OVERLAY_POS):
+        """Blits the overlay (rebuilt every PROFILER_REFRESH_FRAMES frames) and returns its rect, or None if hidden."""
+        if not FrameProfiler.overlay_visible: return None
+        self.panel_age += 1
+        if self.panel is None or self.panel_age >= PROFILER_REFRESH_FRAMES: self.panel = self._build_panel(); self.panel_age = 0
+        return screen.blit(self.panel, topleft)
+
+    def export_csv(self, path=None):
+        """Writes every logged frame of this level to CSV. Returns the path, or None on error."""
+        if not self.rows: return None
+        if path is None:
+            os.makedirs(PROFILER_EXPORT_DIR, exist_ok=True)
+            safe_label = "".join(c if c.isalnum() else "_" for c in self.label).strip("_").lower()
+            path = os.path.join(PROFILER_EXPORT_DIR, f"{safe_label}_{time.strftime('%Y%m%d_%H%M%S')}.csv")
+        try:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(("frame", "total_ms") + tuple(f"{phase}_ms" for phase in PROFILER_PHASES) + self.count_names)
+                for row in self.rows: writer.writerow(tuple(f"{v:.4f}" if isinstance(v, float) else v for v in row))
+        except OSError as e:
+            print(f"Error exporting frame profile: {e}"); return None
+        print(f"Frame profile exported: {path} ({len(self.rows)} frames)")
+        return path
+
+    def describe(self):
+        if not self.totals: return f"Frame profile [{self.label}]: no frames"
+        worst = max(PROFILER_PHASES, key=lambda phase: self.phase_stats(phase)[1])
+        p50, p95, p99 = self.phase_stats("total")
+        return (f"Frame profile [{self.label}]: {len(self.totals)} frames, busy p50 {p50:.2f}ms p95 {p95:.2f}ms p99 {p99:.2f}ms, "
+                f"heaviest phase at p95: {PROFILER_PHASE_LABELS[worst]} ({self.phase_stats(worst)[1]:.2f}ms)")
+
+
+FRAME_PROFILERS = {} # One profiler per loop name, like frame_timing.FRAME_PACERS
+
+def get_frame_profiler(loop_name):
+    profiler = FRAME_PROFILERS.get(loop_name)
+    if profiler is None:
+        profiler = FrameProfiler(loop_name)
+        FRAME_PROFILERS[loop_name] = profiler
+    return profiler
+# --- END OF FILE frame_profiler.py ---
@@ -0,0 +1,148 @@
+# --- START OF FILE frame_timing.py ---
+# Fixed-timestep helpers: the simulation always advances in SIM_TICK_RATE steps, whatever the display rate,
+# and drawing blends sprite positions between the last two ticks so 120/144 Hz output stays smooth.
+
+import time
+import pygame
+from collections import deque
+from settings import *
+
+
+class FixedTimestep:
+    """Accumulates real frame time and hands it out as a whole number of fixed simulation ticks."""
+    def __init__(self, tick_rate=SIM_TICK_RATE, max_frame_time=MAX_FRAME_TIME):
+        self.step_dt = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.accumulator = 0.0
+
+    def advance(self, frame_dt):
+        """Adds one display frame's duration and returns how many ticks to simulate now."""
+        # Clamp long frames (window drag, loading hitches) so the game slows down instead of lurching
+        self.accumulator += min(max(frame_dt, 0.0), self.max_frame_time)
+        ticks = int((self.accumulator + 1e-9) / self.step_dt)
+        self.accumulator = max(0.0, self.accumulator - ticks * self.step_dt)
+        return ticks
+
+    @property
+    def alpha(self):
+        """How far the display is between the previous and the current tick (0..1)."""
+        return min(1.0, self.accumulator / self.step_dt)
+
+    def reset(self):
+        """Drops leftover time, e.g. after a pause menu or shop overlay blocked the loop."""
+        self.accumulator = 0.0
+
+
+class RenderInterpolator:
+    """Remembers sprite rect centers from before the latest tick and offsets draw rects towards them."""
+    MAX_INTERP_DISTANCE = 200 # Larger jumps are teleports/respawns: draw those at the new spot
+
+    def __init__(self):
+        self.previous = {}
+
+    def capture(self, *groups):
+        """Call right before the last simulation tick of a frame."""
+        previous = {}
+        for group in groups:
+            for sprite in group: previous[sprite] = sprite.rect.center
+        self.previous = previous
+
+    def rect(self, sprite, alpha, rect=None):
+        """sprite.rect (or the given draw rect of that sprite) shifted back by (1 - alpha) of the last tick's motion."""
+        if rect is None: rect = sprite.rect
+        prev = self.previous.get(sprite)
+        if prev is None or alpha >= 1.0: return rect
+        cx, cy = sprite.rect.center
+        dx = prev[0] - cx; dy = prev[1] - cy
+        if abs(dx) > self.MAX_INTERP_DISTANCE or abs(dy) > self.MAX_INTERP_DISTANCE: return rect
+        back = 1.0 - alpha
+        return rect.move(round(dx * back), round(dy * back))
+
+
+class FramePacer:
+    """
+    Drop-in for pygame.time.Clock in a loop: tick(fps) waits for the next frame and returns the
+    elapsed milliseconds. Modes: "sleep" sleeps for most of the frame and spins only the last
+    FRAME_PACER_SPIN_MS; "busy" is Clock.tick_busy_loop (spins the whole wait); "clock" is Clock.tick.
+    Frame times are kept so the achieved pacing/jitter can be compared between modes.
+    """
+    MODES = ("sleep", "busy", "clock")
+
+    def __init__(self, name, mode="sleep", spin_ms=FRAME_PACER_SPIN_MS, history=FRAME_PACER_HISTORY):
+        if mode not in self.MODES:
+            print(f"Warning: Unknown frame pacing mode '{mode}' for {name}, using 'sleep'.")
+            mode = "sleep"
+        self.name = name
+        self.mode = mode
+        self.spin_sec = spin_ms / 1000.0
+        self.clock = pygame.time.Clock()
+        self.frame_times_ms = deque(maxlen=history)
+        self.target_fps = 0
+        self.prev_end = None # perf_counter of the previous tick's return
+        self.next_deadline = None
+
+    def tick(self, fps=0):
+        self.target_fps = fps
+        if self.mode == "busy": frame_ms = self.clock.tick_busy_loop(fps)
+        elif self.mode == "clock": frame_ms = self.clock.tick(fps)
+        else: frame_ms = self._sleep_tick(fps)
+        if frame_ms > 0: self.frame_times_ms.append(frame_ms)
+        return frame_ms
+
+    def _sleep_tick(self, fps):
+        now = time.perf_counter()
+        if fps > 0:
+            period = 1.0 / fps
+            deadline = self.next_deadline if self.next_deadline is not None else now
+            remaining = deadline - now
+            if remaining > self.spin_sec: time.sleep(remaining - self.spin_sec)
+            while time.perf_counter() < deadline: pass # Spin the last bit for accuracy
+            end = time.perf_counter()
+            # Schedule from the deadline to keep the average rate exact; re-anchor if we fell a frame behind
+            self.next_deadline = deadline + period if end - deadline < period else end + period
+        else:
+            end = now; self.next_deadline = None
+        frame_ms = (end - self.prev_end) * 1000.0 if self.prev_end is not None else 0.0
+        self.prev_end = end
+        return frame_ms
+
+    def restart(self):
+        """Call when a loop (re)starts so the time spent elsewhere is not reported as one long frame."""
+        self.clock = pygame.time.Clock()
+        self.prev_end = None; self.next_deadline = None
+
+    def reset_stats(self):
+        self.frame_times_ms.clear()
+
+    def stats(self):
+        """Mean frame time, jitter (std dev) and worst deviation from the target frame time, in ms."""
+        times = list(self.frame_times_ms)
+        if not times: return {"loop": self.name, "mode": self.mode, "frames": 0}
+        mean = sum(times) / len(times)
+        jitter = (sum((t - mean) ** 2 for t in times) / len(times)) ** 0.5
+        target_ms = 1000.0 / self.target_fps if self.target_fps > 0 else mean
+        deviations = sorted(abs(t - target_ms) for t in times)
+        return {"loop": self.name, "mode": self.mode, "frames": len(times), "target_ms": target_ms,
+                "mean_ms": mean, "jitter_ms": jitter, "p99_dev_ms": deviations[int(0.99 * (len(deviations) - 1))],
+                "max_ms": max(times)}
+
+    def describe(self):
+        st = self.stats()
+        if not st["frames"]: return f"Frame pacing [{self.name}/{self.mode}]: no frames"
+        return (f"Frame pacing [{self.name}/{self.mode}]: {st['frames']} frames, mean {st['mean_ms']:.2f}ms "
+                f"(target {st['target_ms']:.2f}ms), jitter {st['jitter_ms']:.2f}ms, p99 dev {st['p99_dev_ms']:.2f}ms, max {st['max_ms']:.2f}ms")
+
+
+FRAME_PACERS = {} # One pacer per loop name, so menus that re-enter every frame keep their timing
+
+def get_frame_pacer(loop_name):
+    """Shared FramePacer for a loop ("level", "minigame", "menu"); mode comes from FRAME_PACING."""
+    pacer = FRAME_PACERS.get(loop_name)
+    if pacer is None:
+        pacer = FramePacer(loop_name, FRAME_PACING.get(loop_name, "sleep"))
+        FRAME_PACERS[loop_name] = pacer
+    return pacer
+
+def print_frame_pacing_report():
+    for pacer in FRAME_PACERS.values(): print(pacer.describe())
+# --- END OF FILE frame_timing.py ---
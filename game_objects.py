@@ -1,11 +1,18 @@
 # --- START OF FILE game_objects.py ---
 
 import pygame, os, math, random, time # Import time module
+from collections import deque
 from settings import *
+from audio import play_sound
+from assets import get_image, get_scaled_image, read_disk_cache, write_disk_cache # Decoded-once images (memory + disk cache)
 
 SPRITE_SHEET_CACHE = {}
 ABILITY_ICON_CACHE = {}
 ABILITY_ANIMATION_CACHE = {} # --- NEW: Cache for ability animations ---
+POWERUP_PULSE_CACHE = {} # --- NEW: (image path, base size, pulse range) -> one baked pulse cycle of powerup frames ---
+SPARKLE_CACHE = {} # --- NEW: (size, colour, alpha step) -> pre-tinted sparkle surface shared by pooled particles ---
+PLAYER_ROTATION_CACHE = {} # --- NEW: (image path, size, step) -> pre-rotated player frames, shared by all Player instances ---
+SUPERSEED_FLASH_CACHE = {} # --- NEW: (image path, frame size, frame count) -> per-frame lists of pre-tinted flash frames, shared by all SuperseedEnemy instances ---
 
 
 def load_image(path, size):
@@ -20,8 +27,7 @@ def load_image(path, size):
 
     if os.path.exists(path):
         try:
-            img = pygame.image.load(path).convert_alpha()
-            return pygame.transform.scale(img, size)
+            return get_scaled_image(path, size)
         except pygame.error as e:
             print(f"Error loading image {path}: {e}")
         except ValueError as e:
@@ -39,6 +45,39 @@ def load_image(path, size):
             pass
     return surface
 
+# --- NEW: Pre-rotated player sprite atlas ---
+def get_player_rotation_frames(path, size, base_image, brightened=False, step=PLAYER_ROTATION_STEP):
+    """
+    Returns (frames, bright_frames): base_image rotated in `step` degree increments (index = rotation // step),
+    plus the same frames with PLAYER_BRIGHTEN_AMOUNT added when brightened is True (else None).
+    Built once per pod image and size, so rotation costs nothing per frame.
+    """
+    key = (path, tuple(size), step)
+    entry = PLAYER_ROTATION_CACHE.get(key)
+    if entry is not None and (entry[1] is not None or not brightened): return entry
+    build_start = time.perf_counter()
+    num_frames = max(1, int(round(360 / step)))
+    frames = entry[0] if entry is not None else []
+    if not frames:
+        for i in range(num_frames):
+            try: frames.append(pygame.transform.rotate(base_image, i * step))
+            except pygame.error as e: print(f"Error rotating player image: {e}"); frames.append(base_image)
+    bright_frames = None
+    if brightened:
+        bright_frames = []
+        for frame in frames:
+            bright_image = frame.copy()
+            bright_image.fill(PLAYER_BRIGHTEN_AMOUNT, special_flags=pygame.BLEND_RGB_ADD)
+            bright_frames.append(bright_image)
+    entry = (frames, bright_frames)
+    PLAYER_ROTATION_CACHE[key] = entry
+    if DIAGNOSTIC_REPORTS:
+        atlas_bytes = sum(f.get_width() * f.get_height() * f.get_bytesize() for f in frames + (bright_frames or []))
+        print(f"Player rotation atlas {os.path.basename(path)}: {num_frames} angles{' (+brightened)' if brightened else ''}, "
+              f"{atlas_bytes / (1024 * 1024):.1f} MB, built in {(time.perf_counter() - build_start) * 1000:.0f} ms")
+    return entry
+# --- END NEW ---
+
 # --- UPDATED: load_sprite_frames with enhanced auto-detection and logging ---
 def load_sprite_frames(path, frame_width, frame_height, scale=1.0, is_enemy=False):
     """
@@ -64,8 +103,19 @@ def load_sprite_frames(path, frame_width, frame_height, scale=1.0, is_enemy=Fals
         # print(f"Using cached frames for {os.path.basename(path)}") # Debug cache hit
         return SPRITE_SHEET_CACHE[cache_key]
 
+    # --- NEW: Frames cut and scaled on an earlier run are stored in the surface disk cache, stacked top to bottom ---
+    disk_key = (frame_width, frame_height, scale, is_enemy)
+    stacked, frame_count = read_disk_cache("frames", path, disk_key, True)
+    if stacked is not None and frame_count > 0:
+        stacked = stacked.convert_alpha()
+        frame_w = stacked.get_width(); frame_h = stacked.get_height() // frame_count
+        frames = [stacked.subsurface((0, i * frame_h, frame_w, frame_h)).copy() for i in range(frame_count)]
+        SPRITE_SHEET_CACHE[cache_key] = frames
+        return frames
+    # --- END NEW ---
+
     try:
-        sheet = pygame.image.load(path).convert_alpha()
+        sheet = get_image(path)
     except pygame.error as e:
         print(f"Error loading sprite sheet {path}: {e}")
         fallback_size = (max(1, target_w) if target_w > 0 else 32, max(1, target_h) if target_h > 0 else 32)
@@ -162,6 +212,10 @@ def load_sprite_frames(path, frame_width, frame_height, scale=1.0, is_enemy=Fals
         frames.append(pygame.transform.scale(sheet, (target_w, target_h)))
 
     SPRITE_SHEET_CACHE[cache_key] = frames # Cache the result
+    if all(frame.get_size() == frames[0].get_size() for frame in frames): # Same-size frames stack into one cache entry
+        stacked_pixels = b"".join(pygame.image.tobytes(frame, "RGBA") for frame in frames)
+        stacked = pygame.image.frombuffer(stacked_pixels, (frames[0].get_width(), frames[0].get_height() * len(frames)), "RGBA")
+        write_disk_cache("frames", path, disk_key, True, stacked, count=len(frames))
     return frames
 # --- END UPDATE ---
 
@@ -174,7 +228,7 @@ def load_ability_animation(path):
         print(f"Ability animation image not found: {path}")
         return None
     try:
-        img = pygame.image.load(path).convert_alpha()
+        img = get_image(path)
         ABILITY_ANIMATION_CACHE[path] = img
         return img
     except pygame.error as e:
@@ -202,7 +256,7 @@ class AbilityEffect(pygame.sprite.Sprite):
         self.end_scale = end_scale
         self.lifetime = lifetime
         self.fade_start_time = max(0, min(fade_start_time, lifetime)) # Clamp fade start time
-        self.spawn_time = time.time()
+        self.age = 0.0 # --- CHANGE: Advanced by dt (not time.time()), so the effect follows the simulation clock ---
         self.pos_x = float(center_pos[0]) # Store position
         self.pos_y = float(center_pos[1])
         self.base_size_factor = base_size_factor # Store the base size factor
@@ -226,7 +280,7 @@ class AbilityEffect(pygame.sprite.Sprite):
     # --- END FIX ---
 
     def update(self, dt, player): # << Added player argument
-        elapsed_time = time.time() - self.spawn_time
+        self.age += dt; elapsed_time = self.age
         if elapsed_time >= self.lifetime:
             self.kill()
             return
@@ -285,6 +339,9 @@ class Player(pygame.sprite.Sprite):
 
         self.original_image = load_image(player_image_path, self.size)
         initial_rect = self.original_image.get_rect(center=(x, y))
+        self.rotation_frames, self.bright_rotation_frames = get_player_rotation_frames(
+            player_image_path, self.size, self.original_image, brightened=character in PLAYER_BRIGHTENED_CHARACTERS)
+        self.rotation_step = 360 / len(self.rotation_frames)
 
         self.pos_x = float(x)
         self.pos_y = float(y)
@@ -307,7 +364,7 @@ class Player(pygame.sprite.Sprite):
         self.invincible_until = 0.0
         self.temp_shield_end_time = 0.0 # Added to track shield powerup duration
 
-        self.trail = []
+        self.trail = deque(maxlen=int(TRAIL_LENGTH * 1.5)) # Ring buffer sized for Joao's boosted trail
         self.base_trail_length = TRAIL_LENGTH
         self.trail_length = self.base_trail_length
         self.trail_intensity_multiplier = 1.0 # For Joao's speed boost
@@ -334,13 +391,8 @@ class Player(pygame.sprite.Sprite):
 
         # --- FIX: Set correct initial rotation (assuming base sprite faces DOWN) ---
         initial_rotation_value = 0 # No initial rotation needed if base image faces down
-        try:
-            self.image = pygame.transform.rotate(self.original_image, initial_rotation_value)
-            self.rect = self.image.get_rect(center=initial_rect.center)
-        except pygame.error as e:
-            print(f"Error rotating initial player image: {e}")
-            self.image = self.original_image.copy() # Use unrotated original
-            self.rect = self.original_image.get_rect(center=initial_rect.center)
+        self.image = self.rotation_frames[int(initial_rotation_value // self.rotation_step) % len(self.rotation_frames)]
+        self.rect = self.image.get_rect(center=initial_rect.center)
         # --- END FIX ---
 
         self.radius = ((self.rect.width + self.rect.height) / 2) * 0.4
@@ -355,7 +407,7 @@ class Player(pygame.sprite.Sprite):
              cached_icon = ABILITY_ICON_CACHE[icon_path]
              if cached_icon and cached_icon.get_width() > 1 and cached_icon.get_height() > 1: return cached_icon
         try:
-            temp_icon = pygame.image.load(icon_path).convert_alpha()
+            temp_icon = get_image(icon_path)
             if temp_icon.get_width() <= 1 or temp_icon.get_height() <= 1: raise ValueError("Loaded icon image is invalid (<= 1 pixel)")
             icon_size = (30, 30)
             icon_image = pygame.transform.smoothscale(temp_icon, icon_size)
@@ -537,27 +589,20 @@ class Player(pygame.sprite.Sprite):
         # Trail update
         self.trail.append((self.pos_x, self.pos_y))
         if len(self.trail) > self.trail_length: # Use dynamic trail length
-            self.trail.pop(0)
+            self.trail.popleft()
 
         # --- Visual Rotation ---
         self.visual_angle = self.angle # Visual angle matches movement angle
         # --- FIX: Correct rotation value (assuming DOWN is 270 deg base, negate for CCW rotation) ---
         rotation_value = self.visual_angle - 270.0  # Negated (270.0 - self.visual_angle)
         # --- END FIX ---
-        try:
-             rotated_image_base = pygame.transform.rotate(self.original_image, rotation_value)
-        except pygame.error as e:
-             print(f"Error rotating player image: {e}")
-             rotated_image_base = self.image # Use last valid image as fallback
-
-        # --- Apply Joao Brightness ---
-        if self.is_brightened:
-             brighten_amount = (50, 50, 50)
-             bright_image = rotated_image_base.copy()
-             bright_image.fill(brighten_amount, special_flags=pygame.BLEND_RGB_ADD)
-             self.image = bright_image
+        # --- CHANGE: Look up the pre-rotated frame (and Joao's brightened variant) instead of rotating every frame ---
+        frame_index = int(round((rotation_value % 360.0) / self.rotation_step)) % len(self.rotation_frames)
+        if self.is_brightened and self.bright_rotation_frames is not None:
+             self.image = self.bright_rotation_frames[frame_index]
         else:
-             self.image = rotated_image_base
+             self.image = self.rotation_frames[frame_index]
+        # --- END CHANGE ---
 
         # --- Update Rect ---
         self.rect = self.image.get_rect(center=(int(self.pos_x), int(self.pos_y)))
@@ -623,14 +668,10 @@ class Player(pygame.sprite.Sprite):
             particle_spawn_x = self.pos_x # Spawn at new position
             particle_spawn_y = self.pos_y
             if hasattr(player_ref, 'particle_group_ref') and player_ref.particle_group_ref is not None:
-                for _ in range(num_particles):
-                     angle_offset = random.uniform(-math.pi / 4, math.pi / 4)
-                     p_angle = rad + math.pi + angle_offset # Opposite direction + spread
-                     p_speed = random.uniform(particle_speed_range[0], particle_speed_range[1])
-                     new_particle = Particle((particle_spawn_x, particle_spawn_y), color=TRAIL_COLOR_SEEDGUY, lifetime_ms=particle_lifetime, speed_range=(p_speed, p_speed))
-                     new_particle.vel_x = p_speed * math.cos(p_angle) # Set initial velocity
-                     new_particle.vel_y = p_speed * math.sin(p_angle)
-                     player_ref.particle_group_ref.add(new_particle)
+                # Opposite to the dash direction, +-45 degrees spread
+                emit_particle_burst(player_ref.particle_group_ref, (particle_spawn_x, particle_spawn_y), num_particles,
+                                    color=TRAIL_COLOR_SEEDGUY, speed_range=particle_speed_range, lifetime_ms=particle_lifetime,
+                                    angle=rad + math.pi, spread=math.pi / 4)
             else:
                  print("Warning: Player missing particle_group_ref in activate_ability for dash.")
             # --- End VFX ---
@@ -669,24 +710,70 @@ class Player(pygame.sprite.Sprite):
         # --- END ---
 
         # Play sound
-        if ability_sound_path and os.path.exists(ability_sound_path):
-            try:
-                if pygame.mixer.get_init():
-                    sound = pygame.mixer.Sound(ability_sound_path); sound.set_volume(0.7); sound.play()
-            except pygame.error as e: print(f"Error playing ability sound {ability_sound_path}: {e}")
+        if ability_sound_path: play_sound(ability_sound_path, volume=0.7)
+
+
+# --- MOVED: Collision helpers (previously in main.py) so level_sim.py can share them ---
+def circle_collision(sprite1, sprite2):
+    # Prioritize using pos_x/pos_y and radius if available
+    px = getattr(sprite1, 'pos_x', None)
+    py = getattr(sprite1, 'pos_y', None)
+    ox = getattr(sprite2, 'pos_x', None)
+    oy = getattr(sprite2, 'pos_y', None)
+    pr = getattr(sprite1, 'radius', None)
+    orad = getattr(sprite2, 'radius', None)
+
+    # If circle properties are available for both, use circle collision
+    if px is not None and py is not None and ox is not None and oy is not None and pr is not None and orad is not None:
+        dx = px - ox
+        dy = py - oy
+        distance_sq = dx*dx + dy*dy
+        radius_sum = pr + orad
+        # Add a small tolerance to prevent collision when exactly touching
+        return distance_sq < (radius_sum * radius_sum) * 0.98 # Check if distance is slightly less than sum of radii
+
+    # --- Fallback to Rect Collision if circle properties are missing ---
+    rect1 = getattr(sprite1, 'rect', None)
+    rect2 = getattr(sprite2, 'rect', None)
+    if rect1 is None or rect2 is None:
+        return False # Cannot collide if essential properties are missing
+    return pygame.sprite.collide_rect(sprite1, sprite2)
+
+
+def collide_circle_precise_seed(player_sprite, seed_sprite):
+    """
+    Custom collision function for player-seed interaction.
+    Uses player's potentially augmented pickup radius.
+    """
+    # Player properties
+    px = getattr(player_sprite, 'pos_x', player_sprite.rect.centerx)
+    py = getattr(player_sprite, 'pos_y', player_sprite.rect.centery)
+    # Calculate player's effective radius including vault bonus
+    player_base_radius = getattr(player_sprite, 'radius', player_sprite.rect.width / 2 * 0.8) # Default scaling like Enemy
+    player_vault_bonus = getattr(player_sprite, 'vault_pickup_radius_bonus', 0)
+    player_effective_radius = player_base_radius + player_vault_bonus
+
+    # Seed properties
+    sx = getattr(seed_sprite, 'pos_x', seed_sprite.rect.centerx)
+    sy = getattr(seed_sprite, 'pos_y', seed_sprite.rect.centery)
+    seed_radius = getattr(seed_sprite, 'radius', seed_sprite.rect.width / 2 * 1.1)
+
+    if px is None or py is None or sx is None or sy is None:
+        return False # Cannot perform circle collision
+
+    dx = px - sx
+    dy = py - sy
+    distance_sq = dx*dx + dy*dy
+    radius_sum = player_effective_radius + seed_radius
+    return distance_sq < (radius_sum * radius_sum)
+# --- END MOVED ---
 
 
 # --- Function to create shield break particles (called from main.py) ---
 def create_shield_break_particles(center_pos, particle_group):
-    num_particles = 25
-    for _ in range(num_particles):
-        # Blueish-white particles
-        color = (random.randint(180, 255), random.randint(180, 255), 255)
-        size_range = (4, 10)
-        speed_range = (150, 300)
-        lifetime = random.randint(300, 600)
-        particle = Particle(center_pos, color=color, size_range=size_range, speed_range=speed_range, lifetime_ms=lifetime)
-        particle_group.add(particle)
+    # Blueish-white particles, colours picked from the pre-baked palette
+    emit_particle_burst(particle_group, center_pos, 25, colors=SHIELD_BREAK_PARTICLE_COLORS, size_range=(4, 10),
+                        speed_range=(150, 300), lifetime_ms=(300, 600))
 # --- END NEW ---
 
 
@@ -723,7 +810,9 @@ class Enemy(pygame.sprite.Sprite):
         enemy_speed_boost = 1.0 + (shop_speed_level * SHOP_SPEED_ENEMY_BOOST_FACTOR)
         self.speed_pps = self.base_speed_pps * ENEMY_SPEED_MULTIPLIER * enemy_speed_boost
 
-        angle = random.uniform(0, 2 * math.pi)
+        # --- NEW: Injectable RNG so seeded/headless runs are reproducible ---
+        self.rng = kwargs.get('rng') or random
+        angle = self.rng.uniform(0, 2 * math.pi)
         self.vel_x = self.speed_pps * math.cos(angle)
         self.vel_y = self.speed_pps * math.sin(angle)
 
@@ -731,11 +820,9 @@ class Enemy(pygame.sprite.Sprite):
         self.bounce_factor = ENEMY_BOUNCE_FACTOR
         self.mass = 1.0
 
-    def update(self, player=None, speed_modifier=1.0, dt=1/FPS, other_enemies=None):
-        if dt <= 0: return
+    # --- NEW: Animation split out of update() so the NumPy enemy engine can drive it separately ---
+    def update_animation(self, dt, speed_modifier=1.0):
         is_frozen = speed_modifier <= 0.01
-
-        # --- Animation Update (Before Movement) ---
         if self.frames and len(self.frames) > 1:
             current_anim_speed = self.animation_speed if not is_frozen else self.animation_speed * 0.1
             self.current_frame_index += current_anim_speed * dt
@@ -747,6 +834,12 @@ class Enemy(pygame.sprite.Sprite):
                 self.rect = self.image.get_rect(center=current_center) # Update rect with new image, keep center
                 self.radius = self.rect.width / 2 * 0.9 # Update radius if size changes
 
+    def update(self, player=None, speed_modifier=1.0, dt=1/FPS, other_enemies=None):
+        if dt <= 0: return
+        is_frozen = speed_modifier <= 0.01
+
+        # --- Animation Update (Before Movement) ---
+        self.update_animation(dt, speed_modifier)
 
         if is_frozen:
             # Update rect position even if frozen, but don't move
@@ -776,7 +869,7 @@ class Enemy(pygame.sprite.Sprite):
 
         # Adjust speed if significantly different or if stopped but should move
         if current_vel_magnitude_sq < 0.01 and target_speed_sq > 0.01:
-             angle = random.uniform(0, 2 * math.pi)
+             angle = self.rng.uniform(0, 2 * math.pi)
              self.vel_x = current_target_speed * math.cos(angle)
              self.vel_y = current_target_speed * math.sin(angle)
         elif current_vel_magnitude_sq > 0.01 and abs(current_vel_magnitude_sq - target_speed_sq) > 1.0:
@@ -788,7 +881,8 @@ class Enemy(pygame.sprite.Sprite):
         if other_enemies:
             for other in other_enemies:
                 if other is self: continue
-                if not all(hasattr(other, attr) for attr in ['pos_x', 'pos_y', 'vel_x', 'vel_y', 'radius', 'mass']): continue
+                # Enemy instances always carry the physics attributes; only foreign sprites need the check
+                if not isinstance(other, Enemy) and not all(hasattr(other, attr) for attr in ['pos_x', 'pos_y', 'vel_x', 'vel_y', 'radius', 'mass']): continue
                 dx = self.pos_x - other.pos_x; dy = self.pos_y - other.pos_y
                 dist_sq = dx*dx + dy*dy; min_dist = self.radius + other.radius
                 if dist_sq < min_dist*min_dist and dist_sq > 0.01:
@@ -846,6 +940,120 @@ class Enemy(pygame.sprite.Sprite):
         self.rect.center = (int(self.pos_x), int(self.pos_y))
 
 
+# --- NEW: Spatial hash broad-phase for enemy-enemy collisions ---
+class SpatialHash:
+    """Uniform grid of sprite indices keyed by cell, for cheap "who is near this point" queries."""
+    def __init__(self, cell_size):
+        self.cell_size = max(1.0, float(cell_size))
+        self.inv_cell = 1.0 / self.cell_size
+        self.cells = {}
+        self.keys = {} # index -> cell key it is stored under
+
+    def cell_of(self, x, y):
+        return (int((x * self.inv_cell) // 1), int((y * self.inv_cell) // 1))
+
+    def insert(self, index, x, y):
+        key = self.cell_of(x, y)
+        self.keys[index] = key
+        bucket = self.cells.get(key)
+        if bucket is None: self.cells[key] = {index}
+        else: bucket.add(index)
+
+    def remove(self, index):
+        key = self.keys.pop(index, None)
+        if key is not None:
+            bucket = self.cells[key]
+            bucket.discard(index)
+            if not bucket: del self.cells[key]
+
+    def move(self, index, x, y):
+        if self.keys.get(index) != self.cell_of(x, y):
+            self.remove(index); self.insert(index, x, y)
+
+    def query_after(self, x, y, min_index):
+        """Sorted indices greater than min_index stored in the 3x3 block of cells around (x, y)."""
+        cx = int((x * self.inv_cell) // 1); cy = int((y * self.inv_cell) // 1)
+        found = []
+        get = self.cells.get
+        for key in ((cx-1, cy-1), (cx-1, cy), (cx-1, cy+1), (cx, cy-1), (cx, cy), (cx, cy+1), (cx+1, cy-1), (cx+1, cy), (cx+1, cy+1)):
+            bucket = get(key)
+            if bucket:
+                for j in bucket:
+                    if j > min_index: found.append(j)
+        found.sort()
+        return found
+
+
+class _NearbyLaterEnemies:
+    """
+    Iterable handed to Enemy.update as other_enemies in grid mode. Yields later enemies near
+    the owner in ascending index order; if separation pushes carry the owner further than
+    the cell slack from where it last queried, the grid is queried again so no pair is missed.
+    """
+    def __init__(self, broadphase, index):
+        self.broadphase = broadphase
+        self.index = index
+        self.visited = []
+
+    def __iter__(self):
+        bp = self.broadphase
+        owner = bp.enemies[self.index]
+        enemies = bp.enemies; visited = self.visited; max_drift_sq = bp.max_drift_sq
+        query_x, query_y = owner.pos_x, owner.pos_y
+        pending = bp.spatial_hash.query_after(query_x, query_y, self.index)
+        last = self.index; k = 0
+        while k < len(pending):
+            dx = owner.pos_x - query_x; dy = owner.pos_y - query_y
+            if dx*dx + dy*dy > max_drift_sq:
+                query_x, query_y = owner.pos_x, owner.pos_y
+                pending = bp.spatial_hash.query_after(query_x, query_y, last)
+                k = 0
+                continue
+            last = pending[k]; k += 1
+            other = enemies[last]
+            visited.append(other)
+            yield other
+
+
+class EnemyCollisionBroadphase:
+    """
+    Supplies the other_enemies argument for each enemy of a frame's update loop.
+    "bruteforce" hands out every later enemy (the original all_enemies[i+1:] slice).
+    "grid" builds a SpatialHash once per frame and hands out only nearby later enemies,
+    in index order, so Enemy.update resolves the same pairs in the same order. Small groups
+    (under ENEMY_COLLISION_GRID_MIN_ENEMIES) keep the slices since the grid would cost more.
+    """
+    def __init__(self, all_enemies, mode=None):
+        self.enemies = all_enemies
+        self.mode = mode or ENEMY_COLLISION_BROADPHASE
+        self.spatial_hash = None
+        if self.mode == "grid" and len(all_enemies) >= ENEMY_COLLISION_GRID_MIN_ENEMIES:
+            if not all(isinstance(e, Enemy) for e in all_enemies):
+                self.mode = "bruteforce" # Foreign sprites in the group: keep the exhaustive check
+            else:
+                # Radius grows from 0.8 to 0.9 of the half-width on the first animation frame, so size cells from 0.9
+                max_radius = max(max(e.radius, e.rect.width * 0.45) for e in all_enemies)
+                self.max_drift_sq = (max_radius * ENEMY_COLLISION_GRID_SLACK) ** 2
+                self.spatial_hash = SpatialHash(max_radius * (2.0 + ENEMY_COLLISION_GRID_SLACK))
+                self.indices = {}
+                for index, enemy in enumerate(all_enemies):
+                    self.spatial_hash.insert(index, enemy.pos_x, enemy.pos_y)
+                    self.indices[id(enemy)] = index
+
+    def candidates(self, index):
+        """other_enemies for enemy[index]; call right before that enemy updates."""
+        if self.spatial_hash is None: return self.enemies[index+1:]
+        return _NearbyLaterEnemies(self, index)
+
+    def resolved(self, index, candidates):
+        """Call after enemy[index] updated: drops it from the grid and re-files neighbours it pushed."""
+        if self.spatial_hash is None: return
+        self.spatial_hash.remove(index)
+        for other in candidates.visited:
+            self.spatial_hash.move(self.indices[id(other)], other.pos_x, other.pos_y)
+# --- END NEW ---
+
+
 class EarthEnemy(Enemy):
     def __init__(self, x, y, base_speed_unit, **kwargs):
         kwargs['image_path'] = EARTH_ENEMY_IMAGE
@@ -900,44 +1108,50 @@ class MysticEnemy(Enemy):
         super().__init__(x, y, base_speed_unit, frame_width=0, frame_height=0, is_enemy=True, size_multiplier=ENEMY_CUMULATIVE_SIZE_INCREASE, **kwargs)
 
 
+# --- NEW: Shared flash palette for SuperseedEnemy ---
+def get_superseed_flash_palette(path, frames, frame_idx):
+    """frames[frame_idx] multiplied by every SUPERSEED_FLASH_COLORS tint. Baked on first use, shared by all SuperseedEnemy instances."""
+    key = (path, frames[0].get_size(), len(frames))
+    palettes = SUPERSEED_FLASH_CACHE.get(key)
+    if palettes is None: palettes = SUPERSEED_FLASH_CACHE[key] = [None] * len(frames)
+    palette = palettes[frame_idx]
+    if palette is None:
+        palette = []
+        for color in SUPERSEED_FLASH_COLORS:
+            flash_image = frames[frame_idx].copy()
+            flash_image.fill(color, special_flags=pygame.BLEND_RGB_MULT)
+            palette.append(flash_image)
+        palettes[frame_idx] = palette
+    return palette
+# --- END NEW ---
+
 class SuperseedEnemy(Enemy):
     def __init__(self, x, y, base_speed_unit, **kwargs):
         kwargs['image_path'] = SUPERSEED_ENEMY_IMAGE
         super().__init__(x, y, base_speed_unit, frame_width=0, frame_height=0, is_enemy=True, size_multiplier=ENEMY_CUMULATIVE_SIZE_INCREASE, **kwargs)
         self.flash_timer = 0.0; self.flash_interval = 0.05
-        self.original_frame_images = [frame.copy() for frame in self.frames] if self.frames else []
-        self.original_single_image = self.image.copy() if not self.frames and hasattr(self, 'image') else None
+        # --- CHANGE: Frames come from the shared sprite cache and are never drawn on, so no per-instance copies ---
+        self.base_frames = self.frames if self.frames else [self.image]
         self.is_flashed = False; self.animation_speed = 8.0
 
-    def update(self, player=None, speed_modifier=1.0, dt=1/FPS, other_enemies=None):
-        super().update(player, speed_modifier, dt, other_enemies)
+    def _base_frame_index(self):
+        return int(self.current_frame_index) % len(self.base_frames) if len(self.base_frames) > 1 else 0
+
+    # --- CHANGE: Flashing runs as part of the animation step (shared by the Python and NumPy enemy paths) ---
+    def update_animation(self, dt, speed_modifier=1.0):
+        super().update_animation(dt, speed_modifier)
         # Only flash if not frozen
         if speed_modifier > 0.01:
             self.flash_timer += dt
             if self.flash_timer >= self.flash_interval:
                 self.flash_timer -= self.flash_interval; self.is_flashed = not self.is_flashed
-                base_image_this_frame = None
-                if self.original_frame_images and len(self.original_frame_images) > 1:
-                    frame_idx = int(self.current_frame_index) % len(self.original_frame_images)
-                    base_image_this_frame = self.original_frame_images[frame_idx]
-                elif self.original_single_image: base_image_this_frame = self.original_single_image
-                elif self.original_frame_images: base_image_this_frame = self.original_frame_images[0]
-
-                if base_image_this_frame:
-                    if self.is_flashed:
-                        flash_image = base_image_this_frame.copy()
-                        random_color = (random.randint(50, 255), random.randint(50, 255), random.randint(50, 255))
-                        flash_image.fill(random_color, special_flags=pygame.BLEND_RGB_MULT)
-                        self.image = flash_image
-                    else: self.image = base_image_this_frame
+                frame_idx = self._base_frame_index()
+                if self.is_flashed: # --- CHANGE: Pick a pre-tinted frame from the shared palette instead of copy() + fill() ---
+                    palette = get_superseed_flash_palette(SUPERSEED_ENEMY_IMAGE, self.base_frames, frame_idx)
+                    self.image = palette[random.randrange(len(palette))]
+                else: self.image = self.base_frames[frame_idx]
         else: # If frozen, ensure we are showing the non-flashed image
-             base_image_this_frame = None
-             if self.original_frame_images and len(self.original_frame_images) > 1:
-                 frame_idx = int(self.current_frame_index) % len(self.original_frame_images)
-                 base_image_this_frame = self.original_frame_images[frame_idx]
-             elif self.original_single_image: base_image_this_frame = self.original_single_image
-             elif self.original_frame_images: base_image_this_frame = self.original_frame_images[0]
-             if base_image_this_frame: self.image = base_image_this_frame
+             self.image = self.base_frames[self._base_frame_index()]
 
 
 # --- UPDATED: David Class with Dash and Sprite Loading Fix ---
@@ -984,13 +1198,16 @@ class David(Enemy):
         # --- Dash State ---
         self.dash_state = "NORMAL" # NORMAL, PREP_DASH, DASHING
         self.dash_state_timer = 0.0
-        self.next_dash_check_time = time.time() + random.uniform(DAVID_DASH_INTERVAL_MIN, DAVID_DASH_INTERVAL_MAX)
+        # --- CHANGE: Dash timing runs on an internal clock advanced by dt (not time.time()) ---
+        self.dash_clock = 0.0
+        self.next_dash_check_time = self.dash_clock + self.rng.uniform(DAVID_DASH_INTERVAL_MIN, DAVID_DASH_INTERVAL_MAX)
         self.dash_target_x = 0
         self.dash_target_y = 0
         # --- End Dash State ---
 
     def update(self, player, speed_modifier=1.0, dt=1/FPS, other_enemies=None):
-        current_time = time.time()
+        self.dash_clock += max(0.0, dt)
+        current_time = self.dash_clock
         is_frozen = speed_modifier <= 0.01 # Check if externally frozen
 
         # --- State Machine Logic ---
@@ -1007,7 +1224,7 @@ class David(Enemy):
         if self.dash_state == "NORMAL":
             # Check if it's time to consider dashing
             if current_time >= self.next_dash_check_time:
-                self.next_dash_check_time = current_time + random.uniform(DAVID_DASH_INTERVAL_MIN, DAVID_DASH_INTERVAL_MAX)
+                self.next_dash_check_time = current_time + self.rng.uniform(DAVID_DASH_INTERVAL_MIN, DAVID_DASH_INTERVAL_MAX)
                 if player:
                     dx = player.pos_x - self.pos_x
                     dy = player.pos_y - self.pos_y
@@ -1020,9 +1237,7 @@ class David(Enemy):
                         self.dash_target_y = player.pos_y
                         self.vel_x, self.vel_y = 0, 0 # Stop moving during prep
                         print("David entering PREP_DASH")
-                        if os.path.exists(DAVID_DASH_SOUND) and pygame.mixer.get_init(): # Play prep sound? Use dash sound for now
-                            try: pygame.mixer.Sound(DAVID_DASH_SOUND).play()
-                            except pygame.error as e: print(f"David dash sound error: {e}")
+                        play_sound(DAVID_DASH_SOUND) # Play prep sound? Use dash sound for now
 
             # If not prepping dash, perform normal homing movement
             if self.dash_state == "NORMAL":
@@ -1192,9 +1407,7 @@ class ShooterEnemy(pygame.sprite.Sprite):
                  self.charge_start_time = current_time_sec
                  #print("Shooter CHARGING") # Optional debug
                  # Play charging sound
-                 if os.path.exists(SHOOTER_CHARGE_SOUND) and pygame.mixer.get_init():
-                      try: pygame.mixer.Sound(SHOOTER_CHARGE_SOUND).play()
-                      except pygame.error as e: print(f"Shooter charge sound error: {e}")
+                 play_sound(SHOOTER_CHARGE_SOUND)
 
             # CHARGING State: Check if charge time is over
             elif self.state == "CHARGING":
@@ -1235,18 +1448,18 @@ class Projectile(pygame.sprite.Sprite):
         if dist > 0: self.vel_x = (dx / dist) * self.speed_pps; self.vel_y = (dy / dist) * self.speed_pps
         else: target_angle = random.uniform(0, 2 * math.pi); self.vel_x = self.speed_pps * math.cos(target_angle); self.vel_y = self.speed_pps * math.sin(target_angle)
 
-        self.spawn_time_sec = pygame.time.get_ticks() / 1000.0
+        self.age_sec = 0.0 # Advanced by dt so lifetime is independent of wall-clock time
         self.lifetime_sec = 5.0
 
     def update(self, dt=1/FPS, speed_modifier=1.0):
         if dt <= 0: return
-        current_time_sec = pygame.time.get_ticks() / 1000.0
+        self.age_sec += dt
         effective_dt = dt * speed_modifier
         self.pos_x += self.vel_x * effective_dt; self.pos_y += self.vel_y * effective_dt
         self.rect.center = (int(self.pos_x), int(self.pos_y))
 
         padded_track_rect = pygame.Rect(TRACK_LEFT - 50, TRACK_TOP - 50, TRACK_RIGHT - TRACK_LEFT + 100, TRACK_BOTTOM - TRACK_TOP + 100)
-        if not padded_track_rect.colliderect(self.rect) or current_time_sec - self.spawn_time_sec > self.lifetime_sec: self.kill()
+        if not padded_track_rect.colliderect(self.rect) or self.age_sec > self.lifetime_sec: self.kill()
 
     def draw(self, screen): # Consider passing offset to draw method
         # screen.blit(self.image, self.rect) # Simple draw without offset
@@ -1287,10 +1500,14 @@ class CollectibleSeed(pygame.sprite.Sprite):
 
 # --- UPDATED: FinishLine Class for mainnet.png ---
 class FinishLine(pygame.sprite.Sprite):
+    # --- NEW: Fixed goal geometry at class level, so level_sim.plan_level can keep spawns clear of it before any image loads ---
+    FINAL_SIZE = (100, 100)
+    RADIUS = ((FINAL_SIZE[0] + FINAL_SIZE[1]) / 2) * 0.45 # Same as the instance radius below
+    # --- END NEW ---
     def __init__(self, x, y_pos): # Accept x and y_pos
         super().__init__()
         # --- FIX: Define fixed goal size ---
-        self.final_size = (100, 100) # Let's try a fixed size
+        self.final_size = self.FINAL_SIZE # Let's try a fixed size
         # --- END FIX ---
         # --- FIX: Load MAINNET_IMAGE with the fixed size ---
         self.image = load_image(MAINNET_IMAGE, self.final_size)
@@ -1320,13 +1537,20 @@ class FinishLine(pygame.sprite.Sprite):
 
 # --- Base PowerUp Class (Optional Refactor) ---
 class BasePowerUp(pygame.sprite.Sprite):
+    PULSE_SPEED = 3.0
+    PULSE_RANGE = 0.1
+
     def __init__(self, x, y, image_path, powerup_type):
         super().__init__()
         self.powerup_type = powerup_type
         self.base_size = int(ORIGINAL_POWERUP_BASE_SIZE * POWERUP_CUMULATIVE_SIZE_INCREASE)
         self.size = (self.base_size, self.base_size)
-        self.original_image = load_image(image_path, self.size)
-        self.image = self.original_image.copy()
+        self.pulse_speed = self.PULSE_SPEED
+        self.pulse_range = self.PULSE_RANGE
+        # --- CHANGE: One pulse cycle is baked once per powerup type and shared; update() only picks a frame ---
+        self.original_image, self.pulse_frames = self.get_pulse_frames(image_path, powerup_type, self.base_size, self.pulse_range)
+        self.image = self.original_image
+        # --- END CHANGE ---
         self.rect = self.image.get_rect(center=(x, y))
         self.radius = self.rect.width / 2 * 1.1 # Generous radius
         # --- FIX: Add pos_x/pos_y for consistency ---
@@ -1335,39 +1559,43 @@ class BasePowerUp(pygame.sprite.Sprite):
         # --- END FIX ---
 
         self.pulse_timer = random.uniform(0, math.pi*2 / 3.0) # Randomize start phase
-        self.pulse_speed = 3.0
-        self.pulse_range = 0.1
+
+    @staticmethod
+    def get_pulse_frames(image_path, powerup_type, base_size, pulse_range):
+        """Returns (original_image, frames) for one pulse cycle of POWERUP_PULSE_FRAMES, cached per type."""
+        cache_key = (image_path, base_size, pulse_range)
+        if cache_key in POWERUP_PULSE_CACHE: return POWERUP_PULSE_CACHE[cache_key]
+        original_image = load_image(image_path, (base_size, base_size))
+        scaled_by_size = {} # Neighbouring phases often round to the same size: scale those only once
+        frames = []
+        for i in range(POWERUP_PULSE_FRAMES):
+            scale_factor = 1.0 + math.sin(2 * math.pi * i / POWERUP_PULSE_FRAMES) * pulse_range
+            new_size = max(1, int(base_size * scale_factor))
+            if new_size not in scaled_by_size:
+                try:
+                    scaled_by_size[new_size] = pygame.transform.smoothscale(original_image, (new_size, new_size))
+                except (ValueError, pygame.error) as e:
+                    print(f"Error scaling {powerup_type} powerup: {e}. Size:({new_size},{new_size})")
+                    fallback_color = {"freeze": CYAN, "magnet": GOLD, "shield": BLUE, "double": RED}.get(powerup_type, GRAY)
+                    fallback = pygame.Surface((new_size, new_size), pygame.SRCALPHA)
+                    pygame.draw.circle(fallback, fallback_color, (new_size//2, new_size//2), new_size//2)
+                    scaled_by_size[new_size] = fallback
+            frames.append(scaled_by_size[new_size])
+        POWERUP_PULSE_CACHE[cache_key] = (original_image, frames)
+        return original_image, frames
 
     def update(self, dt=1/FPS):
-        # --- FIX: Update rect center from pos_x/pos_y BEFORE animation scaling ---
         current_center = (int(self.pos_x), int(self.pos_y))
-        # Only update if position changed (e.g., if powerups moved in future)
-        if self.rect.center != current_center:
-             self.rect.center = current_center
-        # --- END FIX ---
-
         self.pulse_timer += dt
-        scale_factor = 1.0 + math.sin(self.pulse_timer * self.pulse_speed) * self.pulse_range
-        new_width = max(1, int(self.base_size * scale_factor))
-        new_height = max(1, int(self.base_size * scale_factor))
-        try:
-            if self.original_image and self.original_image.get_width() > 0 and self.original_image.get_height() > 0:
-                 self.image = pygame.transform.smoothscale(self.original_image, (new_width, new_height))
-            else: # Fallback drawing if original image failed
-                 self.image = pygame.Surface((new_width, new_height), pygame.SRCALPHA)
-                 # Use a color based on type for fallback
-                 fallback_color = {"freeze": CYAN, "magnet": GOLD, "shield": BLUE, "double": RED}.get(self.powerup_type, GRAY)
-                 pygame.draw.circle(self.image, fallback_color, (new_width//2, new_height//2), new_width//2)
-        except (ValueError, pygame.error) as e:
-            print(f"Error scaling {self.__class__.__name__}: {e}. Size:({new_width},{new_height})")
-            fallback_color = {"freeze": CYAN, "magnet": GOLD, "shield": BLUE, "double": RED}.get(self.powerup_type, GRAY)
-            self.image = pygame.Surface((max(1,new_width), max(1,new_height)), pygame.SRCALPHA);
-            pygame.draw.circle(self.image, fallback_color, (max(1,new_width)//2, max(1,new_height)//2), max(1,new_width)//2)
-
-        # --- FIX: Update rect center AFTER scaling ---
-        # This ensures the scaled image is centered correctly on its position
-        self.rect = self.image.get_rect(center=current_center)
-        # --- END FIX ---
+        # --- CHANGE: Index the baked pulse cycle by phase instead of smoothscaling every frame ---
+        phase = (self.pulse_timer * self.pulse_speed) / (2 * math.pi)
+        frame = self.pulse_frames[int(phase * POWERUP_PULSE_FRAMES) % POWERUP_PULSE_FRAMES]
+        if frame is not self.image:
+            self.image = frame
+            self.rect = frame.get_rect(center=current_center)
+        elif self.rect.center != current_center:
+            self.rect.center = current_center
+        # --- END CHANGE ---
 
 
 # --- Existing Powerups inheriting from BasePowerUp ---
@@ -1390,59 +1618,164 @@ class DoubleSeedPowerUp(BasePowerUp):
 # --- END NEW Powerups ---
 
 
+# --- NEW: Pre-tinted sparkle surfaces for particles ---
+def get_sparkle_image(size, color, alpha_step=PARTICLE_ALPHA_STEPS):
+    """Sparkle scaled to size x size, tinted with color and faded to alpha_step / PARTICLE_ALPHA_STEPS. Built once, shared."""
+    cache_key = (size, color, alpha_step)
+    image = SPARKLE_CACHE.get(cache_key)
+    if image is not None: return image
+    if alpha_step < PARTICLE_ALPHA_STEPS:
+        image = get_sparkle_image(size, color).copy() # Faded variants copy the opaque bake once
+        image.set_alpha(int(255 * alpha_step / PARTICLE_ALPHA_STEPS))
+        SPARKLE_CACHE[cache_key] = image
+        return image
+
+    image = pygame.Surface((size, size), pygame.SRCALPHA)
+    # --- Cache sparkle base image if not already ---
+    sparkle_cache_key = "sparkle_base"
+    if sparkle_cache_key not in SPRITE_SHEET_CACHE and os.path.exists(SPARKLE_IMAGE):
+        try:
+             SPRITE_SHEET_CACHE[sparkle_cache_key] = get_image(SPARKLE_IMAGE)
+        except Exception as e: print(f"Error loading sparkle base image: {e}")
+
+    if sparkle_cache_key in SPRITE_SHEET_CACHE:
+         try:
+             sparkle_base_orig = SPRITE_SHEET_CACHE[sparkle_cache_key]
+             # Scale the cached base image to the particle size
+             if size > 0:
+                sparkle_base = pygame.transform.smoothscale(sparkle_base_orig, (size, size))
+                sparkle_base.fill(color + (0,), special_flags=pygame.BLEND_RGBA_MULT) # Tint the scaled image
+                image.blit(sparkle_base, (0,0))
+             else: # Fallback if size is zero
+                pygame.draw.circle(image, color, (size // 2, size // 2), size // 2)
+         except Exception as e:
+             print(f"Error scaling/tinting sparkle image: {e}")
+             pygame.draw.circle(image, color, (size // 2, size // 2), size // 2)
+    else:
+         pygame.draw.circle(image, color, (size // 2, size // 2), size // 2)
+    SPARKLE_CACHE[cache_key] = image
+    return image
+
+def prebake_sparkles(colors, size_range):
+    """Bakes the opaque sparkle for every colour/size of a burst type up front (fade steps are baked on first use)."""
+    for color in colors:
+        for size in range(size_range[0], size_range[1] + 1): get_sparkle_image(size, color)
+# --- END NEW ---
+
+
 class Particle(pygame.sprite.Sprite):
-    def __init__(self, pos, color=GOLD, size_range=(5, 15), speed_range=(50, 150), lifetime_ms=500):
+    """
+    Short-lived sparkle. Images come from the shared SPARKLE_CACHE, so spawning allocates no surfaces.
+    Particle(pos, ...) still spawns directly; pooled particles are created inert and re-used via spawn().
+    """
+    def __init__(self, pos=None, color=GOLD, size_range=(5, 15), speed_range=(50, 150), lifetime_ms=500, pool=None):
         super().__init__()
-        self.size = random.randint(size_range[0], size_range[1])
-        self.image = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
+        self.pool = pool
+        self.active = False
+        if pos is not None: self.spawn(pos, color, size_range, speed_range, lifetime_ms)
 
-        # --- Cache sparkle base image if not already ---
-        sparkle_cache_key = "sparkle_base"
-        if sparkle_cache_key not in SPRITE_SHEET_CACHE and os.path.exists(SPARKLE_IMAGE):
-            try:
-                 SPRITE_SHEET_CACHE[sparkle_cache_key] = pygame.image.load(SPARKLE_IMAGE).convert_alpha()
-            except Exception as e: print(f"Error loading sparkle base image: {e}")
-
-        if sparkle_cache_key in SPRITE_SHEET_CACHE:
-             try:
-                 sparkle_base_orig = SPRITE_SHEET_CACHE[sparkle_cache_key]
-                 # Scale the cached base image to the particle size
-                 if self.size > 0:
-                    sparkle_base = pygame.transform.smoothscale(sparkle_base_orig, (self.size, self.size))
-                    sparkle_base.fill(color + (0,), special_flags=pygame.BLEND_RGBA_MULT) # Tint the scaled image
-                    self.image.blit(sparkle_base, (0,0))
-                 else: # Fallback if size is zero
-                    pygame.draw.circle(self.image, color, (self.size // 2, self.size // 2), self.size // 2)
-             except Exception as e:
-                 print(f"Error scaling/tinting sparkle image: {e}")
-                 pygame.draw.circle(self.image, color, (self.size // 2, self.size // 2), self.size // 2)
-        else:
-             pygame.draw.circle(self.image, color, (self.size // 2, self.size // 2), self.size // 2)
-
-        self.original_image = self.image.copy()
+    def spawn(self, pos, color=GOLD, size_range=(5, 15), speed_range=(50, 150), lifetime_ms=500, angle=None, spread=math.pi):
+        """(Re)initialises the particle. angle=None sends it in a random direction, else angle +- spread."""
+        self.size = random.randint(size_range[0], size_range[1])
+        self.color = tuple(color)
+        self.alpha_step = PARTICLE_ALPHA_STEPS
+        self.image = get_sparkle_image(self.size, self.color)
         self.rect = self.image.get_rect(center=pos)
         self.pos_x = float(pos[0]); self.pos_y = float(pos[1])
-        angle = random.uniform(0, 2 * math.pi)
+        if angle is None: angle = random.uniform(0, 2 * math.pi)
+        else: angle += random.uniform(-spread, spread)
         speed_pps = random.uniform(speed_range[0], speed_range[1])
         self.vel_x = speed_pps * math.cos(angle); self.vel_y = speed_pps * math.sin(angle)
-        self.spawn_time_ms = pygame.time.get_ticks()
+        self.age_ms = 0.0 # Advanced by dt, so particles follow the simulation clock
         self.lifetime_ms = lifetime_ms
+        self.active = True
+
+    def kill(self):
+        super().kill()
+        if self.active:
+            self.active = False
+            if self.pool is not None: self.pool.release(self)
 
     def update(self, dt=1/FPS):
         if dt <= 0: return
-        current_ticks = pygame.time.get_ticks()
-        elapsed_ms = current_ticks - self.spawn_time_ms
-        if elapsed_ms >= self.lifetime_ms: self.kill(); return
+        self.age_ms += dt * 1000.0
+        if self.age_ms >= self.lifetime_ms: self.kill(); return
 
         self.pos_x += self.vel_x * dt; self.pos_y += self.vel_y * dt
         self.rect.center = (int(self.pos_x), int(self.pos_y))
 
-        alpha = max(0, 255 * (1 - (elapsed_ms / self.lifetime_ms)))
-        try:
-             # Create a copy and set alpha directly (more efficient than copying original each time)
-             current_alpha = self.image.get_alpha()
-             if current_alpha is None: current_alpha = 255
-             if int(alpha) != current_alpha:
-                 self.image.set_alpha(int(alpha))
-        except pygame.error as e: pass # Ignore errors setting alpha if image is invalid/deleted
+        # --- CHANGE: Fade by switching to a pre-faded shared surface instead of set_alpha on an own copy ---
+        alpha_step = math.ceil(PARTICLE_ALPHA_STEPS * (1 - (self.age_ms / self.lifetime_ms)))
+        if alpha_step != self.alpha_step:
+            self.alpha_step = alpha_step
+            self.image = get_sparkle_image(self.size, self.color, alpha_step)
+        # --- END CHANGE ---
+
+
+class ParticlePool:
+    """
+    Fixed set of PARTICLE_POOL_SIZE particles handed out by emit_particle_burst and returned on kill().
+    When a burst needs more than are free, extra particles are allocated (counted in overflow_allocations);
+    the free list never grows past the pool size, so those extras are dropped again when they expire.
+    """
+    def __init__(self, size=PARTICLE_POOL_SIZE):
+        self.size = size
+        self.free = [Particle(pool=self) for _ in range(size)]
+        self.in_use = set()
+        self.allocated = size
+        self.overflow_allocations = 0
+        self.emitted = 0
+        self.peak_live = 0
+
+    def acquire(self):
+        if self.free: particle = self.free.pop()
+        else:
+            particle = Particle(pool=self)
+            self.allocated += 1; self.overflow_allocations += 1
+        self.in_use.add(particle); self.emitted += 1
+        if len(self.in_use) > self.peak_live: self.peak_live = len(self.in_use)
+        return particle
+
+    def release(self, particle):
+        self.in_use.discard(particle)
+        if len(self.free) < self.size: self.free.append(particle)
+
+    def reclaim_all(self):
+        """Returns every particle still out (e.g. left in a finished level's group) to the pool."""
+        for particle in list(self.in_use): particle.kill()
+
+    def reset_peak(self):
+        """Starts a new measuring window (e.g. per level); particles still alive count towards it."""
+        self.peak_live = len(self.in_use); self.overflow_allocations = 0; self.emitted = 0
+
+    def warm(self):
+        """Pre-bakes the sparkles used by seed pickups, SeedGuy's dash and shield breaks."""
+        prebake_sparkles((GOLD, TRAIL_COLOR_SEEDGUY), (5, 15))
+        prebake_sparkles(SHIELD_BREAK_PARTICLE_COLORS, (4, 10))
+
+    def stats(self):
+        return {"pool_size": self.size, "live": len(self.in_use), "peak_live": self.peak_live, "free": len(self.free),
+                "emitted": self.emitted, "overflow_allocations": self.overflow_allocations, "sparkle_surfaces": len(SPARKLE_CACHE)}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Particles: peak {st['peak_live']} live / pool {st['pool_size']}, emitted {st['emitted']}, "
+                f"overflow allocations {st['overflow_allocations']}, {st['sparkle_surfaces']} sparkle surfaces cached")
+
+
+PARTICLE_POOL = ParticlePool()
+
+def emit_particle_burst(particle_group, pos, count, color=GOLD, colors=None, size_range=(5, 15), speed_range=(50, 150),
+                        lifetime_ms=500, angle=None, spread=math.pi):
+    """
+    Spawns count pooled particles at pos into particle_group. colors (if given) picks a random colour per
+    particle; lifetime_ms may be a (min, max) tuple for a random lifetime per particle.
+    """
+    for _ in range(count):
+        particle = PARTICLE_POOL.acquire()
+        p_color = random.choice(colors) if colors else color
+        p_lifetime = random.randint(lifetime_ms[0], lifetime_ms[1]) if isinstance(lifetime_ms, tuple) else lifetime_ms
+        particle.spawn(pos, p_color, size_range, speed_range, p_lifetime, angle, spread)
+        particle_group.add(particle)
+# --- END NEW ---
 # --- END OF FILE game_objects.py ---
\ No newline at end of file
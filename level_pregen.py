@@ -0,0 +1,83 @@
+# --- START OF FILE level_pregen.py ---
+# Plans the next level's layout (level_sim.plan_level: finish line, enemy/seed/shooter positions, David and homing picks,
+# weather particles) on a worker thread while the level-clear / world-transition screens are showing (those warm the world
+# background). The worker never touches pygame surfaces, the shared sprite caches or save_data: run_level builds the
+# sprites from the finished layout on the main thread. If the inputs changed or the worker is late it plans in place.
+
+import time, random, threading, traceback
+from collections import deque
+from settings import *
+from level_sim import plan_level
+
+
+class LevelPregenerator:
+    """start() kicks off a background layout plan for the next level; take() returns it if it matches what run_level needs."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.thread = None
+        self.generation = 0 # Bumped on every start()/discard so a stale worker's result is ignored
+        self.key = None; self.layout = None
+        # Metrics
+        self.started = 0; self.adopted = 0; self.discarded = 0; self.failed = 0
+        self.build_ms = deque(maxlen=LEVEL_PREGEN_HISTORY) # Worker time per plan
+        self.wait_ms = deque(maxlen=LEVEL_PREGEN_HISTORY) # Time run_level still waited for the worker
+
+    @staticmethod
+    def _key(level, shop_upgrades, difficulty):
+        return (level, shop_upgrades.get('seed_enemy', 0), difficulty) # Everything plan_level reads besides the seed
+
+    def start(self, level, shop_upgrades, difficulty="Normal"):
+        if not LEVEL_PREGEN_ENABLED or level > MAX_LEVEL: return
+        key = self._key(level, shop_upgrades, difficulty)
+        seed = random.getrandbits(32) # Own RNG (seeded, so replays can rebuild the level): the menu thread keeps using the module-level one
+        with self.lock:
+            self.generation += 1; self.key = None; self.layout = None
+            generation = self.generation
+        self.started += 1
+        self.thread = threading.Thread(target=self._build, args=(generation, key, (level, dict(shop_upgrades), difficulty), seed),
+                                       name="level-pregen", daemon=True)
+        self.thread.start()
+
+    def _build(self, generation, key, args, seed):
+        start = time.perf_counter()
+        try:
+            layout = plan_level(*args, seed=seed) # Pure layout: sprites are built by LevelSimulation on the main thread
+        except Exception as e:
+            self.failed += 1; print(f"Level pregeneration failed (Level {args[0]}): {e}"); traceback.print_exc(); return
+        self.build_ms.append((time.perf_counter() - start) * 1000.0)
+        with self.lock:
+            if generation == self.generation: self.key = key; self.layout = layout
+
+    def take(self, level, shop_upgrades, difficulty="Normal"):
+        """The pregenerated level_sim.LevelLayout for exactly these inputs, or None (nothing started, mismatch, or worker too slow)."""
+        if self.thread is None: return None
+        start = time.perf_counter()
+        self.thread.join(LEVEL_PREGEN_WAIT_SEC)
+        waited = self.thread.is_alive()
+        key = self._key(level, shop_upgrades, difficulty)
+        with self.lock:
+            layout = self.layout if self.key == key else None
+            self.generation += 1; self.key = None; self.layout = None # Single use either way
+        self.thread = None
+        if layout is None:
+            self.discarded += 1
+            if waited: print(f"Level pregeneration for Level {level} not ready after {LEVEL_PREGEN_WAIT_SEC}s, planning in place.")
+            return None
+        self.adopted += 1; self.wait_ms.append((time.perf_counter() - start) * 1000.0)
+        return layout
+
+    def stats(self):
+        build = sorted(self.build_ms); wait = sorted(self.wait_ms)
+        return {"started": self.started, "adopted": self.adopted, "discarded": self.discarded, "failed": self.failed,
+                "build_ms_mean": sum(build) / len(build) if build else 0.0, "build_ms_max": build[-1] if build else 0.0,
+                "wait_ms_mean": sum(wait) / len(wait) if wait else 0.0, "wait_ms_max": wait[-1] if wait else 0.0}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Level pregeneration: {st['started']} started, {st['adopted']} adopted, {st['discarded']} discarded, {st['failed']} failed, "
+                f"plan mean {st['build_ms_mean']:.1f}ms max {st['build_ms_max']:.1f}ms (off the game thread), "
+                f"run_level waited mean {st['wait_ms_mean']:.2f}ms max {st['wait_ms_max']:.2f}ms")
+
+
+LEVEL_PREGEN = LevelPregenerator()
+# --- END OF FILE level_pregen.py ---
@@ -0,0 +1,558 @@
+# --- START OF FILE level_sim.py ---
+# Level simulation split out of main.run_level: builds a level and advances it one tick at a time.
+# Nothing in here draws or flips the display, so a level can also run headless with a fixed dt.
+
+import pygame, os, math, random, time
+from settings import *
+from game_objects import (Player, Enemy, CollectibleSeed, FinishLine, ShooterEnemy,
+                          emit_particle_burst, PARTICLE_POOL, MagnetPowerUp, FreezePowerUp, ShieldPowerUp, DoubleSeedPowerUp,
+                          create_shield_break_particles, circle_collision, collide_circle_precise_seed,
+                          EnemyCollisionBroadphase,
+                          David, EarthEnemy, FireEnemy, WaterEnemy, FrostEnemy, UnderworldEnemy,
+                          DesertEnemy, JungleEnemy, SpaceEnemy, CyberEnemy, MysticEnemy, SuperseedEnemy)
+from ui import play_freeze_sound
+from audio import play_sound
+from enemy_physics import NumpyEnemyEngine, NUMPY_AVAILABLE
+from spawn_sampler import PoissonDiskSampler
+from weather import WeatherSystem
+
+SHIELD_BREAK_INVINCIBILITY = 1.5  # Seconds of invincibility after shield breaks
+
+WORLD_ENEMY_CLASS_MAP = {
+    "Earth": EarthEnemy, "Fire": FireEnemy, "Water": WaterEnemy, "Frost": FrostEnemy, "Underworld": UnderworldEnemy,
+    "Desert": DesertEnemy, "Jungle": JungleEnemy, "Space": SpaceEnemy, "Cyber": CyberEnemy, "Mystic": MysticEnemy,
+    "Superseed": SuperseedEnemy
+}
+
+WORLD_ENEMY_IMAGE_MAP = {
+    "Earth": EARTH_ENEMY_IMAGE, "Fire": FIRE_ENEMY_IMAGE, "Water": WATER_ENEMY_IMAGE, "Frost": FROST_ENEMY_IMAGE,
+    "Underworld": UNDERWORLD_ENEMY_IMAGE, "Desert": DESERT_ENEMY_IMAGE, "Jungle": JUNGLE_ENEMY_IMAGE,
+    "Space": SPACE_ENEMY_IMAGE, "Cyber": CYBER_ENEMY_IMAGE, "Mystic": MYSTIC_ENEMY_IMAGE, "Superseed": SUPERSEED_ENEMY_IMAGE
+}
+
+DEFAULT_VAULT_UPGRADES = {"node_speed_boost": 0, "extra_life": 0, "seed_multiplier": 0, "seed_radius": 0,
+                          "cooldown_reduction": 0, "starting_shield": 0, "enemy_slow_aura": 0, "blessing_superseed": 0}
+
+
+def get_scene_description(level):
+    level = max(1, level) # Ensure level is at least 1
+    if level < 10: return "Earth World"
+    elif level < 21: return "Fire World"
+    elif level < 31: return "Water World"
+    elif level < 41: return "Frost World"
+    elif level < 51: return "Underworld" # Updated world name
+    elif level < 61: return "Desert World"
+    elif level < 71: return "Jungle World"
+    elif level < 81: return "Space World"
+    elif level < 91: return "Cyber World"
+    elif level < 95: return "Mystic World (Inverse Controls)"
+    else: return "Superseed World" # Renamed
+
+
+class KeyState(dict):
+    """Stand-in for pygame.key.get_pressed() in headless runs: any key not set reads as released."""
+    def __missing__(self, key):
+        return False
+
+    @classmethod
+    def from_pressed(cls, pressed_keys=()):
+        return cls((key, True) for key in pressed_keys)
+
+
+# --- NEW: Level layout planned apart from sprite construction (level_pregen.py plans it off the main thread) ---
+class LevelLayout:
+    """Every RNG-drawn position and choice of one level, as plain data: no sprites, surfaces or shared caches."""
+    def __init__(self, level, seed, rng, start_pos=None):
+        self.level = level
+        self.seed = seed # Recorded in replays (replay.py): the same seed rebuilds the same level
+        self.rng = rng # LevelSimulation keeps drawing from it (enemy headings, David dashes, shop re-speeds)
+        self.world_name = get_scene_description(level)
+        self.world_key = self.world_name.replace(" (Inverse Controls)","").replace(" World","").strip()
+        self.player_start_x = start_pos[0] if start_pos else SCREEN_WIDTH // 2 # Player spawn position (near top)
+        self.player_start_y = start_pos[1] if start_pos else TRACK_TOP + 50
+        self.finish_pos = None
+        self.enemies = [] # (is_david, x, y) in spawn order
+        self.homing_indices = [] # Indices into enemies
+        self.seed_positions = []
+        self.weather = "clear"; self.wind_direction = None; self.weather_fx = None
+        self.shooter_positions = []
+        self.powerup_interval = 0.0
+
+
+def plan_level(level, shop_upgrades, difficulty="Normal", start_pos=None, seed=None, rng=None):
+    """
+    Draws a level's layout from its RNG: finish line, enemy/seed/shooter positions, David rolls, homing picks, weather
+    and the first powerup interval. Only RNG, settings and the spawn sampler are used, so it is safe on a worker thread;
+    LevelSimulation then builds the sprites from it on the main thread.
+    """
+    rng = rng or (random.Random(seed) if seed is not None else random)
+    layout = LevelLayout(level, seed, rng, start_pos)
+    finish_line_height = FinishLine.FINAL_SIZE[1] # Goal centered on the bottom border
+    layout.finish_pos = (rng.randint(TRACK_LEFT + 50, TRACK_RIGHT - 50), TRACK_BOTTOM - finish_line_height // 2)
+    _plan_enemies(layout, shop_upgrades, difficulty)
+    _plan_seeds(layout, shop_upgrades)
+    _plan_weather(layout)
+    _plan_shooters(layout)
+    layout.powerup_interval = rng.uniform(4.0, 8.0)
+    return layout
+
+
+def _plan_enemies(layout, shop_upgrades, difficulty):
+    level = layout.level; rng = layout.rng; finish_x, finish_y = layout.finish_pos
+    if level <= 15: base_count = 4 + (level - 1) * (6 / 14)
+    elif level <= 80: base_count = 10 + (level - 15) * (7 / 65)
+    else: base_count = 17 + (level - 80) * (3 / 19)
+    base_count = min(base_count, 20)
+    final_enemy_count = int(base_count) + shop_upgrades.get('seed_enemy', 0)
+    if difficulty == "Hard": final_enemy_count += 2; print(f"Hard difficulty: +2 enemies (Total: {final_enemy_count})")
+
+    enemy_radius_est = ORIGINAL_ENEMY_BASE_SIZE * ENEMY_CUMULATIVE_SIZE_INCREASE / 2
+    sampler = PoissonDiskSampler((TRACK_LEFT + enemy_radius_est + 10, TRACK_TOP + enemy_radius_est + 10,
+                                  TRACK_RIGHT - enemy_radius_est - 10, TRACK_BOTTOM - enemy_radius_est - 10), ENEMY_SPAWN_SPACING, rng,
+                                 exclusions=[(layout.player_start_x, layout.player_start_y, MIN_ENEMY_SPAWN_DIST_FROM_PLAYER),
+                                             (finish_x, finish_y, FinishLine.RADIUS + 50)])
+    if level >= 20:
+        if level < 70: david_chance = 0.1 + (level / 200)
+        else: david_chance = min(0.1 + (70 / 200) + (level - 70) / 500, 0.50)
+    else: david_chance = 0.0
+    for i in range(final_enemy_count):
+        ex, ey = sampler.sample() # Spaced from other enemies, outside the player-start and finish zones
+        layout.enemies.append((rng.random() < david_chance, ex, ey))
+    if sampler.fallbacks: print(f"Warning: Enemy spawn fallback Lvl {level}. {sampler.describe()}")
+
+    if level >= 15: # David always homes; pick homing enemies among the others
+        candidates = [i for i, (is_david, _, _) in enumerate(layout.enemies) if not is_david]
+        num_homing = min(len(candidates), 1 + level // 10)
+        if num_homing > 0: layout.homing_indices = rng.sample(candidates, num_homing)
+
+
+def _plan_seeds(layout, shop_upgrades):
+    rng = layout.rng; finish_x, finish_y = layout.finish_pos
+    num_seeds = rng.choices(range(2, 9), weights=[40, 25, 15, 10, 5, 4, 1], k=1)[0]
+    num_seeds += shop_upgrades.get('seed_enemy', 0) * 2
+    seed_radius_check = ORIGINAL_SEED_BASE_SIZE * SEED_SIZE_MULTIPLIER / 2
+    sampler = PoissonDiskSampler((TRACK_LEFT + seed_radius_check + 5, TRACK_TOP + seed_radius_check + 5,
+                                  TRACK_RIGHT - seed_radius_check - 5, TRACK_BOTTOM - seed_radius_check - 5), SEED_SPAWN_SPACING, rng,
+                                 exclusions=[(layout.player_start_x, layout.player_start_y, 100),
+                                             (finish_x, finish_y, FinishLine.RADIUS + 30)])
+    layout.seed_positions = sampler.sample_many(num_seeds)
+
+
+def _plan_weather(layout):
+    rng = layout.rng
+    available_weather = ["clear", "rain", "wind", "snow"]
+    weather_weights = [5, 2, 2, 1]
+    if layout.level >= 5: layout.weather = rng.choices(available_weather, weights=weather_weights, k=1)[0]
+
+    # Weather particles (visual only, stepped and drawn by the renderer; own RNG seeded from the level's, stamps built on first draw)
+    layout.wind_direction = rng.choice([-1, 1]) if layout.weather == "wind" else None
+    layout.weather_fx = WeatherSystem(layout.weather, rng, layout.wind_direction)
+
+
+def _plan_shooters(layout):
+    if layout.level < 10: return
+    rng = layout.rng
+    num_shooters = max(1, layout.level // 10)
+    shooter_y_spacing = (TRACK_BOTTOM - TRACK_TOP - 200) / (num_shooters + 1) if num_shooters > 0 else 0
+    shooter_radius_est = ORIGINAL_SHOOTER_BASE_WIDTH * SHOOTER_SIZE_MULTIPLIER / 2
+    sampler = PoissonDiskSampler((TRACK_LEFT, TRACK_TOP, TRACK_RIGHT, TRACK_BOTTOM), SHOOTER_SPAWN_SPACING, rng)
+    for i in range(num_shooters):
+         # Shooters sit on the side walls at fixed heights; try the sides in random order, skip the slot if both are taken
+         sides = [TRACK_LEFT + shooter_radius_est + 10, TRACK_RIGHT - shooter_radius_est - 10]; rng.shuffle(sides)
+         sy = TRACK_TOP + 100 + (i + 1) * shooter_y_spacing
+         sy = max(TRACK_TOP + shooter_radius_est + 10, min(sy, TRACK_BOTTOM - shooter_radius_est - 10))
+         for sx in sides:
+              if sampler.try_add(sx, sy): layout.shooter_positions.append((sx, sy)); break
+# --- END NEW ---
+
+
+class LevelSimulation:
+    """
+    All gameplay state of one level (player, enemies, shooters, projectiles, seeds, powerups)
+    plus the per-frame update. Rendering lives in main.run_level and only reads this state.
+    """
+    def __init__(self, level, current_seed_count, shop_upgrades, player_upgrades, checkpoint_count, last_ability_time,
+                 save_data, difficulty="Normal", start_pos=None, start_angle=None, character=1, achievements=None,
+                 rng=None, level_start_time=0.0, mixer_ok=False, collision_broadphase=None, enemy_physics=None, seed=None, layout=None):
+        self.level = level
+        self.difficulty = difficulty
+        self.save_data = save_data
+        self.achievements = achievements # achievements.AchievementEngine, or None for headless runs
+        # --- CHANGE: Layout comes from plan_level (pregenerated off-thread, or planned here); only sprites are built below ---
+        if layout is None: layout = plan_level(level, shop_upgrades, difficulty, start_pos, seed=seed, rng=rng)
+        self.seed = layout.seed
+        self.rng = layout.rng
+        self.mixer_ok = mixer_ok
+        self.collision_broadphase = collision_broadphase or ENEMY_COLLISION_BROADPHASE # "grid" or "bruteforce"
+        enemy_physics = enemy_physics or ENEMY_PHYSICS_ENGINE
+        if enemy_physics == "numpy" and not NUMPY_AVAILABLE:
+            print("Warning: NumPy not available, using the per-sprite enemy physics.")
+        self.enemy_engine = NumpyEnemyEngine() if enemy_physics == "numpy" and NUMPY_AVAILABLE else None
+        self.current_seed_count = current_seed_count
+        self.initial_seed_count_for_level = current_seed_count
+        self.shop_upgrades = shop_upgrades
+        self.player_upgrades = player_upgrades
+        self.checkpoint_count = checkpoint_count
+        self.level_start_time = level_start_time
+        self.sim_time = level_start_time # Clock used when step() is not given an explicit time
+        self.ticks = 0
+        self.level_outcome = None
+        self.profiler = None # frame_profiler.FrameProfiler: step() marks its phases when set
+
+        self.player_start_x = layout.player_start_x; self.player_start_y = layout.player_start_y
+        player_start_angle = start_angle if start_angle is not None else 270
+
+        player = Player(self.player_start_x, self.player_start_y, character=character)
+        player.angle = player_start_angle # Set movement angle
+        player.visual_angle = player_start_angle # Sync visual angle
+        player.last_ability = last_ability_time
+        self.player = player
+
+        if "vault_upgrades" not in save_data or not isinstance(save_data["vault_upgrades"], dict):
+            print("Warning: Vault upgrades missing/invalid in run_level.")
+            save_data["vault_upgrades"] = {}
+            for key, default_val in DEFAULT_VAULT_UPGRADES.items(): save_data["vault_upgrades"].setdefault(key, default_val)
+        player.apply_vault_upgrades(save_data["vault_upgrades"])
+        if player_upgrades.get('shield', 0) <= 0: player_upgrades['shield'] = save_data["vault_upgrades"].get("starting_shield", 0)
+
+        player.upgrades = player_upgrades.copy()
+        player.temp_shield_end_time = 0.0
+        player.invincible_until = 0.0
+
+        self.finish_goal = FinishLine(*layout.finish_pos) # Goal position (near bottom)
+
+        self.enemies = pygame.sprite.Group()
+        self.shooter_group = pygame.sprite.Group()
+        self.projectiles = pygame.sprite.Group()
+        self.seeds = pygame.sprite.Group()
+        self.particles = pygame.sprite.Group()
+        PARTICLE_POOL.warm() # Sparkles for seed pickups / shield breaks are baked before the first burst
+        self.powerups = pygame.sprite.Group()
+        self.ability_effects = pygame.sprite.Group()
+        player.ability_effects = self.ability_effects
+        player.particle_group_ref = self.particles
+
+        self.world_name = layout.world_name
+        self.world_key = layout.world_key
+        self.inverse_controls = (self.world_name == "Mystic World (Inverse Controls)")
+
+        self._spawn_enemies(layout)
+        self._spawn_seeds(layout)
+        self._init_weather(layout)
+        self._spawn_shooters(layout)
+
+        self.powerup_spawn_timer = 0.0
+        self.powerup_interval = layout.powerup_interval
+
+        self.achievement_banners = []
+        self.freeze_end_time = 0.0
+        self.magnet_active_until = 0.0
+        self.double_seed_end_time = 0.0
+        self.level_screen_flash_timer = 0.0
+        self.level_screen_flash_color = WHITE
+        self.freeze_active = False
+        self.magnet_active = False
+        self.double_seed_active = False
+
+        self._achievement_event("world_reached", self.world_key)
+
+    # --- Level Generation (sprites built from the planned layout) ---
+    def _spawn_enemies(self, layout):
+        level = self.level; rng = self.rng
+        enemy_class = WORLD_ENEMY_CLASS_MAP.get(self.world_key, Enemy)
+        enemy_image_path = WORLD_ENEMY_IMAGE_MAP.get(self.world_key, DEBT_IMAGE)
+        current_shop_speed_level = self.shop_upgrades.get('speed', 0)
+        base_arbitrary_speed = (1.0 + level * 0.08)
+        speed_difficulty_mult = 1.15 if self.difficulty == "Hard" else 1.0
+        effective_arbitrary_speed = base_arbitrary_speed * speed_difficulty_mult
+        spawned = []
+        for is_david, ex, ey in layout.enemies:
+            if self.difficulty == "Hard": print(f"Hard difficulty: Enemy base speed unit: {effective_arbitrary_speed:.2f} (Multiplier: {speed_difficulty_mult})")
+            if is_david: enemy = David(ex, ey, effective_arbitrary_speed, image_path=DAVID_IMAGE, shop_speed_level=current_shop_speed_level, rng=rng)
+            else: enemy = enemy_class(ex, ey, effective_arbitrary_speed, image_path=enemy_image_path, shop_speed_level=current_shop_speed_level, rng=rng)
+            self.enemies.add(enemy); spawned.append(enemy)
+        for i in layout.homing_indices: spawned[i].homing = True
+
+    def _spawn_seeds(self, layout):
+        for sx, sy in layout.seed_positions: self.seeds.add(CollectibleSeed(sx, sy))
+
+    def _init_weather(self, layout):
+        self.weather = layout.weather
+        self.wind_direction_persistent = layout.wind_direction
+        self.weather_fx = layout.weather_fx
+
+    def _spawn_shooters(self, layout):
+        for sx, sy in layout.shooter_positions: self.shooter_group.add(ShooterEnemy(sx, sy))
+
+    # --- Helpers ---
+    def _play_sound(self, sound_path):
+        if self.mixer_ok: play_sound(sound_path) # Decoded once by the audio manager
+
+    def _achievement_event(self, stat, value):
+        if self.achievements: self.achievements.notify(stat, value, self.achievement_banners)
+
+    def apply_shop_speed_level(self):
+        """Re-derives enemy speeds after the in-game shop changed the speed upgrade level."""
+        current_shop_speed_level = self.shop_upgrades.get('speed', 0)
+        for enemy in self.enemies:
+            base_speed_boost = 1.0 + (current_shop_speed_level * SHOP_SPEED_ENEMY_BOOST_FACTOR)
+            enemy.speed_pps = enemy.base_speed_pps * ENEMY_SPEED_MULTIPLIER * base_speed_boost
+            current_vel_magnitude = math.hypot(enemy.vel_x, enemy.vel_y)
+            if current_vel_magnitude > 0.01:
+                scale_factor = enemy.speed_pps / current_vel_magnitude
+                enemy.vel_x *= scale_factor; enemy.vel_y *= scale_factor
+            else:
+                 angle = self.rng.uniform(0, 2 * math.pi)
+                 enemy.vel_x = enemy.speed_pps * math.cos(angle); enemy.vel_y = enemy.speed_pps * math.sin(angle)
+        if self.enemy_engine is not None: self.enemy_engine.invalidate()
+        print("Updated enemy speeds after shop close.")
+
+    def _break_shield_or_die(self, current_time_sec, source):
+        """Applies a hit from an enemy/projectile. Returns True if a shield absorbed it."""
+        player = self.player
+        if current_time_sec < player.temp_shield_end_time:
+            print(f"Temp Shield Powerup BROKEN by {source}")
+            player.temp_shield_end_time = 0.0
+        elif player.upgrades.get("shield", 0) > 0:
+            print(f"Permanent Shield BROKEN by {source}")
+            player.upgrades["shield"] = 0
+        else:
+            print(f"Player hit {source.lower()} - NO SHIELD")
+            self.level_outcome = "lose"
+            self.level_screen_flash_timer = 0.1
+            self.level_screen_flash_color = RED
+            self._play_sound(DEAD_SOUND)
+            return False
+        player.invincible_until = current_time_sec + SHIELD_BREAK_INVINCIBILITY
+        self.level_screen_flash_timer = 0.1
+        self.level_screen_flash_color = BLUE
+        create_shield_break_particles(player.rect.center, self.particles)
+        self._play_sound(BREAK_SHIELD_SOUND)
+        return True
+
+    # --- Per-Frame Update ---
+    def step(self, dt, keys, current_time_sec=None):
+        """
+        Advances the level by one frame of length dt. If current_time_sec is None the
+        simulation's own clock is used (headless runs). Returns the level outcome or None.
+        """
+        if self.level_outcome is not None: return self.level_outcome
+        self.sim_time += dt
+        if current_time_sec is None: current_time_sec = self.sim_time
+        self.ticks += 1
+        player = self.player; save_data = self.save_data; profiler = self.profiler
+
+        player.update(keys, current_time_sec, self.weather, self.shop_upgrades, self.inverse_controls, self.wind_direction_persistent, player_ref=player, dt=dt)
+        if profiler: profiler.mark("player")
+        self.finish_goal.update(dt=dt)
+
+        self.freeze_active = freeze_active = current_time_sec < self.freeze_end_time
+        self.magnet_active = magnet_active = current_time_sec < self.magnet_active_until
+        self.double_seed_active = current_time_sec < self.double_seed_end_time
+
+        # Mesky slow logic (Freeze overrides Mesky)
+        effective_speed_modifier_for_updates = 1.0
+        if freeze_active: effective_speed_modifier_for_updates = 0.0
+        elif player.character == 3 and player.ability_active: effective_speed_modifier_for_updates = 0.5
+
+        shop_slow_factor = 1.0 - (self.shop_upgrades.get('enemy_slow', 0) * 0.05)
+        final_shop_mesky_modifier = effective_speed_modifier_for_updates * shop_slow_factor
+
+        aura_level = save_data["vault_upgrades"].get("enemy_slow_aura", 0)
+        aura_slow_factor = 1.0 - (0.07 * aura_level) if aura_level > 0 else 1.0
+        aura_radius_sq = (40 + aura_level * 10) ** 2 if aura_level > 0 else -1
+
+        all_enemies = self.enemies.sprites()
+        if self.enemy_engine is not None:
+            # Roaming enemies step as arrays; Davids keep their dash state machine and bounce off everyone
+            roaming = [e for e in all_enemies if not isinstance(e, David)]
+            davids = [e for e in all_enemies if isinstance(e, David)]
+            self.enemy_engine.step(roaming, dt, final_shop_mesky_modifier, player, aura_radius_sq, aura_slow_factor)
+            for i, enemy in enumerate(davids):
+                final_modifier = final_shop_mesky_modifier
+                if aura_radius_sq > 0:
+                     dx_aura, dy_aura = player.pos_x - enemy.pos_x, player.pos_y - enemy.pos_y
+                     if dx_aura*dx_aura + dy_aura*dy_aura <= aura_radius_sq: final_modifier *= aura_slow_factor
+                enemy.update(player, speed_modifier=final_modifier, dt=dt, other_enemies=davids[i+1:] + roaming)
+        else:
+            broadphase = EnemyCollisionBroadphase(all_enemies, self.collision_broadphase)
+            for i, enemy in enumerate(all_enemies):
+                final_modifier = final_shop_mesky_modifier
+                if aura_radius_sq > 0 and hasattr(enemy, 'pos_x') and hasattr(enemy, 'pos_y'):
+                     dx_aura, dy_aura = player.pos_x - enemy.pos_x, player.pos_y - enemy.pos_y
+                     if dx_aura*dx_aura + dy_aura*dy_aura <= aura_radius_sq: final_modifier *= aura_slow_factor
+                other_enemies_for_collision = broadphase.candidates(i)
+                player_arg_for_update = player if isinstance(enemy, David) or getattr(enemy, 'homing', False) else None
+                enemy.update(player_arg_for_update, speed_modifier=final_modifier, dt=dt, other_enemies=other_enemies_for_collision)
+                broadphase.resolved(i, other_enemies_for_collision)
+        if profiler: profiler.mark("enemies")
+
+        shooter_player_arg = player if not freeze_active else None
+        self.shooter_group.update(current_time_sec, self.projectiles, shooter_player_arg)
+        self.projectiles.update(dt=dt, speed_modifier=(0.0 if freeze_active else 1.0))
+        if profiler: profiler.mark("shooters")
+        self.particles.update(dt=dt)
+        self.powerups.update(dt=dt)
+        self.ability_effects.update(dt, player) # Pass player ref to ability effect update
+
+        current_pickup_radius = player.radius + player.vault_pickup_radius_bonus
+        if magnet_active:
+            current_pickup_radius *= MAGNET_PICKUP_RADIUS_MULTIPLIER
+            magnet_pull_speed = 250; magnet_radius_sq = current_pickup_radius**2
+            for seed in self.seeds:
+                dx = player.pos_x - seed.pos_x
+                dy = player.pos_y - seed.pos_y
+                dist_sq = dx*dx + dy*dy
+                if dist_sq < magnet_radius_sq and dist_sq > (player.radius * 0.5)**2:
+                    dist = math.sqrt(dist_sq)
+                    seed.pos_x += dx / dist * magnet_pull_speed * dt
+                    seed.pos_y += dy / dist * magnet_pull_speed * dt
+        self.seeds.update() # Sync rect with pos
+
+        self._update_powerup_spawning(dt)
+        if profiler: profiler.mark("sim_other") # Particles, powerups, ability effects, magnet pull, powerup spawns
+
+        # --- Shield / Collision Logic (only if not currently invincible) ---
+        if current_time_sec >= player.invincible_until:
+            collided_enemy = pygame.sprite.spritecollideany(player, self.enemies, circle_collision)
+            shield_held = True
+            if collided_enemy:
+                shield_held = self._break_shield_or_die(current_time_sec, "Enemy")
+            # Projectiles only matter if the enemy check neither killed nor granted invincibility
+            elif self.level_outcome is None:
+                collided_proj = pygame.sprite.spritecollideany(player, self.projectiles, circle_collision)
+                if collided_proj:
+                    collided_proj.kill() # Remove projectile regardless of shield outcome
+                    shield_held = self._break_shield_or_die(current_time_sec, "Projectile")
+            if not shield_held:
+                if profiler: profiler.mark("collisions")
+                return self.level_outcome
+
+        self._collect_seeds()
+        self._collect_powerups(current_time_sec)
+
+        # Finish Line Collision
+        if circle_collision(player, self.finish_goal):
+             self.level_outcome = "win"
+             level_time_taken = current_time_sec - self.level_start_time
+             self._achievement_event("level_cleared", {"level": self.level, "time_taken": level_time_taken, "inverse_controls": self.inverse_controls,
+                                                       "seeds_held": self.current_seed_count, "used_ability": player.last_ability >= self.level_start_time})
+        if profiler: profiler.mark("collisions")
+        return self.level_outcome
+
+    def _update_powerup_spawning(self, dt):
+        rng = self.rng; player = self.player
+        self.powerup_spawn_timer += dt
+        if self.powerup_spawn_timer >= self.powerup_interval:
+            self.powerup_spawn_timer -= self.powerup_interval
+            powerup_chance = POWERUP_CHANCE_BLESSING if self.save_data["vault_upgrades"].get("blessing_superseed", 0) >= 1 else POWERUP_CHANCE_BASE
+            if rng.random() < powerup_chance:
+                 pu_radius_est = ORIGINAL_POWERUP_BASE_SIZE * POWERUP_CUMULATIVE_SIZE_INCREASE / 2
+                 sampler = PoissonDiskSampler((TRACK_LEFT+pu_radius_est+10, TRACK_TOP+pu_radius_est+10, TRACK_RIGHT-pu_radius_est-10, TRACK_BOTTOM-pu_radius_est-10),
+                                              POWERUP_SPAWN_SPACING, rng, exclusions=[(player.pos_x, player.pos_y, 100)])
+                 for pu in self.powerups: sampler.add_point(pu.rect.centerx, pu.rect.centery)
+                 fx, fy = sampler.sample()
+                 pu_type = rng.choices(list(POWERUP_WEIGHTS.keys()), weights=list(POWERUP_WEIGHTS.values()), k=1)[0]
+                 if pu_type == "freeze": self.powerups.add(FreezePowerUp(fx, fy))
+                 elif pu_type == "magnet": self.powerups.add(MagnetPowerUp(fx, fy))
+                 elif pu_type == "shield": self.powerups.add(ShieldPowerUp(fx, fy))
+                 elif pu_type == "double": self.powerups.add(DoubleSeedPowerUp(fx, fy))
+            self.powerup_interval = rng.uniform(4.0, 8.0)
+
+    def _collect_seeds(self):
+        seeds_collided = pygame.sprite.spritecollide(self.player, self.seeds, True, collide_circle_precise_seed)
+        if seeds_collided:
+             vault_multiplier = 2 if self.save_data["vault_upgrades"].get("seed_multiplier", 0) >= 1 else 1
+             powerup_multiplier = 2 if self.double_seed_active else 1
+             seeds_gained = len(seeds_collided) * vault_multiplier * powerup_multiplier
+             self.current_seed_count += seeds_gained
+             self.save_data["total_seeds_accumulated"] = self.save_data.get("total_seeds_accumulated", 0) + seeds_gained
+             self._achievement_event("total_seeds_accumulated", self.save_data["total_seeds_accumulated"])
+             for seed_sprite in seeds_collided:
+                  emit_particle_burst(self.particles, seed_sprite.rect.center, 5 * powerup_multiplier)
+             self._play_sound(COLLECT_SOUND)
+
+    def _collect_powerups(self, current_time_sec):
+        player = self.player; save_data = self.save_data
+        powerups_collided = pygame.sprite.spritecollide(player, self.powerups, True, circle_collision)
+        for pu in powerups_collided:
+            pu_type = getattr(pu, 'powerup_type', 'unknown')
+            if pu_type == "freeze":
+                if self.mixer_ok: play_freeze_sound()
+                self.freeze_end_time = current_time_sec + FREEZE_DURATION
+            elif pu_type == "magnet":
+                self._play_sound(MAGNET_SOUND)
+                self.magnet_active_until = current_time_sec + MAGNET_DURATION
+                save_data["total_magnets_collected"] = save_data.get("total_magnets_collected", 0) + 1
+                self._achievement_event("total_magnets_collected", save_data["total_magnets_collected"])
+            elif pu_type == "shield":
+                # Only activate if no other shield/invincibility is present
+                has_permanent_shield_local = player.upgrades.get("shield", 0) > 0
+                is_temp_shield_powerup_active_local = current_time_sec < player.temp_shield_end_time
+                is_chosen_invincible_local = (player.character == 4 and player.ability_active) or (current_time_sec < player.invincible_until)
+                if not has_permanent_shield_local and not is_temp_shield_powerup_active_local and not is_chosen_invincible_local:
+                    player.temp_shield_end_time = current_time_sec + SHIELD_POWERUP_DURATION
+                    print(f"Temporary shield powerup activated until {player.temp_shield_end_time:.1f}")
+                    self._play_sound(POWERUP_SHIELD_SOUND)
+                else:
+                    print("Shield powerup collected, but another shield/invincibility is already active.")
+            elif pu_type == "double":
+                 self.double_seed_end_time = current_time_sec + DOUBLE_SEED_DURATION
+                 print(f"Double seeds active until {self.double_seed_end_time:.1f}")
+                 self._play_sound(POWERUP_DOUBLE_SOUND)
+
+    # --- Headless Stepping ---
+    def run_ticks(self, num_ticks, dt=1.0 / FPS, input_func=None):
+        """
+        Steps up to num_ticks fixed-size ticks on the simulation clock (stops early when the
+        level ends). input_func(tick_index, sim) may return the key state for each tick.
+        Returns a dict with the outcome and timing stats.
+        """
+        no_keys = KeyState()
+        tick_times = []
+        wall_start = time.perf_counter()
+        for tick_index in range(num_ticks):
+            keys = input_func(tick_index, self) if input_func else no_keys
+            tick_start = time.perf_counter()
+            outcome = self.step(dt, keys)
+            tick_times.append(time.perf_counter() - tick_start)
+            if outcome is not None: break
+        wall_time = time.perf_counter() - wall_start
+        sim_seconds = len(tick_times) * dt
+        sorted_ms = sorted(t * 1000.0 for t in tick_times)
+        return {
+            "outcome": self.level_outcome,
+            "ticks": len(tick_times),
+            "sim_time": sim_seconds,
+            "wall_time": wall_time,
+            "speedup": (sim_seconds / wall_time) if wall_time > 0 else float('inf'),
+            "tick_ms_mean": (sum(sorted_ms) / len(sorted_ms)) if sorted_ms else 0.0,
+            "tick_ms_p95": sorted_ms[int(0.95 * (len(sorted_ms) - 1))] if sorted_ms else 0.0,
+            "tick_ms_max": sorted_ms[-1] if sorted_ms else 0.0,
+            "seeds": self.current_seed_count,
+            "enemies": len(self.enemies),
+            "particles_peak": PARTICLE_POOL.peak_live,
+        }
+
+
+def init_headless_display():
+    """Initialises pygame on SDL's dummy video/audio drivers (no window) so surfaces can be converted."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init()
+    if pygame.display.get_surface() is None:
+        pygame.display.set_mode((1, 1))
+
+
+def run_headless_level(level, num_ticks, seed=0, dt=1.0 / FPS, character=1, difficulty="Normal",
+                       shop_upgrades=None, player_upgrades=None, save_data=None, input_func=None, collision_broadphase=None, enemy_physics=None):
+    """Builds a level from a seeded RNG and runs it with no window as fast as possible."""
+    init_headless_display()
+    random.seed(seed) # Projectiles, wind and particles use the module RNG (as in replays)
+    if save_data is None: save_data = {"vault_upgrades": dict(DEFAULT_VAULT_UPGRADES)}
+    sim = LevelSimulation(level, 0, shop_upgrades if shop_upgrades is not None else {"speed": 0, "seed_enemy": 0, "enemy_slow": 0},
+                          player_upgrades if player_upgrades is not None else {"shield": 0}, INITIAL_CHECKPOINT_COUNT,
+                          -float('inf'), save_data, difficulty=difficulty, character=character,
+                          seed=seed, mixer_ok=False, collision_broadphase=collision_broadphase, enemy_physics=enemy_physics)
+    return sim.run_ticks(num_ticks, dt, input_func)
+# --- END OF FILE level_sim.py ---
@@ -1,4 +1,4 @@
-import pygame, os, time, random, math, json, sys, traceback
+import pygame, os, time, random, math, json, sys, traceback, sqlite3
 
 # --- Library Import with Detailed Checks ---
 MOVIEPY_AVAILABLE = False
@@ -70,13 +70,7 @@ print("--- Library Check Complete ---")
 from settings import *
 # --- Import game objects including new powerups and effects ---
 # <<< CHANGE: Import circle_collision here >>>
-from game_objects import (Player, Enemy, CollectibleSeed, FinishLine, ShooterEnemy,
-                          Projectile, Particle, MagnetPowerUp, FreezePowerUp,
-                          ShieldPowerUp, DoubleSeedPowerUp, AbilityEffect,
-                          create_shield_break_particles, David, EarthEnemy,
-                          FireEnemy, WaterEnemy, FrostEnemy, UnderworldEnemy,
-                          DesertEnemy, JungleEnemy, SpaceEnemy, CyberEnemy,
-                          MysticEnemy, SuperseedEnemy) # Updated import list
+from game_objects import PARTICLE_POOL, circle_collision # Level objects are built and updated in level_sim.py
 # <<< END CHANGE >>>
 
 # --- Import UI elements including new ones ---
@@ -87,158 +81,45 @@ from ui import (draw_game_border, draw_current_world_and_weather,
                 draw_plain_button, play_click_sound, show_game_over, draw_shield_aura,
                 draw_checkpoint_button, CHECKPOINT_RECT, draw_shop_button, SHOP_BUTTON_RECT,
                 show_ingame_shop_overlay,
-                draw_attributes, draw_ability_icon, play_freeze_sound, show_manwha_reader,
+                draw_attributes, draw_ability_icon, show_manwha_reader,
                 draw_help_button, HELP_BUTTON_RECT, show_controls_overlay,
-                draw_seed_doubler_timer, draw_screen_flash, get_scene_color, show_world_transition, # <<< Added get_scene_color, show_world_transition
-                CP_BUTTON_RIGHT_MARGIN, show_win_screen, CP_FONT) # <-- Import CP_BUTTON_RIGHT_MARGIN from ui, Import show_win_screen, Import CP_FONT
+                draw_screen_flash, get_scene_color, show_world_transition, # <<< Added get_scene_color, show_world_transition
+                CP_BUTTON_RIGHT_MARGIN, show_win_screen, CP_FONT, HudCompositor, draw_player_trail, show_preload_screen) # <-- Import CP_BUTTON_RIGHT_MARGIN from ui, Import show_win_screen, Import CP_FONT
 from minigame import minigame_1, minigame_2, minigame_3
+from level_sim import LevelSimulation, plan_level, get_scene_description
+from frame_timing import FixedTimestep, RenderInterpolator, get_frame_pacer, print_frame_pacing_report
+from frame_profiler import get_frame_profiler
+from dirty_rects import DirtyRectRenderer
+from audio import AUDIO, init_audio
+from save_writer import SAVE_WRITER
+from score_store import SCORE_STORE
+from achievements import ACHIEVEMENTS
+from level_pregen import LEVEL_PREGEN
+from replay import LiveInput, end_recording
+from assets import AssetPreloader, get_scaled_image, describe_disk_cache, WORLD_BACKGROUND_CACHE
 
 save_data = {} # Global dictionary for save data
-unlocked_achievements_this_session_main = set() # Track achievements across a full game run
 
 # --- save_save_data function MUST be defined before load_save_data uses it internally ---
 def save_save_data(data):
-    """Saves the provided data dictionary to save_data.json."""
+    """Queues the provided data dictionary for saving to save_data.json (written by the background save writer)."""
     try:
-        with open("save_data.json", "w") as f:
-            json.dump(data, f, indent=4)
-        # print("Save data written to file.") # Optional confirmation
-    except Exception as e:
+        SAVE_WRITER.mark_dirty(data) # --- CHANGE: Snapshot now, coalesced atomic write off the game thread ---
+    except (TypeError, ValueError) as e:
         print(f"Error saving data: {e}")
 # ---------------------------------------------------------------------------------------
 
-# <<< NOTE: circle_collision function remains here >>>
-# def circle_collision(sprite1, sprite2):
-#     # ... (function definition as it was in main.py) ...
-
-# main.py - FÜGE DIESEN CODE-BLOCK WIEDER EIN (z.B. nach den Imports)
-
-def circle_collision(sprite1, sprite2):
-    # Prioritize using pos_x/pos_y and radius if available
-    px = getattr(sprite1, 'pos_x', None)
-    py = getattr(sprite1, 'pos_y', None)
-    ox = getattr(sprite2, 'pos_x', None)
-    oy = getattr(sprite2, 'pos_y', None)
-    pr = getattr(sprite1, 'radius', None)
-    orad = getattr(sprite2, 'radius', None)
-
-    # If circle properties are available for both, use circle collision
-    if px is not None and py is not None and ox is not None and oy is not None and pr is not None and orad is not None:
-        dx = px - ox
-        dy = py - oy
-        distance_sq = dx*dx + dy*dy
-        radius_sum = pr + orad
-        # Add a small tolerance to prevent collision when exactly touching
-        return distance_sq < (radius_sum * radius_sum) * 0.98 # Check if distance is slightly less than sum of radii
-
-    # --- Fallback to Rect Collision if circle properties are missing ---
-    # Use rect centers as fallback positions if pos_x/y missing
-    rect1 = getattr(sprite1, 'rect', None)
-    rect2 = getattr(sprite2, 'rect', None)
-
-    if rect1 is None or rect2 is None:
-        # This case should ideally not happen if sprites are set up correctly
-        # print("Warning: Cannot perform collision check - sprites missing rect or circle properties.")
-        return False # Cannot collide if essential properties are missing
-
-    # Use rect-based collision if circle properties were incomplete
-    # print("Warning: Falling back to rect collision.") # Optional debug
-    return pygame.sprite.collide_rect(sprite1, sprite2)
-
-
-
-# --- CORRECTED: Definition moved back to main.py ---
-def collide_circle_precise_seed(player_sprite, seed_sprite):
-    """
-    Custom collision function for player-seed interaction.
-    Uses player's potentially augmented pickup radius.
-    """
-    # Player properties
-    px = getattr(player_sprite, 'pos_x', player_sprite.rect.centerx)
-    py = getattr(player_sprite, 'pos_y', player_sprite.rect.centery)
-    # Calculate player's effective radius including vault bonus
-    player_base_radius = getattr(player_sprite, 'radius', player_sprite.rect.width / 2 * 0.8) # Default scaling like Enemy
-    player_vault_bonus = getattr(player_sprite, 'vault_pickup_radius_bonus', 0)
-    player_effective_radius = player_base_radius + player_vault_bonus
-
-    # Seed properties
-    sx = getattr(seed_sprite, 'pos_x', seed_sprite.rect.centerx)
-    sy = getattr(seed_sprite, 'pos_y', seed_sprite.rect.centery)
-    # Seed radius might have its own scaling factor (using 1.1 from CollectibleSeed definition)
-    seed_radius = getattr(seed_sprite, 'radius', seed_sprite.rect.width / 2 * 1.1)
-
-    # Check for missing attributes (shouldn't happen with Player/Seed)
-    if px is None or py is None or sx is None or sy is None:
-        return False # Cannot perform circle collision
-
-    # Distance check
-    dx = px - sx
-    dy = py - sy
-    distance_sq = dx*dx + dy*dy
-    radius_sum = player_effective_radius + seed_radius
-    return distance_sq < (radius_sum * radius_sum)
-# --- END CORRECTION ---
-
-def load_scores():
-    try:
-        if not os.path.exists(SCORES_FILE):
-            return [] # Return empty list if file doesn't exist
-        scores = []
-        with open(SCORES_FILE, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line: continue # Skip empty lines
-                try:
-                    parts = line.split(',')
-                    if len(parts) == 4:
-                        name = parts[0]
-                        level = int(parts[1])
-                        total_time = float(parts[2])
-                        total_seeds = int(parts[3])
-                        scores.append((name, level, total_time, total_seeds))
-                    else:
-                        print(f"Skipping malformed score line: {line}")
-                except ValueError as e:
-                    print(f"Error parsing score line '{line}': {e}")
-                    continue # Skip lines with parsing errors
-        # Sort scores: primarily by level descending, secondarily by time ascending
-        scores.sort(key=lambda x: (-x[1], x[2]))
-        return scores
-    except Exception as e:
-        print(f"Error loading scores from {SCORES_FILE}: {e}")
-        return [] # Return empty list on error
-
-
-def save_score(player_name, level_reached, total_time, seeds_collected_run):
+def save_score(player_name, level_reached, total_time, seeds_collected_run, character=None, difficulty=None):
     if not player_name or not player_name.strip(): player_name = "Player" # Default name
     try:
-        scores = load_scores() # Load existing scores
-        scores.append((player_name, level_reached, total_time, seeds_collected_run)) # Add new score
-        scores.sort(key=lambda x: (-x[1], x[2])) # Re-sort
-        scores_to_save = scores[:MAX_SCORES_TO_KEEP] # Keep only the top scores
-        with open(SCORES_FILE, "w") as f:
-            for name, lvl, time_val, seeds in scores_to_save:
-                f.write(f"{name},{lvl},{time_val:.4f},{seeds}\n") # Write formatted scores
-    except Exception as e:
+        # --- CHANGE: Every run is kept in the indexed score store (no re-read/re-sort/rewrite of scores.txt) ---
+        rank = SCORE_STORE.rank_of(level_reached, total_time)
+        SCORE_STORE.add_score(player_name, level_reached, total_time, seeds_collected_run, character=character, difficulty=difficulty)
+        print(f"Score saved: {player_name} is #{rank} of {SCORE_STORE.count()} on the Seederboard")
+    except sqlite3.Error as e:
         print(f"Error saving score: {e}")
 
 
-def get_scene_description(level):
-    level = max(1, level) # Ensure level is at least 1
-    if level < 10: return "Earth World"
-    elif level < 21: return "Fire World"
-    elif level < 31: return "Water World"
-    elif level < 41: return "Frost World"
-    elif level < 51: return "Underworld" # Updated world name
-    elif level < 61: return "Desert World"
-    elif level < 71: return "Jungle World"
-    elif level < 81: return "Space World"
-    elif level < 91: return "Cyber World"
-    elif level < 95: return "Mystic World (Inverse Controls)"
-    else: return "Superseed World" # Renamed
-
-# Fallback removed as get_scene_color is now correctly imported from ui.py
-
 
 def load_save_data():
     """Loads game save data from save_data.json, initializing defaults if needed."""
@@ -267,7 +148,7 @@ def load_save_data():
         "highest_level_reached": 0, # New stat
         "total_time_played": 0.0, # New stat
     }
-    save_file_path = "save_data.json"
+    save_file_path = SAVE_DATA_FILE
 
     if os.path.exists(save_file_path):
         try:
@@ -359,8 +240,7 @@ def select_difficulty(screen):
     bg_difficulty = None
     if os.path.exists(CHOOSE_DIFFICULTY_BACKGROUND):
         try:
-            bg_difficulty = pygame.image.load(CHOOSE_DIFFICULTY_BACKGROUND).convert()
-            bg_difficulty = pygame.transform.scale(bg_difficulty, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_difficulty = get_scaled_image(CHOOSE_DIFFICULTY_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading difficulty select background: {e}")
 
@@ -375,7 +255,7 @@ def select_difficulty(screen):
     info_surf_hard = info_font.render(info_text_hard, True, WHITE)
     info_rect_hard = info_surf_hard.get_rect(midtop=(hard_button.centerx, hard_button.bottom + 10)) # Position below button
 
-    clock = pygame.time.Clock()
+    clock = get_frame_pacer("menu"); clock.restart()
 
     while True:
         mouse_pos = pygame.mouse.get_pos() # Get mouse pos for hover
@@ -408,237 +288,96 @@ def select_difficulty(screen):
         clock.tick(FPS)
 
 
+LAST_LEVEL_RENDER_STATS = {} # renderer.stats() of the most recent run_level, read by compare_render_modes
+
 # --- run_level: Updated to REMOVE camera/shake and adjust drawing ---
 def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades, checkpoint_count, last_ability_time,
-              difficulty="Normal", start_pos=None, start_angle=None, character=1, add_achievement_func=None, current_run_total_time=0.0, current_run_total_seeds=0):
-    """Runs a single level of the game."""
+              difficulty="Normal", start_pos=None, start_angle=None, character=1, achievements=None, current_run_total_time=0.0, current_run_total_seeds=0,
+              render_mode=None, level_seed=None, benchmark_frames=None, frame_input=None):
+    """Runs a single level of the game. render_mode overrides RENDER_MODE; level_seed + benchmark_frames give repeatable timing runs;
+    frame_input (replay.py) supplies frame times, keys and events (default: live input, recorded when REPLAY_RECORDING_ENABLED)."""
     global save_data
-    clock = pygame.time.Clock()
+    # --- NEW: Everything a replay needs to rebuild this level, captured before the simulation adjusts the upgrade dicts ---
+    frame_input = frame_input or LiveInput(record=False if benchmark_frames is not None else None)
+    replay_params = {"level": level, "current_seed_count": current_seed_count, "shop_upgrades": dict(shop_upgrades), "player_upgrades": dict(player_upgrades),
+                     "checkpoint_count": checkpoint_count, "last_ability_time": last_ability_time, "difficulty": difficulty,
+                     "start_pos": list(start_pos) if start_pos else None, "start_angle": start_angle, "character": character,
+                     "current_run_total_time": current_run_total_time, "current_run_total_seeds": current_run_total_seeds, "render_mode": render_mode or RENDER_MODE}
+    # --- END NEW ---
+    clock = get_frame_pacer("level"); clock.restart(); clock.reset_stats() # Jitter report covers this level only
     level_start_time = time.time()
     initial_seed_count_for_level = current_seed_count
     checkpoint_data = None
-    # --- FIX: Define shield break invincibility time ---
-    SHIELD_BREAK_INVINCIBILITY = 1.5  # Seconds of invincibility after shield breaks
-    # --- END FIX ---
-    # --- NEW: Flag to indicate if a shield break effect needs playing ---
-    perform_shield_break_effect = False
-    # --- END NEW ---
 
+    # --- NEW: Level state and per-frame update live in level_sim.LevelSimulation (also usable headless) ---
+    PARTICLE_POOL.reclaim_all() # Sparkles left over from the previous level/minigame go back to the pool
+    layout = None
+    if start_pos is None and level_seed is None: # --- NEW: Use the layout planned during the level-clear screen (level_pregen.py) ---
+        layout = LEVEL_PREGEN.take(level, shop_upgrades, difficulty)
+    if layout is None:
+        layout = plan_level(level, shop_upgrades, difficulty, start_pos, seed=level_seed if level_seed is not None else random.getrandbits(32))
+    sim = LevelSimulation(level, current_seed_count, shop_upgrades, player_upgrades, checkpoint_count, last_ability_time,
+                          save_data, difficulty=difficulty, start_pos=start_pos, start_angle=start_angle, character=character,
+                          achievements=achievements, level_start_time=level_start_time, mixer_ok=pygame.mixer.get_init(), layout=layout)
+    # --- NEW: Reseeds the module RNG and (when replaying) restores the recorded simulation clock ---
+    replay_params["vault_upgrades"] = dict(save_data["vault_upgrades"])
+    _, sim_start_time = frame_input.begin("level", f"Level {level}", sim.seed, level_start_time, replay_params)
+    sim.level_start_time = sim_start_time; sim.sim_time = sim_start_time
+    # --- END NEW ---
+    PARTICLE_POOL.reset_peak()
+    player = sim.player; finish_goal = sim.finish_goal
+    enemies = sim.enemies; shooter_group = sim.shooter_group; projectiles = sim.projectiles
+    seeds = sim.seeds; particles = sim.particles; powerups = sim.powerups; ability_effects = sim.ability_effects
+    world_name = sim.world_name; weather = sim.weather
+    weather_fx = sim.weather_fx
+    achievement_banners = sim.achievement_banners
+    # --- END NEW ---
 
-    # Player Spawn Position (Near Top)
-    player_start_x = start_pos[0] if start_pos else SCREEN_WIDTH // 2
-    player_start_y = start_pos[1] if start_pos else TRACK_TOP + 50
-    default_angle = 270
-    player_start_angle = start_angle if start_angle is not None else default_angle
 
-    player = Player(player_start_x, player_start_y, character=character)
-    # Player angle and rotation set correctly in Player._init_ based on start_angle
-    player.angle = player_start_angle # Set movement angle
-    player.visual_angle = player_start_angle # Sync visual angle
-    # --- FIX: Explicitly set last_ability_time loaded from checkpoint ---
-    player.last_ability = last_ability_time
-    # --- END FIX ---
+    bg_texture = WORLD_BACKGROUND_CACHE.get(world_name) # --- CHANGE: Shared scaled copy, usually warmed on the level-clear screen ---
+    # --- NEW: Full-flip or dirty-rect presentation (see dirty_rects.py) ---
+    renderer = DirtyRectRenderer(screen, bg_texture, get_scene_color(level), mode=render_mode or RENDER_MODE)
+    frames_drawn = 0
+    if benchmark_frames is not None: player.invincible_until = float('inf') # Timing runs must not end on a hit
+    # --- END NEW ---
 
-    if "vault_upgrades" in save_data and isinstance(save_data["vault_upgrades"], dict):
-        player.apply_vault_upgrades(save_data["vault_upgrades"])
-        if player_upgrades.get('shield', 0) <= 0: player_upgrades['shield'] = save_data["vault_upgrades"].get("starting_shield", 0)
-    else:
-        print("Warning: Vault upgrades missing/invalid in run_level.")
-        if "vault_upgrades" not in save_data: save_data["vault_upgrades"] = {}
-        defaults = {"node_speed_boost": 0, "extra_life": 0, "seed_multiplier": 0, "seed_radius": 0, "cooldown_reduction": 0, "starting_shield": 0, "enemy_slow_aura": 0, "blessing_superseed": 0}
-        for key, default_val in defaults.items(): save_data["vault_upgrades"].setdefault(key, default_val)
-        player.apply_vault_upgrades(save_data["vault_upgrades"])
-        if player_upgrades.get('shield', 0) <= 0: player_upgrades['shield'] = save_data["vault_upgrades"].get("starting_shield", 0)
-
-    player.upgrades = player_upgrades.copy()
-    # --- Ensure temp_shield_end_time is reset/initialized for the level ---
-    player.temp_shield_end_time = 0.0
-    player.invincible_until = 0.0 # Ensure invincibility is reset unless loaded from checkpoint (handled later?)
-    # --- End initialization ---
-
-
-    # Goal Position (Near Bottom)
-    # --- FIX: Adjust Finish Line Y position to be ON the bottom border ---
-    finish_line_height = 100 # Assuming FinishLine image is 100px tall
-    finish_goal = FinishLine(random.randint(TRACK_LEFT + 50, TRACK_RIGHT - 50), TRACK_BOTTOM - finish_line_height // 2) # Center on bottom border
-    # --- END FIX ---
 
-    enemies = pygame.sprite.Group()
-    shooter_group = pygame.sprite.Group()
-    projectiles = pygame.sprite.Group()
-    seeds = pygame.sprite.Group()
-    particles = pygame.sprite.Group()
-    powerups = pygame.sprite.Group()
-    ability_effects = pygame.sprite.Group()
-    player.ability_effects = ability_effects
-    player.particle_group_ref = particles
-
-    # Enemy Spawning
-    if level <= 15: base_count = 4 + (level - 1) * (6 / 14)
-    elif level <= 80: base_count = 10 + (level - 15) * (7 / 65)
-    else: base_count = 17 + (level - 80) * (3 / 19)
-    base_count = min(base_count, 20)
-    final_enemy_count = int(base_count) + shop_upgrades.get('seed_enemy', 0)
-    if difficulty == "Hard": final_enemy_count += 2; print(f"Hard difficulty: +2 enemies (Total: {final_enemy_count})")
-
-    world_name = get_scene_description(level)
-    world_key = world_name.replace(" (Inverse Controls)","").replace(" World","").strip()
-    enemy_class_name = world_key + "Enemy"
-    enemy_class = globals().get(enemy_class_name, Enemy)
-
-    world_enemy_image_map = {
-        "Earth": EARTH_ENEMY_IMAGE, "Fire": FIRE_ENEMY_IMAGE, "Water": WATER_ENEMY_IMAGE, "Frost": FROST_ENEMY_IMAGE,
-        "Underworld": UNDERWORLD_ENEMY_IMAGE, "Desert": DESERT_ENEMY_IMAGE, "Jungle": JUNGLE_ENEMY_IMAGE,
-        "Space": SPACE_ENEMY_IMAGE, "Cyber": CYBER_ENEMY_IMAGE, "Mystic": MYSTIC_ENEMY_IMAGE, "Superseed": SUPERSEED_ENEMY_IMAGE
-    }
-    enemy_image_path = world_enemy_image_map.get(world_key, DEBT_IMAGE)
-
-    enemy_positions = []
-    current_shop_speed_level = shop_upgrades.get('speed', 0)
-    for i in range(final_enemy_count):
-        base_arbitrary_speed = (1.0 + level * 0.08)
-        speed_difficulty_mult = 1.15 if difficulty == "Hard" else 1.0
-        effective_arbitrary_speed = base_arbitrary_speed * speed_difficulty_mult
-        if difficulty == "Hard": print(f"Hard difficulty: Enemy base speed unit: {effective_arbitrary_speed:.2f} (Multiplier: {speed_difficulty_mult})")
-
-        attempts = 0
-        while attempts < 100:
-            enemy_radius_est = ORIGINAL_ENEMY_BASE_SIZE * ENEMY_CUMULATIVE_SIZE_INCREASE / 2
-            ex = random.randint(int(TRACK_LEFT + enemy_radius_est + 10), int(TRACK_RIGHT - enemy_radius_est - 10))
-            ey = random.randint(int(TRACK_TOP + enemy_radius_est + 10), int(TRACK_BOTTOM - enemy_radius_est - 10))
-            valid = True
-            if math.hypot(ex - player_start_x, ey - player_start_y) < MIN_ENEMY_SPAWN_DIST_FROM_PLAYER: valid = False
-            if valid:
-                for pos in enemy_positions:
-                    if math.hypot(ex - pos[0], ey - pos[1]) < 40: valid = False; break
-            if valid and math.hypot(ex - finish_goal.rect.centerx, ey - finish_goal.rect.centery) < finish_goal.radius + 50: valid = False
-            if valid: enemy_positions.append((ex, ey)); break
-            attempts += 1
-        if attempts >= 100:
-             enemy_radius_est = ORIGINAL_ENEMY_BASE_SIZE * ENEMY_CUMULATIVE_SIZE_INCREASE / 2
-             ex = random.randint(int(TRACK_LEFT + enemy_radius_est + 10), int(TRACK_RIGHT - enemy_radius_est - 10))
-             ey = random.randint(int(TRACK_TOP + enemy_radius_est + 10), int(TRACK_BOTTOM - enemy_radius_est - 10))
-             print(f"Warning: Enemy spawn fallback Lvl {level}. Pos:({ex},{ey}).")
-             enemy_positions.append((ex, ey))
-        ex, ey = enemy_positions[-1]
-
-        if level >= 20:
-            if level < 70: david_chance = 0.1 + (level / 200)
-            else: david_chance = min(0.1 + (70 / 200) + (level - 70) / 500, 0.50)
-        else: david_chance = 0.0
-
-        if random.random() < david_chance: enemy = David(ex, ey, effective_arbitrary_speed, image_path=DAVID_IMAGE, shop_speed_level=current_shop_speed_level)
-        else: enemy = enemy_class(ex, ey, effective_arbitrary_speed, image_path=enemy_image_path, shop_speed_level=current_shop_speed_level)
-        enemies.add(enemy)
-
-    if level >= 15:
-        enemy_list = [e for e in enemies if hasattr(e, 'homing') and not isinstance(e, David)]
-        num_homing = min(len(enemy_list), 1 + level // 10)
-        if num_homing > 0 and enemy_list:
-            try: selected_homing = random.sample(enemy_list, num_homing); [setattr(e, 'homing', True) for e in selected_homing]
-            except ValueError as e: print(f"Warning: Error selecting homing enemies: {e}")
-
-    num_seeds = random.choices(range(2, 9), weights=[40, 25, 15, 10, 5, 4, 1], k=1)[0]
-    num_seeds += shop_upgrades.get('seed_enemy', 0) * 2
-    seed_radius_check = ORIGINAL_SEED_BASE_SIZE * SEED_SIZE_MULTIPLIER / 2
-    seed_positions = []
-    for _ in range(num_seeds):
-        attempts = 0
-        while attempts < 50:
-             sx = random.randint(int(TRACK_LEFT + seed_radius_check + 5), int(TRACK_RIGHT - seed_radius_check - 5))
-             sy = random.randint(int(TRACK_TOP + seed_radius_check + 5), int(TRACK_BOTTOM - seed_radius_check - 5))
-             valid = True
-             if math.hypot(sx - player_start_x, sy - player_start_y) < 100: valid = False
-             if valid and math.hypot(sx - finish_goal.rect.centerx, sy - finish_goal.rect.centery) < finish_goal.radius + 30: valid = False
-             if valid:
-                 for pos in seed_positions:
-                      if math.hypot(sx-pos[0], sy-pos[1]) < 30: valid=False; break
-             if valid: seeds.add(CollectibleSeed(sx, sy)); seed_positions.append((sx, sy)); break
-             attempts += 1
-
-    weather = "clear"
-    available_weather = ["clear", "rain", "wind", "snow"]
-    weather_weights = [5, 2, 2, 1]
-    if level >= 5: weather = random.choices(available_weather, weights=weather_weights, k=1)[0]
-
-    # Weather particle initialization
-    raindrops = []; snowflakes = []; wind_direction_persistent = None
-    if weather == "rain":
-        for _ in range(RAIN_DROP_COUNT): rx, ry = random.randint(TRACK_LEFT, TRACK_RIGHT), random.randint(TRACK_TOP, TRACK_BOTTOM); sp, length = random.randint(RAIN_SPEED_MIN * 60, RAIN_SPEED_MAX * 60), random.randint(RAIN_LENGTH_MIN, RAIN_LENGTH_MAX); raindrops.append([rx, ry, sp, length])
-    if weather == "snow":
-        for _ in range(SNOW_FLAKE_COUNT): sx, sy = random.randint(TRACK_LEFT, TRACK_RIGHT), random.randint(TRACK_TOP, TRACK_BOTTOM); sp, radius, drift = random.randint(SNOW_SPEED_MIN * 60, SNOW_SPEED_MAX * 60), random.randint(SNOW_RADIUS_MIN, SNOW_RADIUS_MAX), random.uniform(-0.5, 0.5) * 60; snowflakes.append([sx, sy, sp, radius, drift])
-    if weather == "wind": wind_direction_persistent = random.choice([-1, 1])
-
-    if level >= 10:
-        num_shooters = max(1, level // 10)
-        shooter_y_spacing = (TRACK_BOTTOM - TRACK_TOP - 200) / (num_shooters + 1) if num_shooters > 0 else 0
-        shooter_positions = []
-        for i in range(num_shooters):
-             attempts = 0
-             while attempts < 20:
-                  shooter_radius_est = ORIGINAL_SHOOTER_BASE_WIDTH * SHOOTER_SIZE_MULTIPLIER / 2
-                  sx = random.choice([TRACK_LEFT + shooter_radius_est + 10, TRACK_RIGHT - shooter_radius_est - 10]);
-                  sy = TRACK_TOP + 100 + (i + 1) * shooter_y_spacing;
-                  sy = max(TRACK_TOP + shooter_radius_est + 10, min(sy, TRACK_BOTTOM - shooter_radius_est - 10))
-                  valid = True
-                  for pos in shooter_positions:
-                      if math.hypot(sx-pos[0], sy-pos[1]) < 50: valid=False; break
-                  if valid: shooter_group.add(ShooterEnemy(sx, sy)); shooter_positions.append((sx,sy)); break
-                  attempts += 1
-
-    powerup_spawn_timer = 0.0
-    powerup_interval = random.uniform(4.0, 8.0)
-
-    bg_texture = None
-    world_bg_path = WORLD_BACKGROUNDS.get(world_name)
-    if world_bg_path and os.path.exists(world_bg_path):
-        try: bg_texture = pygame.image.load(world_bg_path).convert(); bg_texture = pygame.transform.scale(bg_texture, (SCREEN_WIDTH, SCREEN_HEIGHT))
-        except pygame.error as e: print(f"Error loading background {world_bg_path}: {e}")
-
-    achievement_banners = []
-    unlocked_achievements_this_session = set()
     checkpoint_saved_this_level = False
     checkpoint_feedback_time = 0.0
-    freeze_end_time = 0.0
-    magnet_active_until = 0.0
-    double_seed_end_time = 0.0
-    # temp_shield_end_time initialized in Player object
-    level_screen_flash_timer = 0.0 # Renamed from screen_flash_timer
-    level_screen_flash_color = WHITE # Renamed from screen_flash_color
-
-    if add_achievement_func:
-        planet_ach_name = world_key + " Seeded"
-        add_achievement_func(planet_ach_name, achievement_banners, unlocked_achievements_this_session)
-
-    if level == 91:
+
+
+    if level == 91 and not frame_input.replaying:
         warning = FONT_MD.render("Mystic World Incoming!", True, WHITE); sub = FONT_SM.render("Levels 91-94: Inverse Controls Active!", True, RED)
         screen.fill(BLACK); screen.blit(warning, warning.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40))); screen.blit(sub, sub.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 10))); pygame.display.flip(); pygame.time.wait(4000)
 
     # --- Main Level Loop ---
     running = True; paused = False; shop_is_open = False; help_is_open = False
-    level_outcome = None; inverse_controls = (world_name == "Mystic World (Inverse Controls)")
-    level_duration = 0.0; mixer_ok = pygame.mixer.get_init(); music_was_playing = False
+    level_outcome = None
+    level_duration = 0.0; mixer_ok = sim.mixer_ok; music_was_playing = False
+    # --- NEW: Fixed-rate simulation ticks, display runs at DISPLAY_FPS with interpolated positions ---
+    timestep = FixedTimestep(); interpolator = RenderInterpolator()
 
     # --- Pre-calculate UI element dimensions ---
     attr_width = CHECKPOINT_RECT.width + SHOP_BUTTON_RECT.width + CP_BUTTON_RIGHT_MARGIN
     attr_height = 80 # <<< Increased height to accommodate vault info
     world_weather_max_height = 80
-    timer_font = FONT_SM
-    max_timer_text = "Double Seeds: 0.0s"
-    timer_max_width = timer_font.size(max_timer_text)[0] + 20
-    timer_max_height = timer_font.get_height() + 10
+    hud = HudCompositor() # Cached HUD widgets for this level
+    profiler = get_frame_profiler("level"); profiler.reset(f"Level {level}"); sim.profiler = profiler # --- NEW: F3 overlay / F4 CSV ---
 
     while running:
-        dt = clock.tick_busy_loop(FPS) / 1000.0
+        dt = frame_input.tick(clock, DISPLAY_FPS) / 1000.0 # Frame time: drives ticks and purely visual effects
+        profiler.begin_frame()
+        ticks_this_frame = timestep.advance(dt)
         dt = min(dt, 0.05)
-        current_time_sec = time.time()
-        keys = pygame.key.get_pressed()
+        current_time_sec = sim.sim_time # Game clock (stands still while paused)
+        keys = frame_input.keys()
         mouse_pos = pygame.mouse.get_pos()
 
         can_use_checkpoint_now = checkpoint_count > 0 and not checkpoint_saved_this_level
 
         # --- Event Handling ---
-        for event in pygame.event.get():
+        for event in frame_input.events():
+            if profiler.handle_event(event): continue
             if event.type == pygame.QUIT: level_outcome = "exit"; running = False
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_p:
@@ -666,6 +405,7 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
                       checkpoint_count -= 1; checkpoint_feedback_time = time.time(); checkpoint_saved_this_level = True; print(f"Checkpoint saved Lvl {level} (via click). Uses left: {checkpoint_count}"); can_use_checkpoint_now = False
                  elif HELP_BUTTON_RECT.collidepoint(event.pos) and not shop_is_open:
                       play_click_sound(); help_is_open = True; music_was_playing = mixer_ok and pygame.mixer.music.get_busy(); (pygame.mixer.music.pause() if music_was_playing else None)
+        profiler.mark("events")
 
 
         # --- Pause State ---
@@ -685,205 +425,41 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
             screen.blit(player.image, player_draw_rect)
             # --- END FIX ---
             dim_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA); dim_surface.fill((0, 0, 0, 100)); screen.blit(dim_surface, (0, 0))
-            pause_result = pause_menu(screen)
+            pause_result = frame_input.value("pause", pause_menu, screen)
             if pause_result == "resume": paused = False; (pygame.mixer.music.unpause() if music_was_playing and mixer_ok else None)
             elif pause_result == "menu": level_outcome = "menu"; running = False
-            continue
+            timestep.reset(); renderer.invalidate(); continue
 
         # --- Help Overlay State ---
         if help_is_open:
-            show_controls_overlay(screen); help_is_open = False # Function now handles its own loop
+            frame_input.value("help", show_controls_overlay, screen); help_is_open = False # Function now handles its own loop
             (pygame.mixer.music.unpause() if music_was_playing and mixer_ok else None)
             pygame.event.clear(pygame.MOUSEBUTTONDOWN) # Clear clicks made while overlay was open
-            continue
+            timestep.reset(); renderer.invalidate(); continue
 
         # --- Shop State ---
         if shop_is_open:
-            shop_status, current_seed_count, checkpoint_count, shop_upgrades, player_upgrades = show_ingame_shop_overlay(screen, current_seed_count, level, shop_upgrades, player_upgrades, checkpoint_count)
+            shop_status, current_seed_count, checkpoint_count, shop_upgrades, player_upgrades = frame_input.value("shop", show_ingame_shop_overlay, screen, current_seed_count, level, shop_upgrades, player_upgrades, checkpoint_count)
             player.upgrades = player_upgrades
+            sim.current_seed_count = current_seed_count; sim.checkpoint_count = checkpoint_count
+            sim.shop_upgrades = shop_upgrades; sim.player_upgrades = player_upgrades
             if shop_status == "close":
                 shop_is_open = False; (pygame.mixer.music.unpause() if music_was_playing and mixer_ok else None)
-                current_shop_speed_level = shop_upgrades.get('speed', 0)
-                for enemy in enemies:
-                    base_speed_boost = 1.0 + (current_shop_speed_level * SHOP_SPEED_ENEMY_BOOST_FACTOR)
-                    enemy.speed_pps = enemy.base_speed_pps * ENEMY_SPEED_MULTIPLIER * base_speed_boost
-                    current_vel_magnitude = math.hypot(enemy.vel_x, enemy.vel_y)
-                    if current_vel_magnitude > 0.01:
-                        scale_factor = enemy.speed_pps / current_vel_magnitude
-                        enemy.vel_x *= scale_factor; enemy.vel_y *= scale_factor
-                    else:
-                         angle = random.uniform(0, 2 * math.pi)
-                         enemy.vel_x = enemy.speed_pps * math.cos(angle); enemy.vel_y = enemy.speed_pps * math.sin(angle)
-                print("Updated enemy speeds after shop close.")
+                sim.apply_shop_speed_level()
             elif shop_status == "exit": level_outcome = "exit"; running = False
-            pygame.display.flip(); continue
-
-        # --- Game Updates ---
-        player.update(keys, current_time_sec, weather, shop_upgrades, inverse_controls, wind_direction_persistent, player_ref=player, dt=dt)
-        finish_goal.update(dt=dt)
-
-        freeze_active = current_time_sec < freeze_end_time
-        magnet_active = current_time_sec < magnet_active_until
-        double_seed_active = current_time_sec < double_seed_end_time
-        # temp_shield_active check moved to collision logic
-
-        # --- FIX: Mesky slow logic ---
-        effective_speed_modifier_for_updates = 1.0
-        if freeze_active:
-             effective_speed_modifier_for_updates = 0.0 # Freeze overrides Mesky
-        elif player.character == 3 and player.ability_active:
-             effective_speed_modifier_for_updates = 0.5 # Mesky ability is 50% slow
-        # --- END FIX ---
-
-        shop_slow_factor = 1.0 - (shop_upgrades.get('enemy_slow', 0) * 0.05)
-        final_shop_mesky_modifier = effective_speed_modifier_for_updates * shop_slow_factor
-
-        aura_level = save_data["vault_upgrades"].get("enemy_slow_aura", 0)
-        aura_slow_factor = 1.0 - (0.07 * aura_level) if aura_level > 0 else 1.0
-        aura_radius_sq = (40 + aura_level * 10) ** 2 if aura_level > 0 else -1
-
-        all_enemies = enemies.sprites()
-        for i, enemy in enumerate(all_enemies):
-            final_modifier = final_shop_mesky_modifier
-            if aura_radius_sq > 0 and hasattr(enemy, 'pos_x') and hasattr(enemy, 'pos_y'):
-                 dx_aura, dy_aura = player.pos_x - enemy.pos_x, player.pos_y - enemy.pos_y
-                 if dx_aura*dx_aura + dy_aura*dy_aura <= aura_radius_sq: final_modifier *= aura_slow_factor
-            other_enemies_for_collision = all_enemies[i+1:]
-            player_arg_for_update = player if isinstance(enemy, David) or getattr(enemy, 'homing', False) else None
-            enemy.update(player_arg_for_update, speed_modifier=final_modifier, dt=dt, other_enemies=other_enemies_for_collision)
-
-        shooter_player_arg = player if not freeze_active else None
-        shooter_group.update(current_time_sec, projectiles, shooter_player_arg)
-        projectiles.update(dt=dt, speed_modifier=(0.0 if freeze_active else 1.0))
-        particles.update(dt=dt)
-        powerups.update(dt=dt)
-        ability_effects.update(dt, player) # Pass player ref to ability effect update
-
-        player_base_pickup_radius = player.radius + player.vault_pickup_radius_bonus
-        current_pickup_radius = player_base_pickup_radius
-        if magnet_active:
-            current_pickup_radius *= MAGNET_PICKUP_RADIUS_MULTIPLIER
-            magnet_pull_speed = 250; magnet_radius_sq = current_pickup_radius**2
-            for seed in seeds:
-                dx = player.pos_x - seed.pos_x
-                dy = player.pos_y - seed.pos_y
-                dist_sq = dx*dx + dy*dy
-                if dist_sq < magnet_radius_sq and dist_sq > (player.radius * 0.5)**2:
-                    dist = math.sqrt(dist_sq)
-                    pull_nx = dx / dist; pull_ny = dy / dist
-                    pull_vx = pull_nx * magnet_pull_speed * dt
-                    pull_vy = pull_ny * magnet_pull_speed * dt
-                    seed.pos_x += pull_vx; seed.pos_y += pull_vy
-        seeds.update() # Sync rect with pos
-
-        powerup_spawn_timer += dt
-        if powerup_spawn_timer >= powerup_interval:
-            powerup_spawn_timer -= powerup_interval
-            powerup_chance = POWERUP_CHANCE_BLESSING if save_data["vault_upgrades"].get("blessing_superseed", 0) >= 1 else POWERUP_CHANCE_BASE
-            if random.random() < powerup_chance:
-                 attempts = 0
-                 while attempts < 20:
-                      pu_radius_est = ORIGINAL_POWERUP_BASE_SIZE * POWERUP_CUMULATIVE_SIZE_INCREASE / 2
-                      fx = random.randint(int(TRACK_LEFT+pu_radius_est+10), int(TRACK_RIGHT-pu_radius_est-10));
-                      fy = random.randint(int(TRACK_TOP+pu_radius_est+10), int(TRACK_BOTTOM-pu_radius_est-10));
-                      if math.hypot(fx - player.pos_x, fy - player.pos_y) > 100:
-                           pu_types = list(POWERUP_WEIGHTS.keys()); pu_weights = list(POWERUP_WEIGHTS.values())
-                           pu_type = random.choices(pu_types, weights=pu_weights, k=1)[0]
-                           if pu_type == "freeze": powerups.add(FreezePowerUp(fx, fy))
-                           elif pu_type == "magnet": powerups.add(MagnetPowerUp(fx, fy))
-                           elif pu_type == "shield": powerups.add(ShieldPowerUp(fx, fy))
-                           elif pu_type == "double": powerups.add(DoubleSeedPowerUp(fx, fy))
-                           break
-                      attempts += 1
-            powerup_interval = random.uniform(4.0, 8.0)
-
-        # --- Shield / Collision Logic ---
-        is_invincible_now = current_time_sec < player.invincible_until
-        has_permanent_shield = player.upgrades.get("shield", 0) > 0
-        is_temp_shield_powerup_active = current_time_sec < player.temp_shield_end_time
-
-        # Check collisions only if not currently invincible
-        if not is_invincible_now:
-            # Check Enemy Collision
-            # --- FIX: Add radius check and use circle_collision ---
-            collided_enemy = pygame.sprite.spritecollideany(player, enemies, circle_collision)
-            # --- END FIX ---
-            if collided_enemy:
-                # --- Shield break/death logic remains the same ---
-                if is_temp_shield_powerup_active:
-                    print("Temp Shield Powerup BROKEN by Enemy")
-                    player.temp_shield_end_time = 0.0
-                    player.invincible_until = current_time_sec + SHIELD_BREAK_INVINCIBILITY
-                    perform_shield_break_effect = True
-                    level_screen_flash_timer = 0.1;
-                    level_screen_flash_color = BLUE
-                    is_invincible_now = True  # Update invincibility status immediately
-                elif has_permanent_shield:
-                    print("Permanent Shield BROKEN by Enemy")
-                    player.upgrades["shield"] = 0
-                    player.invincible_until = current_time_sec + SHIELD_BREAK_INVINCIBILITY
-                    perform_shield_break_effect = True
-                    level_screen_flash_timer = 0.1;
-                    level_screen_flash_color = BLUE
-                    is_invincible_now = True  # Update invincibility status immediately
-                else:
-                    print("Player hit enemy - NO SHIELD")
-                    level_outcome = "lose"
-                    running = False
-                    level_screen_flash_timer = 0.1;
-                    level_screen_flash_color = RED
-                    # Play dead sound immediately on death determination
-                    if os.path.exists(DEAD_SOUND) and mixer_ok:
-                        try:
-                            pygame.mixer.Sound(DEAD_SOUND).play()
-                        except pygame.error as e:
-                            print(f"Dead sound error on enemy collision: {e}")
-
-            # Check Projectile Collision (only if still running and not yet invincible from enemy hit)
-            if running and not is_invincible_now:
-                # --- FIX: Use circle_collision for Projectiles ---
-                collided_proj = pygame.sprite.spritecollideany(player, projectiles, circle_collision)
-                # --- END FIX ---
-                if collided_proj:
-                    collided_proj.kill()  # Remove projectile regardless of shield outcome
-                    # --- Shield break/death logic remains the same ---
-                    if is_temp_shield_powerup_active:
-                        print("Temp Shield Powerup BROKEN by Projectile")
-                        player.temp_shield_end_time = 0.0
-                        player.invincible_until = current_time_sec + SHIELD_BREAK_INVINCIBILITY
-                        perform_shield_break_effect = True
-                        level_screen_flash_timer = 0.1;
-                        level_screen_flash_color = BLUE
-                        is_invincible_now = True  # Update invincibility status immediately
-                    elif has_permanent_shield:
-                        print("Permanent Shield BROKEN by Projectile")
-                        player.upgrades["shield"] = 0
-                        player.invincible_until = current_time_sec + SHIELD_BREAK_INVINCIBILITY
-                        perform_shield_break_effect = True
-                        level_screen_flash_timer = 0.1;
-                        level_screen_flash_color = BLUE
-                        is_invincible_now = True  # Update invincibility status immediately
-                    else:
-                        print("Player hit projectile - NO SHIELD")
-                        level_outcome = "lose"
-                        running = False
-                        level_screen_flash_timer = 0.1;
-                        level_screen_flash_color = RED
-                        # Play dead sound immediately on death determination
-                        if os.path.exists(DEAD_SOUND) and mixer_ok:
-                            try:
-                                pygame.mixer.Sound(DEAD_SOUND).play()
-                            except pygame.error as e:
-                                print(f"Dead sound error on projectile collision: {e}")
-        # --- End Collision Check ---
-
-        # Trigger shield break visual/sound effect if the flag was set
-        if perform_shield_break_effect:
-            create_shield_break_particles(player.rect.center, particles)
-            if os.path.exists(BREAK_SHIELD_SOUND) and mixer_ok:
-                try: pygame.mixer.Sound(BREAK_SHIELD_SOUND).play()
-                except pygame.error as e: print(f"Shield break sound error: {e}")
-            perform_shield_break_effect = False # Reset flag
+            pygame.display.flip(); timestep.reset(); renderer.invalidate(); continue
+
+        # --- Game Updates (player, enemies, shooters, pickups, collisions, finish line) ---
+        for tick in range(ticks_this_frame):
+            if tick == ticks_this_frame - 1: # Remember positions before the final tick for interpolation
+                interpolator.capture(enemies, seeds, shooter_group, powerups, projectiles, particles, ability_effects, (player,))
+            step_outcome = sim.step(timestep.step_dt, keys)
+            if step_outcome is not None: level_outcome = step_outcome; break # Keep "exit" set by events otherwise
+        current_time_sec = sim.sim_time
+        alpha = timestep.alpha
+        current_seed_count = sim.current_seed_count
+        freeze_active = sim.freeze_active; freeze_end_time = sim.freeze_end_time
+        double_seed_active = sim.double_seed_active; double_seed_end_time = sim.double_seed_end_time
 
         # Handle game over logic immediately after potential collision outcome
         if level_outcome == "lose":
@@ -891,242 +467,156 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
                 print("Game Over.")
                 final_run_time = current_run_total_time + (time.time() - level_start_time)
                 final_run_seeds = current_run_total_seeds + (current_seed_count - initial_seed_count_for_level)
-                game_over_name = show_game_over(screen, level, final_run_time, final_run_seeds)
-                save_score(game_over_name, level, final_run_time, final_run_seeds);
+                game_over_name = frame_input.value("game_over", show_game_over, screen, level, final_run_time, final_run_seeds)
+                if not frame_input.replaying: save_score(game_over_name, level, final_run_time, final_run_seeds, character=character, difficulty=difficulty);
             running = False # Stop the level loop
             continue # Skip the rest of the loop for this frame
-
-        # Seed Collection
-        seeds_collided = pygame.sprite.spritecollide(player, seeds, True, collide_circle_precise_seed)
-        if seeds_collided:
-             vault_multiplier = 2 if save_data["vault_upgrades"].get("seed_multiplier", 0) >= 1 else 1
-             powerup_multiplier = 2 if double_seed_active else 1
-             final_multiplier = vault_multiplier * powerup_multiplier
-             seeds_gained = len(seeds_collided) * final_multiplier
-             current_seed_count += seeds_gained;
-             save_data["total_seeds_accumulated"] = save_data.get("total_seeds_accumulated", 0) + seeds_gained
-             for seed_sprite in seeds_collided:
-                  particle_count = 5 * powerup_multiplier
-                  for _ in range(particle_count): particles.add(Particle(seed_sprite.rect.center))
-             if os.path.exists(COLLECT_SOUND) and mixer_ok:
-                  try: pygame.mixer.Sound(COLLECT_SOUND).play()
-                  except pygame.error as e: print(f"Collect sound error: {e}")
-
-        # Powerup Collection
-        powerups_collided = pygame.sprite.spritecollide(player, powerups, True, circle_collision)
-        for pu in powerups_collided:
-            pu_type = getattr(pu, 'powerup_type', 'unknown')
-            if pu_type == "freeze": play_freeze_sound(); freeze_end_time = current_time_sec + FREEZE_DURATION
-            elif pu_type == "magnet":
-                if os.path.exists(MAGNET_SOUND) and mixer_ok:
-                    try: pygame.mixer.Sound(MAGNET_SOUND).play()
-                    except pygame.error as e: print(f"Magnet sound error: {e}")
-                magnet_active_until = current_time_sec + MAGNET_DURATION
-                save_data["total_magnets_collected"] = save_data.get("total_magnets_collected", 0) + 1
-                if add_achievement_func:
-                    total_magnets_ever = save_data["total_magnets_collected"]
-                    if total_magnets_ever >= 100: add_achievement_func(ACH_MAINNET_MAGNET, achievement_banners, unlocked_achievements_this_session)
-                    elif total_magnets_ever >= 75: add_achievement_func(ACH_SEED_SINGULARITY, achievement_banners, unlocked_achievements_this_session)
-                    elif total_magnets_ever >= 50: add_achievement_func(ACH_GRAVITY_WELL, achievement_banners, unlocked_achievements_this_session)
-                    elif total_magnets_ever >= 25: add_achievement_func(ACH_ATTRACTOR_NODE, achievement_banners, unlocked_achievements_this_session)
-            elif pu_type == "shield":
-                # Re-check shield status at the moment of pickup
-                has_permanent_shield_local = player.upgrades.get("shield", 0) > 0
-                is_temp_shield_powerup_active_local = current_time_sec < player.temp_shield_end_time
-                is_chosen_invincible_local = (player.character == 4 and player.ability_active) or (
-                            current_time_sec < player.invincible_until)
-
-                # Only activate if no other shield/invincibility is present
-                if not has_permanent_shield_local and not is_temp_shield_powerup_active_local and not is_chosen_invincible_local:
-                    player.temp_shield_end_time = current_time_sec + SHIELD_POWERUP_DURATION
-                    print(f"Temporary shield powerup activated until {player.temp_shield_end_time:.1f}")
-                    if os.path.exists(POWERUP_SHIELD_SOUND) and mixer_ok:
-                        try:
-                            pygame.mixer.Sound(POWERUP_SHIELD_SOUND).play()
-                        except pygame.error as e:
-                            print(f"Shield powerup sound error: {e}")
-                else:
-                    print("Shield powerup collected, but another shield/invincibility is already active.")
-            elif pu_type == "double":
-                 double_seed_end_time = current_time_sec + DOUBLE_SEED_DURATION
-                 print(f"Double seeds active until {double_seed_end_time:.1f}")
-                 if os.path.exists(POWERUP_DOUBLE_SOUND) and mixer_ok:
-                     try: pygame.mixer.Sound(POWERUP_DOUBLE_SOUND).play()
-                     except pygame.error as e: print(f"Double seed powerup sound error: {e}")
-
-        # Finish Line Collision
-        if running and circle_collision(player, finish_goal):
-             level_outcome = "win"; running = False
-             level_time_taken = time.time() - level_start_time
-             if add_achievement_func:
-                 add_achievement_func(ACH_SPROUTED, achievement_banners, unlocked_achievements_this_session)
-                 if level_time_taken < 2.0: add_achievement_func(ACH_WARP_SPEED_ENGAGED, achievement_banners, unlocked_achievements_this_session)
-                 if inverse_controls: add_achievement_func(ACH_NAVIGATING_THE_NOISE, achievement_banners, unlocked_achievements_this_session)
-                 if current_seed_count >= 100: add_achievement_func(ACH_DIAMOND_HANDS, achievement_banners, unlocked_achievements_this_session)
-                 if level >= 20 and player.last_ability < level_start_time: add_achievement_func(ACH_PACIFIST_RUN, achievement_banners, unlocked_achievements_this_session)
+        if level_outcome == "win": running = False
 
 
         render_offset_x = 0 # No offset
         render_offset_y = 0 # No offset
 
         # --- Drawing (Static View) ---
-        if bg_texture: screen.blit(bg_texture, (0, 0)) # Draw background at 0,0
-        else: screen.fill(get_scene_color(level)) # Use ui.get_scene_color
+        # --- CHANGE: Background and presentation go through the renderer; every drawn rect is recorded for "dirty" mode ---
+        renderer.begin() # Background at 0,0 (full mode) or only where last frame drew (dirty mode)
+        add_rect = renderer.add
 
         # --- Draw game world elements (Order Matters!) ---
-        for s in seeds: screen.blit(s.image, s.rect)
-        for e in enemies: screen.blit(e.image, e.rect)
-        for sh in shooter_group: screen.blit(sh.image, sh.rect)
-        for pu in powerups: screen.blit(pu.image, pu.rect)
+        for s in seeds: add_rect(screen.blit(s.image, interpolator.rect(s, alpha)))
+        for e in enemies: add_rect(screen.blit(e.image, interpolator.rect(e, alpha)))
+        for sh in shooter_group: add_rect(screen.blit(sh.image, sh.rect))
+        for pu in powerups: add_rect(screen.blit(pu.image, pu.rect))
         for proj in projectiles:
-             screen.blit(proj.image, proj.rect) # Draw projectile
+             proj_rect = interpolator.rect(proj, alpha)
+             add_rect(screen.blit(proj.image, proj_rect)) # Draw projectile
              # Draw projectile trail (absolute coords)
              trail_length_proj = 15
              if abs(proj.vel_x) > 0.1 or abs(proj.vel_y) > 0.1:
                 vel_mag_proj = math.hypot(proj.vel_x, proj.vel_y)
                 if vel_mag_proj > 0:
-                    start_x_p = proj.rect.centerx - proj.vel_x * (trail_length_proj / vel_mag_proj)
-                    start_y_p = proj.rect.centery - proj.vel_y * (trail_length_proj / vel_mag_proj)
-                    try: pygame.draw.line(screen, proj.color, (int(start_x_p), int(start_y_p)), proj.rect.center, 2)
+                    start_x_p = proj_rect.centerx - proj.vel_x * (trail_length_proj / vel_mag_proj)
+                    start_y_p = proj_rect.centery - proj.vel_y * (trail_length_proj / vel_mag_proj)
+                    try: add_rect(pygame.draw.line(screen, proj.color, (int(start_x_p), int(start_y_p)), proj_rect.center, 2))
                     except TypeError: pass
-        for p in particles: screen.blit(p.image, p.rect)
+        for p in particles: add_rect(screen.blit(p.image, interpolator.rect(p, alpha)))
         # Player Trail Drawing (Absolute coords)
-        player_trail_color = PLAYER_TRAIL_COLORS.get(player.character, TRAIL_COLOR_DEFAULT)
-        trail_alpha_mult = player.trail_intensity_multiplier
-        for i, pos in enumerate(player.trail):
-            alpha = int(255 * (i / player.trail_length) * 0.5 * trail_alpha_mult)
-            alpha = max(0, min(255, alpha))
-            trail_surf = pygame.Surface((player.trail_segment_size, player.trail_segment_size), pygame.SRCALPHA)
-            draw_color = (*player_trail_color, alpha)
-            pygame.draw.circle(trail_surf, draw_color, (player.trail_segment_size // 2, player.trail_segment_size // 2), player.trail_segment_size // 2)
-            draw_pos_x = pos[0] - player.trail_segment_size // 2
-            draw_pos_y = pos[1] - player.trail_segment_size // 2
-            screen.blit(trail_surf, (draw_pos_x, draw_pos_y))
-
-        # Draw player (Absolute coords using get_draw_rect)
-        player_draw_rect = player.get_draw_rect()
-        screen.blit(player.image, player_draw_rect)
+        renderer.add_all(draw_player_trail(screen, player))
+
+        # Draw player (Absolute coords using get_draw_rect, blended between ticks)
+        player_draw_rect = interpolator.rect(player, alpha, player.get_draw_rect())
+        add_rect(screen.blit(player.image, player_draw_rect))
 
         # Draw Auras (Absolute coords)
         # Player position doesn't need temporary adjustment anymore
         draw_shield_aura(screen, player, current_time_sec) # This handles Chosen/Temp/Mesky/Permanent shield visuals
+        aura_extent = int(max(player.radius * 1.5 + 20, max(player.size) / 2 + 4)) # Largest aura draw_shield_aura can draw
+        add_rect(pygame.Rect(int(player.pos_x) - aura_extent, int(player.pos_y) - aura_extent, aura_extent * 2, aura_extent * 2))
         aura_level_v = save_data["vault_upgrades"].get("enemy_slow_aura", 0)
         if aura_level_v > 0:
              aura_radius_v = 40 + aura_level_v * 10; aura_alpha_v = 60 + aura_level_v * 20
              aura_surf_v = pygame.Surface((aura_radius_v*2, aura_radius_v*2), pygame.SRCALPHA)
              pygame.draw.circle(aura_surf_v, (0, 150, 255, aura_alpha_v), (aura_radius_v, aura_radius_v), aura_radius_v, 2)
-             screen.blit(aura_surf_v, (int(player.pos_x - aura_radius_v), int(player.pos_y - aura_radius_v)))
+             add_rect(screen.blit(aura_surf_v, (int(player.pos_x - aura_radius_v), int(player.pos_y - aura_radius_v))))
 
         # Draw Ability Effects (Absolute coords)
-        for effect in ability_effects: screen.blit(effect.image, effect.rect)
+        for effect in ability_effects: add_rect(screen.blit(effect.image, interpolator.rect(effect, alpha)))
 
         # Weather Effects Rendering (Absolute coords)
-        if weather == "rain":
-            for drop in raindrops:
-                drop[1] += drop[2] * dt
-                if drop[1] > TRACK_BOTTOM: drop[1] = TRACK_TOP - random.randint(5, 20); drop[0] = random.randint(TRACK_LEFT, TRACK_RIGHT)
-                pygame.draw.line(screen, RAIN_COLOR, (drop[0], drop[1]), (drop[0], drop[1] + drop[3]), 1)
-        elif weather == "snow":
-            for flake in snowflakes:
-                flake[0] += flake[4] * dt; flake[1] += flake[2] * dt
-                if flake[1] > TRACK_BOTTOM: flake[1] = TRACK_TOP - random.randint(5, 10); flake[0] = random.randint(TRACK_LEFT, TRACK_RIGHT)
-                pygame.draw.circle(screen, SNOW_COLOR, (int(flake[0]), int(flake[1])), flake[3])
-        elif weather == "wind":
-            for _ in range(WIND_STREAK_COUNT):
-                start_x = random.randint(TRACK_LEFT, TRACK_RIGHT); start_y = random.randint(TRACK_TOP, TRACK_BOTTOM)
-                wind_mag = WIND_STREAK_LENGTH * wind_direction_persistent
-                end_x = start_x + wind_mag; end_y = start_y
-                pygame.draw.line(screen, WIND_COLOR, (start_x, start_y), (end_x, end_y), 1)
+        # --- CHANGE: One vectorized step + one blits() batch (weather.py) instead of a draw call per particle ---
+        weather_fx.step(dt)
+        weather_rects = weather_fx.draw(screen, renderer.mode == "dirty")
+        if weather_rects: renderer.add_all(weather_rects)
 
         # --- FIX: Draw Finish Line AFTER game objects but BEFORE border/UI ---
-        screen.blit(finish_goal.image, finish_goal.rect)
+        add_rect(screen.blit(finish_goal.image, finish_goal.rect))
         # --- END FIX ---
 
         # --- FIX: Draw screen flash using renamed variable ---
-        if level_screen_flash_timer > 0:
-            level_screen_flash_timer -= dt
-            flash_alpha = int(180 * max(0, level_screen_flash_timer / 0.1)) # Base flash duration 0.1s
+        if sim.level_screen_flash_timer > 0:
+            sim.level_screen_flash_timer -= dt
+            flash_alpha = int(180 * max(0, sim.level_screen_flash_timer / 0.1)) # Base flash duration 0.1s
             flash_surf = pygame.Surface(screen.get_size(), pygame.SRCALPHA);
-            flash_surf.fill((*level_screen_flash_color[:3], flash_alpha))
-            screen.blit(flash_surf, (0,0))
+            flash_surf.fill((*sim.level_screen_flash_color[:3], flash_alpha))
+            add_rect(screen.blit(flash_surf, (0,0)))
         # --- END FIX ---
+        profiler.mark("world_draw")
 
         # --- UI Elements (Draw without shake offset) ---
         # --- FIX: Draw border AFTER finish line ---
         draw_game_border(screen) # Border drawn directly
         # --- END FIX ---
 
+        # --- CHANGE: HUD widgets come from the compositor and are only re-rendered when their inputs change ---
+        hud.begin()
         # Level/Seed text
-        level_text = LEVEL_TEXT_FONT.render(f"Level {level} | Seeds: {current_seed_count}", True, WHITE)
-        screen.blit(level_text, (TRACK_LEFT + 10, TRACK_TOP + 10))
+        level_text = hud.get("level_text", current_seed_count, lambda: LEVEL_TEXT_FONT.render(f"Level {level} | Seeds: {current_seed_count}", True, WHITE))
+        add_rect(screen.blit(level_text, (TRACK_LEFT + 10, TRACK_TOP + 10)))
 
         # World/Weather info
-        world_weather_surf = pygame.Surface((400, world_weather_max_height), pygame.SRCALPHA)
-        world_weather_surf.fill((0,0,0,0))
-        drawn_height = draw_current_world_and_weather(world_weather_surf, world_name, weather)
+        world_weather_surf, drawn_height = hud.widget("world_weather", (world_name, weather), (400, world_weather_max_height),
+                                                      draw_current_world_and_weather, world_name, weather)
         base_world_weather_pos = (TRACK_LEFT + 10, TRACK_TOP + LEVEL_TEXT_FONT.get_height() + 15)
-        screen.blit(world_weather_surf, base_world_weather_pos, (0, 0, 400, drawn_height))
+        add_rect(screen.blit(world_weather_surf, base_world_weather_pos, (0, 0, 400, drawn_height)))
         weather_bottom_y_base = base_world_weather_pos[1] + drawn_height
 
         # Double Seed Timer
         if double_seed_active:
              time_left_double = max(0, double_seed_end_time - current_time_sec)
-             timer_surf = pygame.Surface((timer_max_width, timer_max_height), pygame.SRCALPHA)
-             timer_surf.fill((0,0,0,0))
-             draw_seed_doubler_timer(timer_surf, time_left_double) # Call the draw function
              timer_y_base = weather_bottom_y_base + 5
              base_timer_pos = (TRACK_LEFT + 10, timer_y_base)
-             screen.blit(timer_surf, base_timer_pos)
+             add_rect(hud.seed_doubler_timer(screen, base_timer_pos, time_left_double))
 
         # Ability Icon
-        draw_ability_icon(screen, player, current_time_sec)
+        add_rect(draw_ability_icon(screen, player, current_time_sec))
 
         # Attributes
         attr_rect_base = pygame.Rect(CHECKPOINT_RECT.left, HELP_BUTTON_RECT.bottom + 10, attr_width, attr_height)
-        attr_surf = pygame.Surface(attr_rect_base.size, pygame.SRCALPHA)
-        draw_attributes(attr_surf, shop_upgrades, player_upgrades, save_data) # <<< Pass save_data
-        screen.blit(attr_surf, attr_rect_base.topleft) # Blit at base position
+        vault_upgrades_hud = save_data["vault_upgrades"]
+        attr_key = (tuple(shop_upgrades.items()), tuple(player_upgrades.items()), tuple(vault_upgrades_hud.items()))
+        attr_surf, _ = hud.widget("attributes", attr_key, attr_rect_base.size, draw_attributes, shop_upgrades, player_upgrades, save_data) # <<< Pass save_data
+        add_rect(screen.blit(attr_surf, attr_rect_base.topleft)) # Blit at base position
 
         # Buttons
-        cp_surf = pygame.Surface(CHECKPOINT_RECT.size, pygame.SRCALPHA)
-        cp_surf.fill((0,0,0,0))
-        draw_checkpoint_button(cp_surf, checkpoint_count, can_use_checkpoint_now, checkpoint_feedback_time, save_data)
-        screen.blit(cp_surf, CHECKPOINT_RECT.topleft) # Blit at base position
+        cp_key = (checkpoint_count, can_use_checkpoint_now, vault_upgrades_hud.get("extra_life", 0))
+        cp_surf, _ = hud.widget("checkpoint_button", cp_key, CHECKPOINT_RECT.size, draw_checkpoint_button,
+                                checkpoint_count, can_use_checkpoint_now, checkpoint_feedback_time, save_data)
+        add_rect(screen.blit(cp_surf, CHECKPOINT_RECT.topleft)) # Blit at base position
         # Draw checkpoint feedback text separately
         if checkpoint_feedback_time and time.time() - checkpoint_feedback_time < 1.0:
-            fb_cp_surf = CP_FONT.render("Saved!", True, GREEN)
+            fb_cp_surf = hud.get("checkpoint_saved", None, lambda: CP_FONT.render("Saved!", True, GREEN))
             fb_cp_rect_base = fb_cp_surf.get_rect(midtop=(CHECKPOINT_RECT.centerx, CHECKPOINT_RECT.bottom + 5))
-            screen.blit(fb_cp_surf, fb_cp_rect_base)
+            add_rect(screen.blit(fb_cp_surf, fb_cp_rect_base))
         elif can_use_checkpoint_now:
-             press_c_font_cp = FONT_TINY
-             press_c_surf_cp = press_c_font_cp.render("(Press C)", True, WHITE)
-             press_c_rect_base_cp = press_c_surf_cp.get_rect(midtop=(CHECKPOINT_RECT.centerx, CHECKPOINT_RECT.bottom + 3))
-             press_c_bg_rect_cp = press_c_rect_base_cp.inflate(6, 2)
-             press_c_bg_surf_cp = pygame.Surface(press_c_bg_rect_cp.size, pygame.SRCALPHA)
-             press_c_bg_surf_cp.fill((0, 0, 0, 100))
-             screen.blit(press_c_bg_surf_cp, press_c_bg_rect_cp.topleft)
-             screen.blit(press_c_surf_cp, press_c_rect_base_cp)
-
-        shop_surf = pygame.Surface(SHOP_BUTTON_RECT.size, pygame.SRCALPHA)
-        shop_surf.fill((0,0,0,0))
-        draw_shop_button(shop_surf)
-        screen.blit(shop_surf, SHOP_BUTTON_RECT.topleft) # Blit at base position
-
-        help_surf = pygame.Surface(HELP_BUTTON_RECT.size, pygame.SRCALPHA)
-        help_surf.fill((0,0,0,0))
-        draw_help_button(help_surf)
-        screen.blit(help_surf, HELP_BUTTON_RECT.topleft) # Blit at base position
+             def render_press_c():
+                 press_c_surf_cp = FONT_TINY.render("(Press C)", True, WHITE)
+                 press_c_rect_base_cp = press_c_surf_cp.get_rect(midtop=(CHECKPOINT_RECT.centerx, CHECKPOINT_RECT.bottom + 3))
+                 press_c_bg_rect_cp = press_c_rect_base_cp.inflate(6, 2)
+                 press_c_bg_surf_cp = pygame.Surface(press_c_bg_rect_cp.size, pygame.SRCALPHA)
+                 press_c_bg_surf_cp.fill((0, 0, 0, 100))
+                 return press_c_surf_cp, press_c_rect_base_cp, press_c_bg_surf_cp, press_c_bg_rect_cp
+             press_c_surf_cp, press_c_rect_base_cp, press_c_bg_surf_cp, press_c_bg_rect_cp = hud.get("press_c", None, render_press_c)
+             add_rect(screen.blit(press_c_bg_surf_cp, press_c_bg_rect_cp.topleft))
+             add_rect(screen.blit(press_c_surf_cp, press_c_rect_base_cp))
+
+        shop_surf, _ = hud.widget("shop_button", None, SHOP_BUTTON_RECT.size, draw_shop_button)
+        add_rect(screen.blit(shop_surf, SHOP_BUTTON_RECT.topleft)) # Blit at base position
+
+        help_surf, _ = hud.widget("help_button", None, HELP_BUTTON_RECT.size, draw_help_button)
+        add_rect(screen.blit(help_surf, HELP_BUTTON_RECT.topleft)) # Blit at base position
 
         # Pause Text
-        pause_font = FONT_IMPACT_XSM; pause_info_surf = pause_font.render("P: Pause | K: Help", True, WHITE); # Added Help key hint
+        pause_info_surf = hud.get("pause_info", None, lambda: FONT_IMPACT_XSM.render("P: Pause | K: Help", True, WHITE)) # Added Help key hint
         pause_info_rect_base = pause_info_surf.get_rect(centerx=SCREEN_WIDTH // 2, bottom=SCREEN_HEIGHT - 10)
-        screen.blit(pause_info_surf, pause_info_rect_base)
+        add_rect(screen.blit(pause_info_surf, pause_info_rect_base))
 
         # Freeze Timer
         if freeze_active:
-             freeze_timer_text = FONT_MD.render(f"Freeze: {freeze_end_time - current_time_sec:.1f}s", True, CYAN)
+             freeze_text = f"Freeze: {freeze_end_time - current_time_sec:.1f}s"
+             freeze_timer_text = hud.get("freeze_timer", freeze_text, lambda: FONT_MD.render(freeze_text, True, CYAN))
              freeze_rect_base = freeze_timer_text.get_rect(centerx=SCREEN_WIDTH // 2, top=60);
-             screen.blit(freeze_timer_text, freeze_rect_base)
+             add_rect(screen.blit(freeze_timer_text, freeze_rect_base))
+        # --- END CHANGE ---
 
         # --- FIX: Achievement Banner Drawing Logic ---
         active_banners = []
@@ -1136,7 +626,7 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
         banner_draw_count = 0
 
         for i, banner in enumerate(achievement_banners):
-            elapsed = current_time_sec - banner["time"]
+            elapsed = time.time() - banner["time"] # Banners are stamped with wall time
             if elapsed < ACHIEVEMENT_BANNER_DURATION:
                 active_banners.append(banner) # Keep banner if still active
                 if banner_draw_count < max_banners_at_once:
@@ -1165,24 +655,36 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
                              alpha = int(255 * (1 - (elapsed - (ACHIEVEMENT_BANNER_DURATION - fade_time)) / fade_time))
                          alpha = max(0, min(255, alpha))
 
-                         banner_surf = FONT_MD.render(banner["text"], True, banner["tier_color"])
+                         # Text and backing are rendered once per banner; fading only changes their surface alpha
+                         if "hud_surfs" not in banner:
+                             banner_text_surf = FONT_MD.render(banner["text"], True, banner["tier_color"])
+                             banner["hud_surfs"] = (banner_text_surf, pygame.Surface(banner_text_surf.get_rect().inflate(20, 10).size))
+                         banner_surf, bg_surf = banner["hud_surfs"]
                          banner_surf.set_alpha(alpha) # Apply fade alpha
                          banner_rect = banner_surf.get_rect(centerx=final_banner_x_base, top=int(final_banner_y_base))
 
                          bg_rect = banner_rect.inflate(20, 10);
-                         bg_surf = pygame.Surface(bg_rect.size, pygame.SRCALPHA);
-                         bg_surf.fill((0, 0, 0, int(180 * (alpha / 255)))) # Scale bg alpha
-                         screen.blit(bg_surf, bg_rect.topleft);
-                         screen.blit(banner_surf, banner_rect)
+                         bg_surf.set_alpha(int(180 * (alpha / 255))) # Scale bg alpha
+                         add_rect(screen.blit(bg_surf, bg_rect.topleft));
+                         add_rect(screen.blit(banner_surf, banner_rect))
                          banner_draw_count += 1
             # else: Banner has expired, don't add to active_banners
 
-        achievement_banners = active_banners # Update list with only active banners
+        achievement_banners[:] = active_banners # Update list in place (shared with sim) with only active banners
         # --- END FIX ---
+        hud.end()
+        add_rect(profiler.draw(screen))
+        profiler.mark("hud_draw")
         # --- END UI Elements ---
 
         pygame.mouse.set_visible(True)
-        pygame.display.flip()
+        renderer.present() # display.flip() (full mode) or display.update(changed rects) (dirty mode)
+        # --- END CHANGE ---
+        profiler.mark("flip")
+        profiler.end_frame({"enemies": len(enemies), "shooters": len(shooter_group), "projectiles": len(projectiles), "seeds": len(seeds),
+                            "powerups": len(powerups), "particles": len(particles), "weather": len(weather_fx)})
+        frames_drawn += 1
+        if benchmark_frames is not None and frames_drawn >= benchmark_frames: level_outcome = "exit"; running = False
 
 
     # --- Level End ---
@@ -1194,11 +696,19 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
 
     save_save_data(save_data)
     print(f"Level {level} ended: {level_outcome}, Duration: {level_duration:.2f}s, Seeds collected: {seeds_collected_this_level}")
+    LAST_LEVEL_RENDER_STATS.clear(); LAST_LEVEL_RENDER_STATS.update(renderer.stats())
+    if DIAGNOSTIC_REPORTS:
+        print(clock.describe()); print(renderer.describe()); print(WORLD_BACKGROUND_CACHE.describe()); print(hud.describe()); print(PARTICLE_POOL.describe()); print(AUDIO.describe())
+        print(profiler.describe())
+    sim.profiler = None
+    if PROFILER_AUTO_EXPORT: profiler.export_csv()
+    frame_input.end(level_outcome, {"seeds": current_seed_count, "checkpoints": checkpoint_count, "ticks": sim.ticks,
+                                    "player": [round(player.pos_x, 3), round(player.pos_y, 3)]}) # --- NEW: Writes (or verifies) the replay ---
 
     minigame_occurred = False
     # --- FIX: Handle minigame results and death ---
     # <<< CHANGE: Minigame check moved inside the main level loop processing >>>
-    if level_outcome == "win" and level < MAX_LEVEL and random.random() < 0.05:
+    if level_outcome == "win" and level < MAX_LEVEL and not frame_input.replaying and random.random() < 0.05:
          minigame_occurred = True
          minigames = [ ("Seed Harvest Frenzy", minigame_1, "Seeds Collected"), ("David’s Revenge", minigame_2, "1 SUPR"), ("Inverse Gauntlet", minigame_3, "2 SUPR") ]
          minigame_name, minigame_func, rewards = random.choice(minigames)
@@ -1210,13 +720,15 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
          else:
              minigame_result = minigame_func(screen, selected_character=character, collision_func=circle_collision)
          # <<< END CHANGE >>>
+         end_recording(minigame_result) # --- NEW: Minigames return from many places, so the replay is closed here ---
 
          if isinstance(minigame_result, tuple): # Seed Harvest (minigame_1)
              success, extra_seeds = minigame_result
              if success is True:
                  current_seed_count += extra_seeds
                  save_data["total_seeds_accumulated"] = save_data.get("total_seeds_accumulated", 0) + extra_seeds
-                 if add_achievement_func: add_achievement_func(ACH_SEED_HARVEST_VICTOR, None, unlocked_achievements_this_session_main)
+                 if achievements:
+                     achievements.notify("minigame_won", minigame_name); achievements.notify("total_seeds_accumulated", save_data["total_seeds_accumulated"])
                  save_save_data(save_data)
              elif success == "menu": level_outcome = "menu" # Quit to main menu
              # <<< CHANGE: Handle False return (loss) - No specific action needed, just print >>>
@@ -1225,14 +737,12 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
 
          elif isinstance(minigame_result, bool): # David's Revenge (minigame_2) or Inverse Gauntlet (minigame_3)
              if minigame_result is True: # Player won the minigame
-                 ach_name = ""; supr_reward = 0
-                 if minigame_name == "David’s Revenge":
-                     supr_reward = 1; ach_name = ACH_DAVID_REVENGE_VICTOR
-                 elif minigame_name == "Inverse Gauntlet":
-                     supr_reward = 2; ach_name = ACH_INVERSE_GAUNTLET_VICTOR
+                 supr_reward = 0
+                 if minigame_name == "David’s Revenge": supr_reward = 1
+                 elif minigame_name == "Inverse Gauntlet": supr_reward = 2
                  if supr_reward > 0:
                      save_data["supercollateral_coins"] = save_data.get("supercollateral_coins", 0) + supr_reward
-                     if ach_name and add_achievement_func: add_achievement_func(ach_name, None, unlocked_achievements_this_session_main)
+                     if achievements: achievements.notify("minigame_won", minigame_name)
                      save_save_data(save_data)
              else: # Player lost the minigame (minigame_result is False)
                  print(f"{minigame_name} failed (player lost).")
@@ -1253,6 +763,23 @@ def run_level(screen, level, current_seed_count, shop_upgrades, player_upgrades,
     # --- END FIX ---
 
 
+# --- NEW: Same level, same seed, both presentation modes ---
+def compare_render_modes(screen, level=1, seed=1234, frames=600, character=1):
+    """Plays `frames` frames of `level` with no input in "full" and then "dirty" mode and prints the frame costs."""
+    results = {}
+    for mode in ("full", "dirty"):
+        run_level(screen, level, 0, {"speed": 1, "seed_enemy": 0, "enemy_slow": 0}, {}, 0, -1e9, character=character,
+                  render_mode=mode, level_seed=seed, benchmark_frames=frames)
+        results[mode] = dict(LAST_LEVEL_RENDER_STATS)
+    full, dirty = results["full"], results["dirty"]
+    if dirty["frame_ms_mean"] > 0:
+        print(f"Render comparison (level {level}, seed {seed}, {frames} frames): full {full['frame_ms_mean']:.2f}ms vs dirty "
+              f"{dirty['frame_ms_mean']:.2f}ms per frame ({full['frame_ms_mean'] / dirty['frame_ms_mean']:.2f}x), "
+              f"dirty pushed {dirty['pushed_area_mean'] * 100:.0f}% of the screen")
+    return results
+# --- END NEW ---
+
+
 # Function moved to ui.py
 # def show_world_transition(screen, next_world): ...
 
@@ -1392,6 +919,7 @@ def main():
     pygame.init(); mixer_ok = False
     try: pygame.mixer.init(); mixer_ok = True; print("Pygame mixer initialized successfully.")
     except pygame.error as e: print(f"Mixer init failed: {e}")
+    init_audio(preload=not ASSET_PRELOAD_ENABLED) # Sound effects are decoded once, here or by the asset preloader below
 
     screen_flags = pygame.FULLSCREEN | pygame.SCALED
     try: screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), screen_flags); print(f"Using Fullscreen SCALED mode: {SCREEN_WIDTH}x{SCREEN_HEIGHT}")
@@ -1401,38 +929,14 @@ def main():
         except pygame.error as e2: print(f"Failed to set any display mode: {e2}. Exiting."); pygame.quit(); return
 
     pygame.display.set_caption("Superspeed Seeds: Racing Royale"); pygame.mouse.set_visible(True)
+    # --- NEW: Decode every image/sound listed in settings.py before the menu, instead of mid-level ---
+    if ASSET_PRELOAD_ENABLED:
+        preloader = AssetPreloader()
+        if not show_preload_screen(screen, preloader): pygame.quit(); return
+        if DIAGNOSTIC_REPORTS: print(preloader.describe())
+    # --- END NEW ---
     clock = pygame.time.Clock(); load_save_data()
-
-    def add_achievement(ach_name, achievement_banners_list, session_set):
-        global save_data
-        if ach_name not in MASTER_ACHIEVEMENT_LIST: print(f"Warning: Attempted to add unknown achievement '{ach_name}'"); return
-        if "achievements" not in save_data or not isinstance(save_data["achievements"], list): save_data["achievements"] = []
-        current_achievements = save_data["achievements"]
-        if ach_name not in current_achievements and ach_name not in session_set:
-            tier = ACHIEVEMENT_TIER_MAP.get(ach_name, "Bronze"); reward = ACHIEVEMENT_SUPR_REWARDS.get(tier, 0)
-            current_achievements.append(ach_name); save_data["achievements"] = current_achievements
-            save_data["supercollateral_coins"] = save_data.get("supercollateral_coins", 0) + reward
-            session_set.add(ach_name); save_save_data(save_data)
-            if achievement_banners_list is not None and isinstance(achievement_banners_list, list):
-                 banner_text = f"Unlocked: {ach_name} (+{reward} SUPR)"; banner_color = ACHIEVEMENT_TIERS.get(tier, GOLD)
-                 # --- FIX: Ensure banner 'y' starts off-screen ---
-                 achievement_banners_list.append({"text": banner_text, "time": time.time(), "y": -60, "tier_color": banner_color})
-                 # --- END FIX ---
-                 print(f"Achievement Banner Added: {banner_text}")
-            elif achievement_banners_list is None: pass # Do nothing if None (e.g., called from minigame end)
-            else: print(f"Warning: achievement_banners_list is not None but not a list (type: {type(achievement_banners_list)})")
-            print(f"Achievement Unlocked: {ach_name} ({tier}, +{reward} SUPR)")
-
-            # --- Check for True Superseed achievement ---
-            if ach_name != ACH_TRUE_SUPERSEED: # Avoid recursion
-                unlocked_count = 0
-                for master_ach in MASTER_ACHIEVEMENT_LIST:
-                    if master_ach != ACH_TRUE_SUPERSEED and master_ach in save_data["achievements"]:
-                        unlocked_count += 1
-                # Check if all other achievements are unlocked
-                if unlocked_count >= len(MASTER_ACHIEVEMENT_LIST) - 1:
-                    add_achievement(ACH_TRUE_SUPERSEED, achievement_banners_list, session_set)
-            # --- End check ---
+    ACHIEVEMENTS.bind(save_data, save_save_data) # Stat events from gameplay unlock achievements through the rule engine
 
     def play_menu_music():
         if mixer_ok and os.path.exists(BG_MUSIC):
@@ -1447,7 +951,7 @@ def main():
         option = main_menu(screen, save_data)
 
         if option == "exit": break
-        elif option == "seederboard": display_leaderboard(screen, load_scores, save_data)
+        elif option == "seederboard": display_leaderboard(screen, SCORE_STORE, save_data)
         elif option == "hall": hall_of_seeds(screen, save_data)
         elif option == "vault": repayment_vault_shop(screen, save_data); save_save_data(save_data)
         elif option == "tutorial":
@@ -1483,7 +987,7 @@ def main():
             shop_upgrades = {"speed": 0, "seed_enemy": 0, "enemy_slow": 0}
             player_upgrades = {"shield": save_data.get("vault_upgrades", {}).get("starting_shield", 0)}
             checkpoint_count = INITIAL_CHECKPOINT_COUNT + save_data.get("vault_upgrades", {}).get("extra_life", 0)
-            saved_checkpoint_data = None; level_duration = 0.0; unlocked_achievements_this_session_main.clear(); last_ability_time = -float('inf') # Reset last ability time at start of run
+            saved_checkpoint_data = None; level_duration = 0.0; last_ability_time = -float('inf') # Reset last ability time at start of run
 
             if mixer_ok:
                 if os.path.exists(INGAME_MUSIC):
@@ -1515,7 +1019,7 @@ def main():
                     # --- FIX: Use correct variable name 'current_seeds' for the seed count ---
                     level_outcome, current_seeds, level_duration, shop_upgrades, player_upgrades, checkpoint_count, seeds_this_level, cp_data_on_loss, last_ability_time = run_level(
                         screen, current_level, current_seeds, shop_upgrades, player_upgrades, checkpoint_count, last_ability_time,
-                        difficulty, start_pos, start_angle, selected_driver, add_achievement,
+                        difficulty, start_pos, start_angle, selected_driver, ACHIEVEMENTS,
                         total_time, total_seeds_collected_run # Pass run totals
                     )
                     # --- END FIX ---
@@ -1526,9 +1030,7 @@ def main():
                 total_time += level_duration # Accumulate total time
                 if not was_loaded_from_checkpoint: total_seeds_collected_run += seeds_this_level # Accumulate seeds only if not loaded
 
-                if save_data.get("total_seeds_accumulated", 0) >= 1000: add_achievement(ACH_SEED_BANK_BARON, None, unlocked_achievements_this_session_main)
-                # Check Bountiful Harvest using seeds collected in that level
-                if seeds_this_level >= 100: add_achievement(ACH_BOUNTIFUL_HARVEST, None, unlocked_achievements_this_session_main)
+                ACHIEVEMENTS.notify("seeds_this_level", seeds_this_level) # Bountiful Harvest; Seed Bank Baron is checked as seeds are collected
 
                 # --- Post-Level Minigame Check ---
                 minigame_occurred = False
@@ -1544,6 +1046,7 @@ def main():
                     else:
                         minigame_result = minigame_func(screen, selected_character=selected_driver, collision_func=circle_collision)
                     # <<< END CHANGE >>>
+                    end_recording(minigame_result) # --- NEW: Close the minigame's replay ---
 
                     # --- Minigame Result Processing ---
                     if isinstance(minigame_result, tuple): # Seed Harvest (minigame_1)
@@ -1551,19 +1054,19 @@ def main():
                         if success is True:
                             current_seeds += extra_seeds # Add collected seeds
                             save_data["total_seeds_accumulated"] = save_data.get("total_seeds_accumulated", 0) + extra_seeds
-                            if add_achievement: add_achievement(ACH_SEED_HARVEST_VICTOR, None, unlocked_achievements_this_session_main)
+                            ACHIEVEMENTS.notify("minigame_won", minigame_name); ACHIEVEMENTS.notify("total_seeds_accumulated", save_data["total_seeds_accumulated"])
                             save_save_data(save_data)
                         elif success == "menu": level_outcome = "menu"; game_running = False # Stop game loop
                         elif success is False: print(f"{minigame_name} failed or exited (loss).")
 
                     elif isinstance(minigame_result, bool): # David's Revenge (minigame_2) or Inverse Gauntlet (minigame_3)
                         if minigame_result is True: # Player won
-                            ach_name = ""; supr_reward = 0
-                            if minigame_name == "David’s Revenge": supr_reward = 1; ach_name = ACH_DAVID_REVENGE_VICTOR
-                            elif minigame_name == "Inverse Gauntlet": supr_reward = 2; ach_name = ACH_INVERSE_GAUNTLET_VICTOR
+                            supr_reward = 0
+                            if minigame_name == "David’s Revenge": supr_reward = 1
+                            elif minigame_name == "Inverse Gauntlet": supr_reward = 2
                             if supr_reward > 0:
                                 save_data["supercollateral_coins"] = save_data.get("supercollateral_coins", 0) + supr_reward
-                                if ach_name and add_achievement: add_achievement(ach_name, None, unlocked_achievements_this_session_main)
+                                ACHIEVEMENTS.notify("minigame_won", minigame_name)
                                 save_save_data(save_data)
                         else: # Player lost (minigame_result is False)
                             print(f"{minigame_name} failed (player lost).")
@@ -1579,27 +1082,26 @@ def main():
 
                 # --- Game Flow Logic (Handles level_outcome potentially modified by minigame loss) ---
                 if level_outcome == "win":
+                    # --- NEW: Build the next level on a worker thread while the level-clear / world-transition screens run ---
+                    if current_level < MAX_LEVEL:
+                        LEVEL_PREGEN.start(current_level + 1, shop_upgrades, difficulty=difficulty)
+                    # --- END NEW ---
                     show_level_clear(screen, current_level, level_duration)
                     current_level += 1
                     # Check game win condition AFTER incrementing level
                     if current_level > MAX_LEVEL:
-                         if total_time < (30 * 60): add_achievement(ACH_TGE_ACHIEVED, None, unlocked_achievements_this_session_main)
-                         else: print(f"Game Won! Time: {total_time:.2f}s (Over 30 mins for TGE achievement)")
-                         # Character-specific win achievements
-                         if selected_driver == 1: add_achievement(ACH_WIN_SEEDGUY, None, unlocked_achievements_this_session_main)
-                         elif selected_driver == 2: add_achievement(ACH_WIN_JOAO, None, unlocked_achievements_this_session_main)
-                         elif selected_driver == 3: add_achievement(ACH_WIN_MESKY, None, unlocked_achievements_this_session_main)
-                         elif selected_driver == 4: add_achievement(ACH_WIN_CHOSEN, None, unlocked_achievements_this_session_main)
+                         if total_time >= (30 * 60): print(f"Game Won! Time: {total_time:.2f}s (Over 30 mins for TGE achievement)")
+                         ACHIEVEMENTS.notify("game_won", {"total_time": total_time, "character": selected_driver}) # TGE Achieved + character win
                          # Show WIN screen
                          win_game_name = show_win_screen(screen, total_time, total_seeds_collected_run)
-                         save_score(win_game_name, MAX_LEVEL, total_time, total_seeds_collected_run)
+                         save_score(win_game_name, MAX_LEVEL, total_time, total_seeds_collected_run, character=selected_driver, difficulty=difficulty)
                          # Update stats and end game
                          save_data["total_runs_completed"] = save_data.get("total_runs_completed", 0) + 1
                          save_save_data(save_data)
                          game_running = False; break # Exit the level loop
 
                 elif level_outcome == "lose":
-                    add_achievement(ACH_SPROUTED, None, unlocked_achievements_this_session_main) # Check "Sprouted" on loss
+                    ACHIEVEMENTS.notify("run_lost", current_level) # Check "Sprouted" on loss
                     if cp_data_on_loss:
                          saved_checkpoint_data = cp_data_on_loss
                          print("Player died, attempting to load last saved checkpoint.")
@@ -1610,7 +1112,7 @@ def main():
                         save_save_data(save_data)
                         # Show Game Over Screen
                         game_over_name = show_game_over(screen, current_level, total_time, total_seeds_collected_run)
-                        save_score(game_over_name, current_level, total_time, total_seeds_collected_run)
+                        save_score(game_over_name, current_level, total_time, total_seeds_collected_run, character=selected_driver, difficulty=difficulty)
                         game_running = False; break # Exit the level loop
 
                 elif level_outcome == "menu": game_running = False; break
@@ -1619,6 +1121,9 @@ def main():
             print("Exiting level loop.")
             if mixer_ok: pygame.mixer.music.stop()
 
+    SAVE_WRITER.flush() # Don't lose the last coalesced save on the way out
+    if DIAGNOSTIC_REPORTS:
+        print_frame_pacing_report(); print(AUDIO.describe()); print(describe_disk_cache()); print(SAVE_WRITER.describe()); print(ACHIEVEMENTS.describe()); print(LEVEL_PREGEN.describe())
     pygame.quit()
 
 if __name__ == "__main__":
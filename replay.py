@@ -0,0 +1,248 @@
+# --- START OF FILE replay.py ---
+# Deterministic input recording and replay. run_level and the minigames read their frame time, held keys and events
+# through a LiveInput. Besides returning the live values, it records them, the RNG seed, the start clock and the
+# results of modal screens (pause menu, shop, help, game over) into a gzip'd JSON file under REPLAY_DIR. A ReplayInput
+# hands the same values back without waiting, so `python replay.py <file>` re-runs a session on SDL's dummy drivers
+# as fast as the game can simulate and draw it, and checks that it ends in the same state.
+
+import os, sys, json, gzip, time, random, argparse, tempfile
+import pygame
+from settings import *
+from level_sim import KeyState
+
+REPLAY_FORMAT = 2 # 2: level layout planned before its sprites are built (level_sim.plan_level)
+_RECORDING_INPUT = None # LiveInput with an open recording; minigames are ended by their caller via end_recording()
+
+
+def _compact_event(event):
+    """The events the level and minigame loops act on, as short lists; everything else is not recorded."""
+    if event.type == pygame.QUIT: return ["q"]
+    if event.type == pygame.KEYDOWN and event.key not in (PROFILER_HOTKEY, PROFILER_EXPORT_HOTKEY): return ["k", event.key]
+    if event.type == pygame.MOUSEBUTTONDOWN: return ["m", event.button, event.pos[0], event.pos[1]]
+    return None
+
+
+def _make_event(compact):
+    if compact[0] == "q": return pygame.event.Event(pygame.QUIT)
+    if compact[0] == "k": return pygame.event.Event(pygame.KEYDOWN, key=compact[1], mod=0, unicode="", scancode=0)
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=compact[1], pos=(compact[2], compact[3]))
+
+
+def _json_round_trip(value):
+    return json.loads(json.dumps(value))
+
+
+class LiveInput:
+    """
+    Real frame time, keys and events for one level/minigame loop, recorded when REPLAY_RECORDING_ENABLED.
+    Frames are stored as [dt_us] or [dt_us, key_mask (-1 = unchanged), *events].
+    """
+    replaying = False
+
+    def __init__(self, record=None):
+        self.record = REPLAY_RECORDING_ENABLED if record is None else record
+        self.header = None; self.frames = []; self.values = []
+        self.key_mask = 0
+
+    def begin(self, kind, label, seed=None, start_time=0.0, params=None):
+        """Starts a level ("level") or minigame: reseeds the global RNG and returns the (seed, start_time) to use."""
+        global _RECORDING_INPUT
+        if seed is None: seed = random.getrandbits(32)
+        random.seed(seed) # Projectiles, wind, particles and minigame layouts draw from the module RNG
+        if self.record:
+            if _RECORDING_INPUT is not None and _RECORDING_INPUT is not self: _RECORDING_INPUT.end("interrupted")
+            self.header = {"format": REPLAY_FORMAT, "kind": kind, "label": label, "seed": seed, "start_time": start_time,
+                           "params": params or {}, "keys": list(REPLAY_KEYS), "fps": FPS, "display_fps": DISPLAY_FPS,
+                           "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            self.frames = []; self.values = []; self.key_mask = 0
+            _RECORDING_INPUT = self
+        return seed, start_time
+
+    def tick(self, clock, fps):
+        """clock.tick(fps) in milliseconds, rounded to whole microseconds so a replay feeds the exact same dt."""
+        dt_us = int(round(clock.tick(fps) * 1000.0))
+        if self.header is not None: self.frames.append([dt_us])
+        return dt_us / 1000.0
+
+    def keys(self):
+        pressed = pygame.key.get_pressed()
+        if self.header is not None and self.frames:
+            mask = 0
+            for bit, key in enumerate(REPLAY_KEYS):
+                if pressed[key]: mask |= 1 << bit
+            if mask != self.key_mask: self.key_mask = mask; self.frames[-1][1:] = [mask]
+        return pressed
+
+    def events(self):
+        events = pygame.event.get()
+        if self.header is not None and self.frames:
+            frame = self.frames[-1]
+            for event in events:
+                compact = _compact_event(event)
+                if compact is None: continue
+                if len(frame) == 1: frame.append(-1)
+                frame.append(compact)
+        return events
+
+    def value(self, name, func, *args):
+        """Runs a modal screen (or reads a clock) and records its result, which a replay returns instead of running it."""
+        result = func(*args)
+        if self.header is not None: self.values.append([len(self.frames) - 1, name, _json_round_trip(result)])
+        return result
+
+    def end(self, outcome, state=None):
+        """Closes the recording and writes it to REPLAY_DIR. Returns the path, or None."""
+        global _RECORDING_INPUT
+        if _RECORDING_INPUT is self: _RECORDING_INPUT = None
+        if self.header is None: return None
+        header = self.header; self.header = None
+        header["end"] = _json_round_trip({"outcome": outcome, "state": state, "frames": len(self.frames)})
+        data = dict(header, frames=self.frames, values=self.values)
+        safe_label = "".join(c if c.isalnum() else "_" for c in header["label"]).strip("_").lower()
+        path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}_{safe_label}.replay.gz")
+        try:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            with gzip.open(path, "wt", encoding="utf-8") as f: json.dump(data, f, separators=(",", ":"))
+            _prune_replays()
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Error writing replay: {e}"); return None
+        print(f"Replay saved: {path} ({len(self.frames)} frames, {os.path.getsize(path) / 1024:.1f} KB)")
+        return path
+
+
+def _prune_replays():
+    files = sorted(f for f in os.listdir(REPLAY_DIR) if f.endswith(".replay.gz"))
+    for name in files[:max(0, len(files) - REPLAY_KEEP_FILES)]:
+        try: os.remove(os.path.join(REPLAY_DIR, name))
+        except OSError as e: print(f"Error removing old replay {name}: {e}")
+
+
+def end_recording(outcome, state=None):
+    """Ends the open recording, if any (minigames return through many paths, so their caller ends them)."""
+    if _RECORDING_INPUT is not None: return _RECORDING_INPUT.end(outcome, state)
+    return None
+
+
+class ReplayInput(LiveInput):
+    """Feeds a recording back: no frame wait, recorded keys/events/modal results, a QUIT once the frames run out."""
+    replaying = True
+
+    def __init__(self, data):
+        super().__init__(record=False)
+        self.data = data
+        self.replay_keys = tuple(data.get("keys", REPLAY_KEYS))
+        self.index = -1; self.value_index = 0
+        self.pressed = KeyState()
+        self.desyncs = 0; self.result = None
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f: data = json.load(f)
+        if data.get("format") != REPLAY_FORMAT: print(f"Warning: replay format {data.get('format')} (expected {REPLAY_FORMAT})")
+        return cls(data)
+
+    @property
+    def exhausted(self):
+        return self.index >= len(self.data["frames"])
+
+    def _frame(self):
+        return self.data["frames"][self.index] if not self.exhausted else None
+
+    def begin(self, kind, label, seed=None, start_time=0.0, params=None):
+        if kind != self.data["kind"] or label != self.data["label"]:
+            print(f"Warning: replaying {self.data['kind']} '{self.data['label']}' into {kind} '{label}'"); self.desyncs += 1
+        random.seed(self.data["seed"])
+        return self.data["seed"], self.data["start_time"]
+
+    def tick(self, clock, fps):
+        self.index += 1
+        frame = self._frame()
+        return frame[0] / 1000.0 if frame else 1000.0 / FPS
+
+    def keys(self):
+        frame = self._frame()
+        if frame and len(frame) > 1 and frame[1] != -1:
+            self.pressed = KeyState.from_pressed(key for bit, key in enumerate(self.replay_keys) if frame[1] & (1 << bit))
+        return self.pressed
+
+    def events(self):
+        frame = self._frame()
+        if frame is None: return [pygame.event.Event(pygame.QUIT)] # End of recording: let the loop exit normally
+        return [_make_event(compact) for compact in frame[2:]]
+
+    def value(self, name, func, *args):
+        values = self.data["values"]
+        if self.value_index >= len(values):
+            print(f"Warning: replay has no recorded '{name}' result at frame {self.index}"); self.desyncs += 1; return None
+        frame_index, recorded_name, result = values[self.value_index]; self.value_index += 1
+        if recorded_name != name or frame_index != self.index:
+            print(f"Warning: replay expected '{recorded_name}' at frame {frame_index}, got '{name}' at frame {self.index}"); self.desyncs += 1
+        return result
+
+    def end(self, outcome, state=None):
+        """Compares the replayed end with the recorded one. Sets and returns self.result (True = identical)."""
+        recorded = self.data.get("end", {})
+        replayed = _json_round_trip({"outcome": outcome, "state": state})
+        self.result = self.desyncs == 0 and replayed["outcome"] == recorded.get("outcome") and replayed["state"] == recorded.get("state")
+        if not self.result: print(f"Replay ended differently: recorded {recorded}, replayed {replayed}")
+        return self.result
+
+
+def run_replay(path, render_mode=None):
+    """Replays one file on the dummy display as fast as possible. Returns a stats dict."""
+    replay_input = ReplayInput.load(path)
+    data = replay_input.data; params = data["params"]
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy") # Runner only (no window/sound); importing replay leaves the game's drivers alone
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.display.init(); pygame.font.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    import main # Deferred: importing main runs its library checks and builds the UI module
+    from save_writer import SAVE_WRITER
+    from frame_profiler import get_frame_profiler
+    real_save_path = SAVE_WRITER.path
+    SAVE_WRITER.flush(); SAVE_WRITER.path = os.path.join(tempfile.mkdtemp(prefix="superspeed_replay_"), "save_data.json") # Leave the real save alone
+    start = time.perf_counter()
+    try:
+        if data["kind"] == "level":
+            main.save_data.clear(); main.save_data["vault_upgrades"] = dict(params["vault_upgrades"])
+            main.run_level(screen, params["level"], params["current_seed_count"], dict(params["shop_upgrades"]), dict(params["player_upgrades"]),
+                           params["checkpoint_count"], params["last_ability_time"], difficulty=params["difficulty"],
+                           start_pos=tuple(params["start_pos"]) if params["start_pos"] else None, start_angle=params["start_angle"],
+                           character=params["character"], current_run_total_time=params["current_run_total_time"],
+                           current_run_total_seeds=params["current_run_total_seeds"], render_mode=render_mode or params.get("render_mode"),
+                           level_seed=data["seed"], frame_input=replay_input)
+            profiler = get_frame_profiler("level")
+        else:
+            minigames = {"Seed Harvest Frenzy": main.minigame_1, "David’s Revenge": main.minigame_2, "Inverse Gauntlet": main.minigame_3}
+            minigame_func = minigames[data["label"]]
+            if minigame_func is main.minigame_1: result = minigame_func(screen, selected_character=params["character"], frame_input=replay_input)
+            else: result = minigame_func(screen, selected_character=params["character"], collision_func=main.circle_collision, frame_input=replay_input)
+            replay_input.end(result)
+            profiler = get_frame_profiler("minigame")
+    finally:
+        SAVE_WRITER.flush(); SAVE_WRITER.path = real_save_path
+    elapsed = time.perf_counter() - start
+    frames = min(replay_input.index + 1, len(data["frames"]))
+    recorded_sec = sum(frame[0] for frame in data["frames"]) / 1e6
+    busy_p50, busy_p95, _ = profiler.phase_stats("total")
+    stats = {"path": path, "label": data["label"], "frames": frames, "replay_sec": elapsed, "recorded_sec": recorded_sec,
+             "fps": frames / elapsed if elapsed > 0 else 0.0, "speedup": recorded_sec / elapsed if elapsed > 0 else 0.0,
+             "busy_ms_p50": busy_p50, "busy_ms_p95": busy_p95, "identical": replay_input.result is True}
+    print(f"Replay [{data['label']}]: {frames} frames in {elapsed:.2f}s ({stats['fps']:.0f} FPS, {stats['speedup']:.1f}x real time), "
+          f"busy p50 {busy_p50:.2f}ms p95 {busy_p95:.2f}ms, end state {'identical' if stats['identical'] else 'DIFFERENT'}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replays recorded levels/minigames headless at full speed.")
+    parser.add_argument("paths", nargs="+", help="replay files (.replay.gz)")
+    parser.add_argument("--render-mode", choices=("full", "dirty"), help="override the recorded presentation mode")
+    args = parser.parse_args(argv)
+    results = [run_replay(path, args.render_mode) for path in args.paths]
+    pygame.quit()
+    return 0 if all(r["identical"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+# --- END OF FILE replay.py ---
@@ -0,0 +1,92 @@
+# --- START OF FILE save_writer.py ---
+# Background writer for save_data.json. save_save_data() only snapshots the dict; a daemon thread writes the
+# newest snapshot after a short coalescing delay, atomically (temp file + rename), so bursts of achievement /
+# end-of-level saves cost one disk write and never block the game thread.
+
+import os, json, time, atexit, threading
+from collections import deque
+from settings import *
+
+
+class SaveDataWriter:
+    """mark_dirty(data) queues a snapshot; the writer thread persists only the latest one. flush() writes now."""
+    def __init__(self, path=SAVE_DATA_FILE, coalesce_ms=SAVE_WRITE_COALESCE_MS):
+        self.path = path
+        self.coalesce_sec = coalesce_ms / 1000.0
+        self.lock = threading.Condition()
+        self.write_lock = threading.Lock() # Thread and flush() never write at the same time
+        self.pending = None # Serialized bytes of the newest unsaved snapshot
+        self.pending_since = None # perf_counter of the first notification since the last write
+        self.thread = None
+        # Metrics
+        self.notifications = 0; self.writes = 0; self.errors = 0
+        self.latency_ms = deque(maxlen=SAVE_WRITE_HISTORY) # First notification -> data on disk
+        self.write_ms = deque(maxlen=SAVE_WRITE_HISTORY) # Time inside the write itself
+
+    def _start(self):
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.flush) # Menus quit via exit(); make sure the last snapshot still lands
+
+    def mark_dirty(self, data):
+        """Snapshot `data` (compact JSON, on the caller's thread so later edits don't race the writer) and queue it."""
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        with self.lock:
+            if self.thread is None: self._start()
+            self.notifications += 1
+            if self.pending_since is None: self.pending_since = time.perf_counter()
+            self.pending = payload
+            self.lock.notify()
+
+    def _take_pending(self):
+        payload, since = self.pending, self.pending_since
+        self.pending = None; self.pending_since = None
+        return payload, since
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while self.pending is None: self.lock.wait()
+            time.sleep(self.coalesce_sec) # Let a burst of notifications collapse into one write
+            with self.write_lock:
+                with self.lock: payload, since = self._take_pending()
+                if payload is not None: self._write(payload, since)
+
+    def _write(self, payload, since):
+        start = time.perf_counter()
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(payload); f.flush(); os.fsync(f.fileno())
+            os.replace(temp_path, self.path) # Readers see the old file or the new one, never half of one
+        except OSError as e:
+            self.errors += 1; print(f"Error saving data: {e}"); return
+        end = time.perf_counter()
+        self.writes += 1
+        self.write_ms.append((end - start) * 1000.0)
+        self.latency_ms.append((end - since) * 1000.0)
+
+    def flush(self):
+        """Writes any pending snapshot on the calling thread. Safe to call repeatedly (and at exit)."""
+        with self.write_lock:
+            with self.lock: payload, since = self._take_pending()
+            if payload is not None: self._write(payload, since)
+
+    def stats(self):
+        latencies = sorted(self.latency_ms); write_times = sorted(self.write_ms)
+        return {"notifications": self.notifications, "writes": self.writes, "coalesced": self.notifications - self.writes,
+                "errors": self.errors,
+                "latency_ms_mean": sum(latencies) / len(latencies) if latencies else 0.0,
+                "latency_ms_max": latencies[-1] if latencies else 0.0,
+                "write_ms_mean": sum(write_times) / len(write_times) if write_times else 0.0,
+                "write_ms_max": write_times[-1] if write_times else 0.0}
+
+    def describe(self):
+        st = self.stats()
+        return (f"Save writer: {st['notifications']} saves requested, {st['writes']} written ({st['coalesced']} coalesced), "
+                f"{st['errors']} errors, dirty->disk latency mean {st['latency_ms_mean']:.1f}ms max {st['latency_ms_max']:.1f}ms, "
+                f"write mean {st['write_ms_mean']:.2f}ms max {st['write_ms_max']:.2f}ms")
+
+
+SAVE_WRITER = SaveDataWriter()
+# --- END OF FILE save_writer.py ---
@@ -0,0 +1,110 @@
+# --- START OF FILE score_store.py ---
+# Seederboard storage: every finished run goes into an indexed sqlite3 table (scores.db) instead of scores.txt,
+# which only ever kept the top MAX_SCORES_TO_KEEP and was re-parsed, re-sorted and rewritten on each save.
+
+import os, time, sqlite3
+from settings import *
+
+# Ranking order everywhere: highest level first, then fastest total time, then oldest run
+RANK_ORDER = "level DESC, total_time ASC, id ASC"
+
+
+class ScoreStore:
+    """sqlite3-backed score table. Queries return (name, level, total_time, seeds) tuples like the old load_scores()."""
+    def __init__(self, db_path=SCORES_DB_FILE, legacy_path=SCORES_FILE):
+        self.db_path = db_path
+        self.conn = None
+        self.legacy_path = legacy_path
+
+    def _connect(self):
+        """Opens the database on first use, creating the schema and importing scores.txt once."""
+        if self.conn is not None: return self.conn
+        try: self._open()
+        except sqlite3.Error:
+            if self.conn is not None: self.conn.close(); self.conn = None # Retry from scratch on the next call
+            raise
+        return self.conn
+
+    def _open(self):
+        """Creates the schema and runs the one-time scores.txt import (skipped, and retried next launch, if unreadable)."""
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS scores (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                level INTEGER NOT NULL,
+                total_time REAL NOT NULL,
+                seeds INTEGER NOT NULL,
+                character INTEGER,
+                difficulty TEXT,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_scores_rank ON scores (level DESC, total_time ASC);
+            CREATE INDEX IF NOT EXISTS idx_scores_character ON scores (character);
+            CREATE INDEX IF NOT EXISTS idx_scores_difficulty ON scores (difficulty);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        imported = self.conn.execute("SELECT value FROM meta WHERE key = 'legacy_import'").fetchone()
+        if imported is not None: return
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            try: count = self.import_scores_txt(self.legacy_path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Score store: could not import {self.legacy_path} ({e}), will retry next launch"); return
+            print(f"Score store: imported {count} scores from {self.legacy_path} into {self.db_path}")
+        with self.conn: self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_import', ?)", (str(time.time()),))
+
+    @staticmethod
+    def _filters(character=None, difficulty=None):
+        clauses = []; params = []
+        if character is not None: clauses.append("character = ?"); params.append(character)
+        if difficulty is not None: clauses.append("difficulty = ?"); params.append(difficulty)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def add_score(self, name, level, total_time, seeds, character=None, difficulty=None):
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("INSERT INTO scores (name, level, total_time, seeds, character, difficulty, created) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                  (name, int(level), float(total_time), int(seeds), character, difficulty, time.time()))
+        return cursor.lastrowid
+
+    def import_scores_txt(self, path):
+        """Bulk-loads a scores.txt file ("name,level,time,seeds" per line) in one transaction. Returns rows added."""
+        rows = []; now = time.time()
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line: continue
+                parts = line.rsplit(",", 3) # Names may contain commas; the three numbers never do
+                if len(parts) != 4: print(f"Skipping malformed score line: {line}"); continue
+                try: rows.append((parts[0], int(parts[1]), float(parts[2]), int(parts[3]), None, None, now))
+                except ValueError as e: print(f"Error parsing score line '{line}': {e}")
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT INTO scores (name, level, total_time, seeds, character, difficulty, created) VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def top(self, limit=MAX_SCORES_DISPLAY, offset=0, character=None, difficulty=None):
+        """One page of the leaderboard, best first."""
+        where, params = self._filters(character, difficulty)
+        return self._connect().execute(f"SELECT name, level, total_time, seeds FROM scores{where} ORDER BY {RANK_ORDER} LIMIT ? OFFSET ?",
+                                       params + [int(limit), int(offset)]).fetchall()
+
+    def count(self, character=None, difficulty=None):
+        where, params = self._filters(character, difficulty)
+        return self._connect().execute(f"SELECT COUNT(*) FROM scores{where}", params).fetchone()[0]
+
+    def rank_of(self, level, total_time, character=None, difficulty=None):
+        """1-based position a new run with this level/time would take (behind earlier runs it ties with). Call before add_score."""
+        where, params = self._filters(character, difficulty)
+        where = f"{where} AND" if where else " WHERE"
+        conn = self._connect() # Two range counts on idx_scores_rank (an OR of both would scan the table)
+        higher = conn.execute(f"SELECT COUNT(*) FROM scores{where} level > ?", params + [int(level)]).fetchone()[0]
+        tied = conn.execute(f"SELECT COUNT(*) FROM scores{where} level = ? AND total_time <= ?", params + [int(level), float(total_time)]).fetchone()[0]
+        return 1 + higher + tied
+
+    def close(self):
+        if self.conn is not None: self.conn.close(); self.conn = None
+
+
+SCORE_STORE = ScoreStore()
+# --- END OF FILE score_store.py ---
@@ -191,6 +191,21 @@ JOAO_SELECT_SOUND = os.path.join(MEDIA_DIR, "joao.mp3")
 MESKY_SELECT_SOUND = os.path.join(MEDIA_DIR, "mesky.mp3")
 CHOSEN_SELECT_SOUND = os.path.join(MEDIA_DIR, "chosen.mp3")
 
+# --- NEW: Audio manager (audio.py) ---
+AUDIO_CHANNELS = 16 # Mixer channels for sound effects (music streams separately)
+AUDIO_DEFAULT_VOICES = 2 # Max copies of one effect playing at once unless listed below
+AUDIO_DEFAULT_PRIORITY = 1
+AUDIO_LATENCY_HISTORY = 500 # play() calls kept for the latency report
+# path: (max simultaneous voices, priority). When all channels are busy a higher priority effect cuts off the oldest lower one.
+SOUND_VOICE_LIMITS = {
+    DEAD_SOUND: (1, 5), BREAK_SHIELD_SOUND: (1, 4), START_SOUND: (1, 4),
+    XDASH_SOUND: (1, 3), XSPEED_SOUND: (1, 3), XSLOW_SOUND: (1, 3), XIMMUNITY_SOUND: (1, 3),
+    SEEDGUY_SELECT_SOUND: (1, 3), JOAO_SELECT_SOUND: (1, 3), MESKY_SELECT_SOUND: (1, 3), CHOSEN_SELECT_SOUND: (1, 3),
+    POWERUP_SHIELD_SOUND: (1, 2), POWERUP_DOUBLE_SOUND: (1, 2), MAGNET_SOUND: (1, 2), FREEZE_SOUND: (1, 2),
+    CLICK_SOUND: (2, 2), DAVID_DASH_SOUND: (2, 1), SHOOTER_CHARGE_SOUND: (3, 1), COLLECT_SOUND: (3, 0),
+}
+# --- END NEW ---
+
 # --- GAME SETTINGS ---
 # --- NEW: Screen Shake ---
 SCREEN_SHAKE_DURATION = 0.2 # seconds
@@ -204,6 +219,9 @@ BASE_PLAYER_ACCEL = 2.0 * 60 * 60 # Acceleration
 PLAYER_FRICTION = 0.955 # Friction <<< REDUCED FURTHER SLIGHTLY (was 0.96)
 # --- END Tuning ---
 PLAYER_ROT_SPEED = 270 # Rotation speed
+PLAYER_ROTATION_STEP = 3 # Degrees between pre-rotated player frames (360 / step frames per character, shared by all Player instances)
+PLAYER_BRIGHTEN_AMOUNT = (50, 50, 50) # BLEND_RGB_ADD tint while Joao's boost is active
+PLAYER_BRIGHTENED_CHARACTERS = (2,) # Characters whose ability brightens the pod get a baked brightened atlas too
 
 # Player Bounce Animation
 PLAYER_BOUNCE_ENABLED = True # <<< NEW: Toggle for bounce animation
@@ -230,19 +248,107 @@ WIND_STREAK_LENGTH = 20
 WIND_COLOR = (200, 200, 200)
 # --- END RESTORED ---
 
+# --- NEW: Vectorized Weather Particles (weather.py) ---
+WEATHER_DENSITY = 1.0 # Multiplies the three counts above; the NumPy step + blits() batch keeps 10x well inside the frame budget
+WIND_STREAK_SPEED = 900 # Pixels/second (+-20% per streak): streaks now blow across the track instead of re-randomising each frame
+# --- END NEW ---
+
 
 ENEMY_SPEED_MULTIPLIER = 0.92 # Base multiplier for non-David enemies
 # --- FIX: Revert ENEMY_BOUNCE_FACTOR ---
 ENEMY_BOUNCE_FACTOR = 0.95 # <<< How much speed is retained on wall bounce (Reverted from 0.76)
 # --- END FIX ---
+# --- NEW: Enemy-enemy collision broad-phase ---
+ENEMY_COLLISION_BROADPHASE = "grid" # "grid" (spatial hash rebuilt each frame) or "bruteforce" (check every later enemy)
+ENEMY_COLLISION_GRID_SLACK = 1.0 # Extra cell size, in max-enemy-radii, before a pushed enemy re-queries the grid
+ENEMY_COLLISION_GRID_MIN_ENEMIES = 150 # Below this the plain later-enemy slices are cheaper than building the grid
+ENEMY_PHYSICS_ENGINE = "python" # "python" (Enemy.update per sprite) or "numpy" (vectorized roaming enemies, needs numpy)
+# --- END NEW ---
+# --- NEW: Render mode for run_level (dirty_rects.py) ---
+RENDER_MODE = "full" # "full" (repaint background + display.flip every frame) or "dirty" (repaint/update only changed rects)
+DIRTY_RECT_FULL_FLIP_RATIO = 0.5 # In "dirty" mode, flip the whole screen instead once this much of it changed
+# --- END NEW ---
+# --- NEW: Asset manifest + preload (assets.py) ---
+ASSET_PRELOAD_ENABLED = True # Decode every image/sound listed in this file on a background thread before the main menu
+ASSET_MAX_SOURCE_SIZE = (SCREEN_WIDTH, SCREEN_HEIGHT) # Bigger source images (the 6000x3375 character art) are downscaled to fit once on load
+ASSET_PRELOAD_CONVERT_BUDGET_MS = 8 # Main-thread time per progress-screen frame for converting decoded images to the display format
+SURFACE_DISK_CACHE_ENABLED = True # Keep decoded/scaled pixels on disk so later starts skip PNG/JPG decoding and scaling
+SURFACE_DISK_CACHE_DIR = os.path.join(BASE_DIR, ".surface_cache") # Entries rewrite themselves when the asset's mtime/size changes
+WORLD_BACKGROUND_CACHE_MB = 48 # Scaled world backgrounds kept in memory (~8 MB each at 1920x1080), least recently used dropped first
+# --- END NEW ---
+# --- NEW: Particle pool ---
+PARTICLE_POOL_SIZE = 600 # Particles pre-allocated and recycled; bursts beyond this allocate (and are counted as overflow)
+PARTICLE_ALPHA_STEPS = 16 # Fade levels baked per sparkle size/colour (shared surfaces, no per-particle copies)
+SHIELD_BREAK_PARTICLE_COLORS = [(r, g, 255) for r in range(180, 256, 15) for g in range(180, 256, 15)] # Blueish-white
+# --- END NEW ---
+# --- NEW: Superseed enemy flash palette ---
+SUPERSEED_FLASH_COLORS = [(r, g, b) for r in (50, 255) for g in (50, 255) for b in (50, 255) if (r, g, b) != (255, 255, 255)] # Multiply tints (same 50-255 range as before), baked once per animation frame (~0.3 MB each at 102x102)
+# --- END NEW ---
 
-SCORES_FILE = "scores.txt"
+SCORES_FILE = "scores.txt" # Legacy top-15 file, imported into SCORES_DB_FILE once
+SCORES_DB_FILE = "scores.db" # Every finished run (score_store.py)
+SAVE_DATA_FILE = "save_data.json"
+# --- NEW: Save writer (save_writer.py) ---
+SAVE_WRITE_COALESCE_MS = 250 # Saves requested within this window after the first one become a single disk write
+SAVE_WRITE_HISTORY = 200 # Writes kept for the latency report
+# --- END NEW ---
+
+# --- NEW: Next-level pregeneration (level_pregen.py) ---
+LEVEL_PREGEN_ENABLED = True # Plan the next level's layout on a worker thread during the level-clear screen (sprites are built on the main thread)
+LEVEL_PREGEN_WAIT_SEC = 2.0 # Longest run_level waits for an unfinished plan before planning in place
+LEVEL_PREGEN_HISTORY = 100 # Plans kept for the timing report
+# --- END NEW ---
 MAX_SCORES_TO_KEEP = 15 # Max scores saved in file
 MAX_SCORES_DISPLAY = 20 # Max scores to display on screen before scrolling needed
 MAX_LEVEL = 100
 
+# --- NEW: Fixed-timestep simulation / display rate ---
+SIM_TICK_RATE = FPS # Simulation ticks per second (game results depend only on this)
+DISPLAY_FPS = 60 # Display frame cap: 60, 120, 144, or 0 for uncapped
+MAX_FRAME_TIME = 0.1 # Longest frame (seconds) fed into the tick accumulator
+# Frame pacing per loop: "sleep" (sleep, then spin the last FRAME_PACER_SPIN_MS), "busy" (Clock.tick_busy_loop), "clock" (Clock.tick)
+FRAME_PACING = {"level": "sleep", "minigame": "sleep", "menu": "sleep"}
+FRAME_PACER_SPIN_MS = 1.0
+FRAME_PACER_HISTORY = 600 # Frames kept per loop for the jitter report
+DIAGNOSTIC_REPORTS = False # Print the pacing/cache/audio describe() reports after each level and on exit (F3 shows them live)
+# --- END NEW ---
+# --- NEW: Frame profiler overlay (frame_profiler.py) ---
+PROFILER_HOTKEY = pygame.K_F3 # Toggles the per-phase timing overlay in levels and minigames
+PROFILER_EXPORT_HOTKEY = pygame.K_F4 # Writes the current level's frame log to PROFILER_EXPORT_DIR
+PROFILER_OVERLAY_DEFAULT = False
+PROFILER_AUTO_EXPORT = False # Export every level's frame log automatically when it ends
+PROFILER_EXPORT_DIR = "profiles"
+PROFILER_HISTORY = 300 # Frames in the rolling p50/p95/p99 window
+PROFILER_REFRESH_FRAMES = 15 # Overlay text is re-rendered this often, not every frame
+PROFILER_CSV_MAX_ROWS = 216000 # One hour at 60 FPS
+PROFILER_OVERLAY_POS = (TRACK_LEFT + 10, TRACK_BOTTOM - 380)
+# --- END NEW ---
+# --- NEW: Benchmark suite (benchmarks.py) ---
+BENCHMARK_OUTPUT_DIR = "benchmarks" # One JSON file per run, named after the time and git commit
+BENCHMARK_ENEMY_COUNTS = (10, 50, 200, 1000)
+BENCHMARK_LEVELS = (5, 15, 25, 35, 45, 55, 65, 75, 85, 92, 97) # One representative level per world
+BENCHMARK_LEVEL_FRAMES = 180 # run_level frames timed per level (capped at DISPLAY_FPS like real play)
+BENCHMARK_LEVEL_SEED = 1234
+BENCHMARK_REPEAT = 7 # Timed repeats per micro benchmark; the median is the headline number
+BENCHMARK_REGRESSION_THRESHOLD = 1.10 # --compare flags medians this much slower than the baseline file
+# --- END NEW ---
+# --- NEW: Input recording and replay (replay.py) ---
+REPLAY_RECORDING_ENABLED = True # Every level and minigame writes its frame times, held keys, clicks and RNG seed to REPLAY_DIR
+REPLAY_DIR = "replays"
+REPLAY_KEEP_FILES = 50 # Oldest recordings are deleted beyond this
+REPLAY_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN, pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s,
+               pygame.K_SPACE) # Held keys the simulation reads, stored as a bitmask per change
+# --- END NEW ---
+
 INITIAL_CHECKPOINT_COUNT = 3 # Default starting checkpoints (free to use)
 MIN_ENEMY_SPAWN_DIST_FROM_PLAYER = 450 # Minimum distance enemies should spawn from player start (Increased from 120)
+# --- NEW: Poisson-disk spawn placement (spawn_sampler.py) ---
+SPAWN_SAMPLER_ATTEMPTS = 30 # Candidates tried per entity before the best-spaced one is taken
+ENEMY_SPAWN_SPACING = 40 # Minimum distance between spawned enemies
+SEED_SPAWN_SPACING = 30 # Minimum distance between spawned seeds
+SHOOTER_SPAWN_SPACING = 50
+POWERUP_SPAWN_SPACING = 60 # Keeps a new powerup off the ones already on the track
+# --- END NEW ---
 
 # --- SHOOTER ENEMY SETTINGS ---
 SHOOTER_SHOT_INTERVAL = 1000  # milliseconds
@@ -307,6 +413,7 @@ DAVID_SIZE_MULTIPLIER = 1.6 # Match new enemy size
 SHOOTER_SIZE_MULTIPLIER = 1.6 # Match new enemy size
 # --- END FIX ---
 POWERUP_CUMULATIVE_SIZE_INCREASE = 1.94 # REDUCED SIZE (was 2.5875, reduced by ~25%)
+POWERUP_PULSE_FRAMES = 48 # Baked frames per pulse cycle, shared by every powerup of a type
 SEED_SIZE_MULTIPLIER = 1.68 # Seed size further reduced: 2.4 * (1 - 0.3) = 1.68 (another 30% reduction)
 
 
@@ -361,6 +468,7 @@ ACHIEVEMENT_SUPR_REWARDS = {
     "Gold": 3
 }
 ACHIEVEMENT_BANNER_DURATION = 3.0 # <<< INCREASED DURATION (was 2.0)
+ACHIEVEMENT_EVAL_HISTORY = 200 # Rule evaluations kept for the achievement engine's cost report
 
 # --- Achievement Constants (Renamed/Added) ---
 # Bronze
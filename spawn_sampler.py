@@ -0,0 +1,76 @@
+# --- START OF FILE spawn_sampler.py ---
+# Blue-noise (Poisson-disk) spawn placement. Replaces "retry randint up to N times against every earlier position"
+# loops: neighbours are looked up in a grid of min_dist/sqrt(2) cells, so each candidate costs O(1) no matter how
+# many entities are placed, and every request takes at most `attempts` candidates before the best one is used.
+
+import math, random
+from settings import *
+
+
+class PoissonDiskSampler:
+    """Places points at least min_dist apart inside bounds (left, top, right, bottom), outside exclusion circles."""
+    def __init__(self, bounds, min_dist, rng=None, exclusions=(), attempts=SPAWN_SAMPLER_ATTEMPTS):
+        self.left, self.top, self.right, self.bottom = (int(v) for v in bounds)
+        self.min_dist = max(1.0, float(min_dist))
+        self.rng = rng or random
+        self.exclusions = [(float(x), float(y), float(r)) for x, y, r in exclusions] # (x, y, radius)
+        self.attempts = max(1, int(attempts))
+        self.cell_size = self.min_dist / math.sqrt(2) # At most one well-spaced point per cell
+        self.grid = {} # (col, row) -> [(x, y)]; fallbacks may share a cell
+        self.points = []
+        # Metrics
+        self.candidates = 0; self.fallbacks = 0
+
+    def add_exclusion(self, x, y, radius):
+        self.exclusions.append((float(x), float(y), float(radius)))
+
+    def add_point(self, x, y):
+        """Registers an already-placed entity so new points keep their distance from it."""
+        self.grid.setdefault((int(x // self.cell_size), int(y // self.cell_size)), []).append((x, y))
+        self.points.append((x, y))
+
+    def _excluded(self, x, y):
+        for ex, ey, radius in self.exclusions:
+            if (x - ex) * (x - ex) + (y - ey) * (y - ey) < radius * radius: return True
+        return False
+
+    def _clearance(self, x, y):
+        """Distance to the nearest placed point, capped at min_dist (only the 5x5 surrounding cells can be closer)."""
+        col = int(x // self.cell_size); row = int(y // self.cell_size); grid = self.grid
+        nearest_sq = self.min_dist * self.min_dist
+        for c in range(col - 2, col + 3):
+            for r in range(row - 2, row + 3):
+                for px, py in grid.get((c, r), ()):
+                    d_sq = (x - px) * (x - px) + (y - py) * (y - py)
+                    if d_sq < nearest_sq: nearest_sq = d_sq
+        return math.sqrt(nearest_sq)
+
+    def accepts(self, x, y):
+        return not self._excluded(x, y) and self._clearance(x, y) >= self.min_dist
+
+    def try_add(self, x, y):
+        """Adds (x, y) only if it respects spacing and exclusions. Returns True if added."""
+        self.candidates += 1
+        if not self.accepts(x, y): return False
+        self.add_point(x, y); return True
+
+    def sample(self):
+        """One new point. After `attempts` rejected candidates the one with the most clearance outside the exclusions wins."""
+        rng = self.rng; best = None; best_score = None
+        for _ in range(self.attempts):
+            x = rng.randint(self.left, self.right); y = rng.randint(self.top, self.bottom)
+            self.candidates += 1
+            excluded = self._excluded(x, y); clearance = self._clearance(x, y)
+            if not excluded and clearance >= self.min_dist: self.add_point(x, y); return (x, y)
+            score = (not excluded, clearance)
+            if best_score is None or score > best_score: best, best_score = (x, y), score
+        self.fallbacks += 1
+        self.add_point(*best); return best
+
+    def sample_many(self, count):
+        return [self.sample() for _ in range(count)]
+
+    def describe(self):
+        return (f"Spawn sampler: {len(self.points)} points, {self.candidates} candidates "
+                f"({self.candidates / max(1, len(self.points)):.1f}/point), {self.fallbacks} best-candidate fallbacks")
+# --- END OF FILE spawn_sampler.py ---
@@ -1,5 +1,9 @@
-import pygame, time, os, math, json, random # Added random for wind effect
+import pygame, time, os, math, json, random, sqlite3 # Added random for wind effect
+from collections import deque
 from settings import * # Imports all settings, including fonts and MASTER_ACHIEVEMENT_LIST
+from frame_timing import get_frame_pacer # Shared sleep-based pacer for all menu loops
+from audio import play_sound # Preloaded sound effects on the shared channel pool
+from assets import get_image, get_scaled_image, WORLD_BACKGROUND_CACHE # Decoded-once images (menus redraw every frame and used to reload their art each time)
 
 # Define consistent fonts locally in case they weren't imported via *
 # (This section remains the same as before)
@@ -58,28 +62,38 @@ VAULT_CLOSE_BUTTON_FONT = FONT_IMPACT_XXSM
 
 # --- Sound Functions ---
 def play_click_sound():
-    if os.path.exists(CLICK_SOUND):
-        try:
-            if pygame.mixer.get_init():
-                sound = pygame.mixer.Sound(CLICK_SOUND)
-                sound.play()
-            else:
-                print("Warning: Mixer not initialized, cannot play click sound.")
-        except pygame.error as e:
-            print(f"Error playing click sound: {e}")
+    play_sound(CLICK_SOUND)
 
 def play_freeze_sound():
-    if os.path.exists(FREEZE_SOUND):
-        try:
-            if pygame.mixer.get_init():
-                sound = pygame.mixer.Sound(FREEZE_SOUND)
-                sound.play()
-            else:
-                print("Warning: Mixer not initialized, cannot play freeze sound.")
-        except pygame.error as e:
-            print(f"Error playing freeze sound: {e}")
+    play_sound(FREEZE_SOUND)
 # --- End Sound Functions ---
 
+# --- NEW: Stamp-based player trail ---
+TRAIL_STAMP_CACHE = {} # (colour, segment size) -> 256 circle stamps, index = alpha
+
+def get_trail_stamps(color, size):
+    """Circle stamps for every alpha value of one trail colour, drawn exactly like the old per-point surfaces."""
+    cache_key = (tuple(color), size)
+    stamps = TRAIL_STAMP_CACHE.get(cache_key)
+    if stamps is None:
+        stamps = []
+        for alpha in range(256):
+            stamp = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(stamp, (*color, alpha), (size // 2, size // 2), size // 2)
+            stamps.append(stamp)
+        TRAIL_STAMP_CACHE[cache_key] = stamps
+    return stamps
+
+def draw_player_trail(screen, player):
+    """Draws player.trail (oldest point faintest) with one blits call using the pre-baked stamps. Returns the drawn rects."""
+    if not player.trail: return []
+    size = player.trail_segment_size; half = size // 2
+    stamps = get_trail_stamps(PLAYER_TRAIL_COLORS.get(player.character, TRAIL_COLOR_DEFAULT), size)
+    trail_length = player.trail_length; alpha_mult = player.trail_intensity_multiplier
+    return screen.blits([(stamps[max(0, min(255, int(255 * (i / trail_length) * 0.5 * alpha_mult)))], (pos[0] - half, pos[1] - half))
+                         for i, pos in enumerate(player.trail)])
+# --- END NEW ---
+
 # --- Cache for Mesky Aura Image ---
 MESKY_AURA_IMAGE_CACHE = None
 MESKY_AURA_ROTATED_CACHE = None # <<< NEW Cache for the rotated image
@@ -193,7 +207,7 @@ def draw_plain_button(screen, rect, text, font, text_color=BLACK, border_color=B
 
     if button_image_path and os.path.exists(button_image_path):
         try:
-            btn_img_orig = pygame.image.load(button_image_path).convert_alpha()
+            btn_img_orig = get_image(button_image_path)
             # Scale image based on hover state
             current_width = int(rect.width * hover_scale_factor) if hover else rect.width
             current_height = int(rect.height * hover_scale_factor) if hover else rect.height
@@ -238,7 +252,7 @@ def draw_shop_overlay(screen, rect, text, font, button_image=BUTTON_IMAGE, text_
 
     if image_path_to_use and os.path.exists(image_path_to_use):
         try:
-            btn_img = pygame.image.load(image_path_to_use).convert_alpha()
+            btn_img = get_image(image_path_to_use)
             btn_img = pygame.transform.scale(btn_img, (rect.width, rect.height))
         except pygame.error as e:
             print(f"Error loading/scaling button image {image_path_to_use}: {e}")
@@ -500,7 +514,7 @@ def draw_shield_aura(screen, player, current_time):
         if MESKY_AURA_ROTATED_CACHE is None: # Only load and rotate once
             if MESKY_AURA_IMAGE_CACHE is None and os.path.exists(SLOW_AURA_IMAGE):
                 try:
-                    MESKY_AURA_IMAGE_CACHE = pygame.image.load(SLOW_AURA_IMAGE).convert_alpha()
+                    MESKY_AURA_IMAGE_CACHE = get_image(SLOW_AURA_IMAGE)
                     print("Loaded Mesky slow aura image.")
                 except Exception as e:
                     print(f"Error loading Mesky slow aura image: {e}")
@@ -577,6 +591,20 @@ def draw_game_border(screen):
                       TRACK_BOTTOM - TRACK_TOP + 2 * border_thickness),
                      border_thickness)
 
+ABILITY_ICON_HUD_CACHE = {} # --- NEW: ability icon surface -> icon scaled for the HUD (plus the shared "glow" ring) ---
+HUD_TEXT_CACHE = {} # --- NEW: (font, text, color) -> rendered text for small HUD labels that repeat ---
+HUD_TEXT_CACHE_LIMIT = 512
+
+def render_hud_text(font, text, color=WHITE):
+    """font.render(text, True, color), cached. The returned surface is shared: don't draw on it."""
+    cache_key = (font, text, color)
+    surf = HUD_TEXT_CACHE.get(cache_key)
+    if surf is None:
+        if len(HUD_TEXT_CACHE) >= HUD_TEXT_CACHE_LIMIT: HUD_TEXT_CACHE.clear()
+        surf = font.render(text, True, color)
+        HUD_TEXT_CACHE[cache_key] = surf
+    return surf
+
 def draw_ability_icon(screen, player, current_time):
     # --- Position relative to screen center top ---
     meter_width = 150
@@ -593,7 +621,7 @@ def draw_ability_icon(screen, player, current_time):
     is_ready = cooldown_ratio >= 1.0
 
     # Draw Cooldown Meter
-    pygame.draw.rect(screen, GRAY, (meter_x, meter_y, meter_width, meter_height))
+    drawn = pygame.draw.rect(screen, GRAY, (meter_x, meter_y, meter_width, meter_height)) # Union of everything drawn, returned for dirty-rect rendering
     fill_color = GREEN if is_ready else RED
     pygame.draw.rect(screen, fill_color, (meter_x, meter_y, int(meter_width * cooldown_ratio), meter_height))
     pygame.draw.rect(screen, WHITE, (meter_x, meter_y, meter_width, meter_height), 2)
@@ -605,15 +633,23 @@ def draw_ability_icon(screen, player, current_time):
     ability_icon_to_draw = player.ability_icon
     if ability_icon_to_draw and ability_icon_to_draw.get_width() > 1 and ability_icon_to_draw.get_height() > 1:
         try:
-            scaled_icon = pygame.transform.smoothscale(ability_icon_to_draw, icon_size) # Use smoothscale
-            screen.blit(scaled_icon, (icon_x, icon_y))
+            # --- CHANGE: Scaled icon and glow ring are cached instead of rebuilt every frame ---
+            scaled_icon = ABILITY_ICON_HUD_CACHE.get(ability_icon_to_draw)
+            if scaled_icon is None:
+                scaled_icon = pygame.transform.smoothscale(ability_icon_to_draw, icon_size) # Use smoothscale
+                ABILITY_ICON_HUD_CACHE[ability_icon_to_draw] = scaled_icon
+            drawn.union_ip(screen.blit(scaled_icon, (icon_x, icon_y)))
             if is_ready:
                 glow_radius_factor = 1.05 # Relative glow size
                 glow_radius = int(icon_size[0] / 2 * glow_radius_factor)
                 glow_thickness = 3
-                glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
-                pygame.draw.circle(glow_surf, (255, 255, 255, 80), (glow_radius, glow_radius), glow_radius, glow_thickness) # Draw glow on separate surface
-                screen.blit(glow_surf, (icon_x + icon_size[0]//2 - glow_radius, icon_y + icon_size[1]//2 - glow_radius)) # Center glow around icon
+                glow_surf = ABILITY_ICON_HUD_CACHE.get("glow")
+                if glow_surf is None:
+                    glow_surf = pygame.Surface((glow_radius*2, glow_radius*2), pygame.SRCALPHA)
+                    pygame.draw.circle(glow_surf, (255, 255, 255, 80), (glow_radius, glow_radius), glow_radius, glow_thickness) # Draw glow on separate surface
+                    ABILITY_ICON_HUD_CACHE["glow"] = glow_surf
+                drawn.union_ip(screen.blit(glow_surf, (icon_x + icon_size[0]//2 - glow_radius, icon_y + icon_size[1]//2 - glow_radius))) # Center glow around icon
+            # --- END CHANGE ---
 
         except (pygame.error, ValueError) as e:
             print(f"Error scaling ability icon for display: {e}")
@@ -621,27 +657,28 @@ def draw_ability_icon(screen, player, current_time):
             fallback_surf.fill(DARK_GRAY)
             pygame.draw.line(fallback_surf, RED, (0, 0), (icon_size[0]-1, icon_size[1]-1), 2)
             pygame.draw.line(fallback_surf, RED, (0, icon_size[1]-1), (icon_size[0]-1, 0), 2)
-            screen.blit(fallback_surf, (icon_x, icon_y))
+            drawn.union_ip(screen.blit(fallback_surf, (icon_x, icon_y)))
 
     else:
         fallback_surf = pygame.Surface(icon_size, pygame.SRCALPHA)
         fallback_surf.fill(DARK_GRAY)
         pygame.draw.line(fallback_surf, RED, (0, 0), (icon_size[0]-1, icon_size[1]-1), 2)
         pygame.draw.line(fallback_surf, RED, (0, icon_size[1]-1), (icon_size[0]-1, 0), 2)
-        screen.blit(fallback_surf, (icon_x, icon_y))
+        drawn.union_ip(screen.blit(fallback_surf, (icon_x, icon_y)))
 
     # Draw Cooldown Text (Left of Meter)
     text_x = meter_x - icon_padding
     cooldown_font = FONT_TINY
     if is_ready:
-         ready_text_surf = cooldown_font.render("Ready! [SPACE]", True, WHITE)
+         ready_text_surf = render_hud_text(cooldown_font, "Ready! [SPACE]")
          ready_rect = ready_text_surf.get_rect(midright=(text_x, meter_y + meter_height // 2))
-         screen.blit(ready_text_surf, ready_rect)
+         drawn.union_ip(screen.blit(ready_text_surf, ready_rect))
     else:
          time_left = max(0.0, player.cooldown - time_since_ability) # Prevent negative display
-         cd_text_surf = cooldown_font.render(f"{time_left:.1f}s", True, WHITE)
+         cd_text_surf = render_hud_text(cooldown_font, f"{time_left:.1f}s")
          cd_rect = cd_text_surf.get_rect(midright=(text_x, meter_y + meter_height // 2))
-         screen.blit(cd_text_surf, cd_rect)
+         drawn.union_ip(screen.blit(cd_text_surf, cd_rect))
+    return drawn
 
 
 # --- NEW: Function to draw key representations ---
@@ -846,16 +883,40 @@ def show_controls_overlay(screen):
                     play_click_sound(); waiting_for_input = False
             if event.type == pygame.MOUSEBUTTONDOWN:
                  play_click_sound(); waiting_for_input = False
-        pygame.time.Clock().tick(30)
+        get_frame_pacer("menu").tick(30)
 # --- END UPDATE ---
 
 
+# --- NEW: Progress screen for the up-front asset preload (assets.AssetPreloader) ---
+def show_preload_screen(screen, preloader):
+    """Runs the preload with a progress bar. Returns False if the window was closed while loading."""
+    bar_rect = pygame.Rect(0, 0, 600, 28); bar_rect.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30)
+    title_surf = FONT_MD.render("Loading Superspeed Seeds...", True, GOLD)
+    title_rect = title_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 40))
+    clock = get_frame_pacer("menu"); clock.restart()
+    preloader.start()
+    while not preloader.pump():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT: preloader.stop(); return False
+        screen.fill(BLACK)
+        screen.blit(title_surf, title_rect)
+        pygame.draw.rect(screen, DARK_GRAY, bar_rect, border_radius=6)
+        fill_rect = bar_rect.copy(); fill_rect.width = int(bar_rect.width * preloader.progress)
+        if fill_rect.width > 0: pygame.draw.rect(screen, GREEN, fill_rect, border_radius=6)
+        pygame.draw.rect(screen, WHITE, bar_rect, 2, border_radius=6)
+        status_surf = FONT_TINY.render(f"{preloader.done}/{preloader.total}  {preloader.current}", True, WHITE)
+        screen.blit(status_surf, status_surf.get_rect(midtop=(SCREEN_WIDTH // 2, bar_rect.bottom + 12)))
+        pygame.display.flip()
+        clock.tick(60)
+    return True
+# --- END NEW ---
+
+
 def main_menu(screen, save_data):
     bg_menu = None
     if os.path.exists(BACKGROUND_MENU):
         try:
-            bg_menu = pygame.image.load(BACKGROUND_MENU).convert()
-            bg_menu = pygame.transform.scale(bg_menu, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_menu = get_scaled_image(BACKGROUND_MENU, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading main menu background: {e}")
 
@@ -919,13 +980,7 @@ def main_menu(screen, save_data):
                     for btn_rect, btn_text, action in buttons:
                         if btn_rect.collidepoint(mouse_pos):
                             if action == "start":
-                                if os.path.exists(START_SOUND):
-                                    try:
-                                        if pygame.mixer.get_init():
-                                            start_sound = pygame.mixer.Sound(START_SOUND)
-                                            start_sound.play()
-                                    except pygame.error as e:
-                                        print(f"Error playing start sound: {e}")
+                                play_sound(START_SOUND)
                             return action
 
             elif event.type == pygame.KEYDOWN:
@@ -933,7 +988,7 @@ def main_menu(screen, save_data):
                     play_click_sound()
                     return "exit"
 
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 
 # --- REMOVED show_tutorial FUNCTION ---
 
@@ -941,7 +996,7 @@ def show_tutorial_image(screen, image_path, from_menu=False):
     tutorial_img = None
     if os.path.exists(image_path):
         try:
-            tutorial_img = pygame.image.load(image_path).convert()
+            tutorial_img = get_image(image_path, alpha=False)
             # Ensure aspect ratio is maintained if scaling non-fullscreen images
             img_w, img_h = tutorial_img.get_size()
             if img_w != SCREEN_WIDTH or img_h != SCREEN_HEIGHT:
@@ -1012,7 +1067,7 @@ def show_tutorial_image(screen, image_path, from_menu=False):
                     waiting = False
                     break
 
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 
 
 def show_level_clear(screen, level, level_time):
@@ -1022,6 +1077,10 @@ def show_level_clear(screen, level, level_time):
     overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
     overlay.fill(BLACK)
 
+    # --- NEW: Load the next level's world background now, while the overlay is up, not at level start ---
+    if level < MAX_LEVEL: WORLD_BACKGROUND_CACHE.warm(get_scene_description_local(level + 1))
+    # --- END NEW ---
+
     fade_duration = 0.5
     total_display_time = 1.0
     start_time = time.time()
@@ -1044,19 +1103,21 @@ def show_level_clear(screen, level, level_time):
 
         pygame.mouse.set_visible(True)
         pygame.display.flip()
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 
 
-def display_leaderboard(screen, load_scores_func, save_data):
-    all_scores = load_scores_func()
-    scores_to_display = all_scores[:MAX_SCORES_DISPLAY] # Limit to 20
+def display_leaderboard(screen, score_store, save_data):
+    # --- CHANGE: Scores come one page at a time from the indexed score store (score_store.py) ---
+    page = 0
+    try: total_scores = score_store.count()
+    except sqlite3.Error as e: print(f"Error reading scores: {e}"); total_scores = 0 # Locked/corrupt scores.db: show an empty board
+    num_pages = max(1, (total_scores + MAX_SCORES_DISPLAY - 1) // MAX_SCORES_DISPLAY)
 
     bg_leaderboard = None
     bg_leaderboard_darkened = None # Surface for darkened background
     if SEEDERBOARD_BACKGROUND and os.path.exists(SEEDERBOARD_BACKGROUND):
         try:
-            bg_loaded = pygame.image.load(SEEDERBOARD_BACKGROUND).convert()
-            bg_leaderboard = pygame.transform.scale(bg_loaded, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_leaderboard = get_scaled_image(SEEDERBOARD_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
             # Create darkened version (using existing alpha value)
             bg_leaderboard_darkened = bg_leaderboard.copy()
             darken_overlay = pygame.Surface(bg_leaderboard_darkened.get_size(), pygame.SRCALPHA)
@@ -1067,7 +1128,7 @@ def display_leaderboard(screen, load_scores_func, save_data):
             print(f"Error loading seederboard background: {e}")
             bg_leaderboard_darkened = None # Ensure it's None if loading/darkening fails
 
-    clock = pygame.time.Clock()
+    clock = get_frame_pacer("menu"); clock.restart()
 
     # --- Use Impact fonts for leaderboard ---
     score_font_lb = FONT_LEADERBOARD_SCORE # Impact MD for score lines
@@ -1102,42 +1163,50 @@ def display_leaderboard(screen, load_scores_func, save_data):
 
     col_line_y = header_y + col_font_lb.get_height() + 5
 
-    score_items = []
     line_height = score_font_lb.get_height() + 10 # Use score font height
-    current_y_offset = 0
-    total_content_height = 0
     score_list_start_y = col_line_y + 25
+    back_button = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 80, 300, 50)
+    scroll_area_height = back_button.top - score_list_start_y - 10
 
-    for i, (name, level, total_time, total_seeds) in enumerate(scores_to_display, 1):
-        rank_str = f"{i}."
-        name_str = f"{name[:15]}"
-        level_str = f"{level}"
-        # --- CHANGE: Format time to M:S.s ---
-        minutes = int(total_time // 60)
-        seconds = total_time % 60
-        time_str = f"{minutes}m {seconds:.1f}s"
-        # --- END CHANGE ---
-        # Ensure seeds are not negative
-        seeds_str = f"{max(0, total_seeds)}"
-        avg_time_str = f"{(total_time / level if level > 0 else 0):.2f}"
-        text_color = WHITE # Change text color to WHITE
-        surfaces = [
-            score_font_lb.render(rank_str, True, text_color),
-            score_font_lb.render(name_str, True, text_color),
-            score_font_lb.render(level_str, True, text_color),
-            score_font_lb.render(time_str, True, text_color),
-            score_font_lb.render(seeds_str, True, text_color),
-            score_font_lb.render(avg_time_str, True, text_color)
-        ]
-        positions = [x_rank, x_name, x_level, x_time, x_seeds, x_avg_time]
-        score_items.append({'y': current_y_offset, 'surfaces': surfaces, 'positions': positions})
-        current_y_offset += line_height
-        total_content_height += line_height
+    def build_page(page):
+        """Renders the rows of one leaderboard page; returns (score_items, total_content_height)."""
+        score_items = []
+        current_y_offset = 0
+        total_content_height = 0
+        try: page_scores = score_store.top(MAX_SCORES_DISPLAY, offset=page * MAX_SCORES_DISPLAY)
+        except sqlite3.Error as e: print(f"Error reading scores: {e}"); page_scores = []
+        for i, (name, level, total_time, total_seeds) in enumerate(page_scores, page * MAX_SCORES_DISPLAY + 1):
+            rank_str = f"{i}."
+            name_str = f"{name[:15]}"
+            level_str = f"{level}"
+            # --- CHANGE: Format time to M:S.s ---
+            minutes = int(total_time // 60)
+            seconds = total_time % 60
+            time_str = f"{minutes}m {seconds:.1f}s"
+            # --- END CHANGE ---
+            # Ensure seeds are not negative
+            seeds_str = f"{max(0, total_seeds)}"
+            avg_time_str = f"{(total_time / level if level > 0 else 0):.2f}"
+            text_color = WHITE # Change text color to WHITE
+            surfaces = [
+                score_font_lb.render(rank_str, True, text_color),
+                score_font_lb.render(name_str, True, text_color),
+                score_font_lb.render(level_str, True, text_color),
+                score_font_lb.render(time_str, True, text_color),
+                score_font_lb.render(seeds_str, True, text_color),
+                score_font_lb.render(avg_time_str, True, text_color)
+            ]
+            positions = [x_rank, x_name, x_level, x_time, x_seeds, x_avg_time]
+            score_items.append({'y': current_y_offset, 'surfaces': surfaces, 'positions': positions})
+            current_y_offset += line_height
+            total_content_height += line_height
+        return score_items, total_content_height
+
+    score_items, total_content_height = build_page(page)
+    page_hint_font = FONT_IMPACT_XXSM
 
     scroll_offset = 0
     scroll_speed = 450
-    back_button = pygame.Rect(SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT - 80, 300, 50)
-    scroll_area_height = back_button.top - score_list_start_y - 10
     max_scroll = max(0, total_content_height - scroll_area_height)
 
     leaderboard_bg_rect = pygame.Rect(x_start - 20, header_y - 10, total_table_width + 40, back_button.top - (header_y - 10) - 10 ) # Adjusted height calculation
@@ -1166,6 +1235,12 @@ def display_leaderboard(screen, load_scores_func, save_data):
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_m: play_click_sound(); waiting = False; break
                 if event.key == pygame.K_PAGEUP: scroll_change -= scroll_area_height * 0.8
                 if event.key == pygame.K_PAGEDOWN: scroll_change += scroll_area_height * 0.8
+                if event.key in (pygame.K_LEFT, pygame.K_RIGHT): # Previous / next page of runs
+                    new_page = max(0, min(num_pages - 1, page + (1 if event.key == pygame.K_RIGHT else -1)))
+                    if new_page != page:
+                        play_click_sound(); page = new_page; scroll_offset = 0
+                        score_items, total_content_height = build_page(page)
+                        max_scroll = max(0, total_content_height - scroll_area_height)
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if back_button.collidepoint(event.pos): play_click_sound(); waiting = False; break
                 if event.button == 4: mouse_wheel = -1
@@ -1226,10 +1301,14 @@ def display_leaderboard(screen, load_scores_func, save_data):
         screen.set_clip(None)
 
         draw_plain_button(screen, back_button, "Back to Menu", MENU_BUTTON_FONT, text_color=BLACK, bg_color=WHITE, border_color=BLACK, hover=back_button.collidepoint(mouse_pos))
+        if num_pages > 1:
+            page_surf = render_hud_text(page_hint_font, f"< Page {page + 1}/{num_pages} ({total_scores} runs) >   Left/Right to change page", WHITE)
+            screen.blit(page_surf, page_surf.get_rect(midright=(back_button.left - 30, back_button.centery)))
 
         pygame.mouse.set_visible(True)
         pygame.display.flip()
         if not waiting: break
+    # --- END CHANGE ---
 
 
 # --- UPDATED: hall_of_seeds with Locked/Unlocked Icons and Borders ---
@@ -1251,7 +1330,7 @@ def hall_of_seeds(screen, save_data):
     # --- Load and Scale Lock Icon ---
     if os.path.exists(LOCK_ICON_PATH):
         try:
-            icon_img = pygame.image.load(LOCK_ICON_PATH).convert_alpha()
+            icon_img = get_image(LOCK_ICON_PATH)
             icon_width = int(icon_img.get_width() * (lock_icon_target_height / icon_img.get_height())) if icon_img.get_height() > 0 else lock_icon_target_height
             if icon_width > 0 and lock_icon_target_height > 0:
                 LOCK_ICON = pygame.transform.smoothscale(icon_img, (icon_width, lock_icon_target_height))
@@ -1261,7 +1340,7 @@ def hall_of_seeds(screen, save_data):
     # --- Load and Scale Unlocked Icon ---
     if os.path.exists(UNLOCKED_ICON_PATH):
         try:
-            icon_img = pygame.image.load(UNLOCKED_ICON_PATH).convert_alpha()
+            icon_img = get_image(UNLOCKED_ICON_PATH)
             # Use the same target height as the lock icon for consistency
             icon_width = int(icon_img.get_width() * (lock_icon_target_height / icon_img.get_height())) if icon_img.get_height() > 0 else lock_icon_target_height
             if icon_width > 0 and lock_icon_target_height > 0:
@@ -1270,13 +1349,12 @@ def hall_of_seeds(screen, save_data):
         except Exception as e: print(f"Error loading/scaling unlocked icon: {e}")
 
     screen.fill(BLACK)
-    clock = pygame.time.Clock()
+    clock = get_frame_pacer("menu"); clock.restart()
 
     bg_hall = None; bg_hall_darkened = None
     if os.path.exists(HALL_OF_SEEDS_BACKGROUND):
         try:
-            bg_loaded = pygame.image.load(HALL_OF_SEEDS_BACKGROUND).convert()
-            bg_hall = pygame.transform.scale(bg_loaded, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_hall = get_scaled_image(HALL_OF_SEEDS_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
             bg_hall_darkened = bg_hall.copy(); darken_overlay = pygame.Surface(bg_hall_darkened.get_size(), pygame.SRCALPHA)
             darken_alpha = int(255 * 0.14); darken_overlay.fill((0, 0, 0, darken_alpha)); bg_hall_darkened.blit(darken_overlay, (0,0))
         except pygame.error as e: print(f"Error loading Hall of Seeds background: {e}")
@@ -1285,13 +1363,13 @@ def hall_of_seeds(screen, save_data):
     hall_icon_base_size = (40, 40); hall_icon_display_size = (int(hall_icon_base_size[0] * 1.3), int(hall_icon_base_size[1] * 1.3))
 
     if os.path.exists(SUPR_TOKEN_IMAGE):
-        try: supr_icon = pygame.transform.scale(pygame.image.load(SUPR_TOKEN_IMAGE).convert_alpha(), hall_icon_display_size)
+        try: supr_icon = pygame.transform.scale(get_image(SUPR_TOKEN_IMAGE), hall_icon_display_size)
         except pygame.error as e: print(f"Error loading SUPR token icon: {e}")
     if os.path.exists(SEED_IMAGE):
-        try: seed_icon_hall = pygame.transform.scale(pygame.image.load(SEED_IMAGE).convert_alpha(), hall_icon_display_size)
+        try: seed_icon_hall = pygame.transform.scale(get_image(SEED_IMAGE), hall_icon_display_size)
         except pygame.error as e: print(f"Error loading seed icon for Hall: {e}")
     if os.path.exists(MAGNET_IMAGE):
-        try: magnet_icon_hall = pygame.transform.scale(pygame.image.load(MAGNET_IMAGE).convert_alpha(), hall_icon_display_size)
+        try: magnet_icon_hall = pygame.transform.scale(get_image(MAGNET_IMAGE), hall_icon_display_size)
         except pygame.error as e: print(f"Error loading magnet icon for Hall: {e}")
 
     info_font = FONT_IMPACT_XXXSM
@@ -1460,8 +1538,7 @@ def character_select(screen, save_data):
     bg_char_select = None
     if os.path.exists(CHARACTER_SELECT_BACKGROUND):
         try:
-            bg_char_select = pygame.image.load(CHARACTER_SELECT_BACKGROUND).convert()
-            bg_char_select = pygame.transform.scale(bg_char_select, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_char_select = get_scaled_image(CHARACTER_SELECT_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e: print(f"Error loading character select background: {e}")
 
     num_chars = len(char_options)
@@ -1488,7 +1565,7 @@ def character_select(screen, save_data):
         img_draw_rect = None
         if os.path.exists(display_img_path):
             try:
-                loaded_img = pygame.image.load(display_img_path).convert_alpha()
+                loaded_img = get_image(display_img_path)
                 orig_w, orig_h = loaded_img.get_size()
 
                 image_scale_increase = 1.9602
@@ -1592,17 +1669,9 @@ def character_select(screen, save_data):
                         selected_char_index = char_index
                         clicked_on_char = True
                         sound_path = selection_sounds.get(selected_char_index)
-                        if sound_path and os.path.exists(sound_path):
-                           try:
-                               if pygame.mixer.get_init():
-                                   sound_obj = pygame.mixer.Sound(sound_path)
-                                   if selected_char_index == 3: # If Mesky
-                                       sound_obj.set_volume(1.0) # Set volume to max (or adjust as needed)
-                                       print(f"Playing Mesky sound ({sound_path}) with increased volume.")
-                                   else:
-                                       sound_obj.set_volume(0.7) # Default volume for others
-                                   sound_obj.play()
-                           except pygame.error as e: print(f"Error playing selection sound {sound_path}: {e}")
+                        if sound_path:
+                           # Mesky's sound plays at max volume, the others at 0.7
+                           play_sound(sound_path, volume=1.0 if selected_char_index == 3 else 0.7)
                         break
                 if selected_char_index != -1 and confirm_button_rect.collidepoint(mx,my):
                      play_click_sound()
@@ -1610,7 +1679,7 @@ def character_select(screen, save_data):
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE: play_click_sound(); return None
 
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 # --- END UPDATE ---
 
 
@@ -1649,8 +1718,7 @@ def repayment_vault_shop(screen, save_data):
     bg_vault_darkened = None # Surface for darkened background
     if os.path.exists(REPAYMENT_VAULT_BACKGROUND):
         try:
-            bg_loaded = pygame.image.load(REPAYMENT_VAULT_BACKGROUND).convert()
-            bg_vault = pygame.transform.scale(bg_loaded, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_vault = get_scaled_image(REPAYMENT_VAULT_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
             # Darken background slightly more (14% -> 19%)
             bg_vault_darkened = bg_vault.copy()
             darken_overlay = pygame.Surface(bg_vault_darkened.get_size(), pygame.SRCALPHA)
@@ -1752,7 +1820,7 @@ def repayment_vault_shop(screen, save_data):
         icon_rect = None
         if os.path.exists(SUPR_TOKEN_IMAGE):
              try:
-                  supr_icon_obj = pygame.image.load(SUPR_TOKEN_IMAGE).convert_alpha() # Load SUPR image
+                  supr_icon_obj = get_image(SUPR_TOKEN_IMAGE) # Load SUPR image
                   supr_icon_obj = pygame.transform.scale(supr_icon_obj, coin_icon_vault_size)
                   icon_rect = supr_icon_obj.get_rect(midleft=(supr_x, supr_y_center))
                   screen.blit(supr_icon_obj, icon_rect) # Blit the SUPR icon
@@ -1863,7 +1931,7 @@ def repayment_vault_shop(screen, save_data):
                                 # Immediately update vault reference for cost calculations like radius
                                 save_data["vault_upgrades"] = vault
                         break
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 # --- END UPDATE ---
 
 
@@ -1874,8 +1942,7 @@ def show_ingame_shop_overlay(screen, seed_count, current_level, shop_upgrades, p
     shop_bg_darkened = None # Surface for darkened background
     if SHOP_BACKGROUND and os.path.exists(SHOP_BACKGROUND):
         try:
-            shop_bg_loaded = pygame.image.load(SHOP_BACKGROUND).convert()
-            shop_bg = pygame.transform.scale(shop_bg_loaded, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            shop_bg = get_scaled_image(SHOP_BACKGROUND, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
             # Darken Merchant background more (15% -> 25%)
             shop_bg_darkened = shop_bg.copy()
             darken_overlay = pygame.Surface(shop_bg_darkened.get_size(), pygame.SRCALPHA)
@@ -1912,7 +1979,7 @@ def show_ingame_shop_overlay(screen, seed_count, current_level, shop_upgrades, p
     close_button = pygame.Rect(0, 0, 300, 50)
     close_button.center = (SCREEN_WIDTH // 2, SCREEN_HEIGHT - 70)
 
-    clock = pygame.time.Clock()
+    clock = get_frame_pacer("menu"); clock.restart()
     shop_looping = True
 
     mixer_ok = pygame.mixer.get_init()
@@ -1938,7 +2005,7 @@ def show_ingame_shop_overlay(screen, seed_count, current_level, shop_upgrades, p
 
         if os.path.exists(SEED_IMAGE):
             try:
-                 seed_icon_img_orig = pygame.image.load(SEED_IMAGE).convert_alpha()
+                 seed_icon_img_orig = get_image(SEED_IMAGE)
                  seed_icon_size_base = ORIGINAL_SEED_BASE_SIZE * SEED_SIZE_MULTIPLIER
                  seed_icon_display_scale_factor = 1.40 # 40% larger
                  seed_icon_size = (int(seed_icon_size_base * seed_icon_display_scale_factor), int(seed_icon_size_base * seed_icon_display_scale_factor))
@@ -2105,21 +2172,18 @@ def pause_menu(screen):
         pygame.mouse.set_visible(True)
         pygame.display.flip()
 
-        pygame.time.Clock().tick(30)
+        get_frame_pacer("menu").tick(30)
 
 
 def show_game_over(screen, level_reached, total_time, total_seeds_collected_run): # Changed signature
     if pygame.mixer.get_init():
         pygame.mixer.music.stop()
-        if os.path.exists(DEAD_SOUND):
-            try: pygame.mixer.Sound(DEAD_SOUND).play()
-            except pygame.error as e: print(f"Error playing dead sound: {e}")
+        play_sound(DEAD_SOUND)
 
     game_over_bg = None
     if os.path.exists(GAMEOVER_IMAGE):
         try:
-            game_over_bg = pygame.image.load(GAMEOVER_IMAGE).convert()
-            game_over_bg = pygame.transform.scale(game_over_bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            game_over_bg = get_scaled_image(GAMEOVER_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading game over background: {e}")
 
@@ -2211,7 +2275,7 @@ def show_game_over(screen, level_reached, total_time, total_seeds_collected_run)
             if ev.type == pygame.MOUSEBUTTONDOWN:
                  input_active = input_box_rect.collidepoint(ev.pos)
 
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 
 # --- NEW: Function for WIN screen ---
 def show_win_screen(screen, total_time, total_seeds_collected_run):
@@ -2226,8 +2290,7 @@ def show_win_screen(screen, total_time, total_seeds_collected_run):
     win_screen_bg = None
     if os.path.exists(ENDSCREEN_IMAGE): # Use the endscreen image path
         try:
-            win_screen_bg = pygame.image.load(ENDSCREEN_IMAGE).convert()
-            win_screen_bg = pygame.transform.scale(win_screen_bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            win_screen_bg = get_scaled_image(ENDSCREEN_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading win screen background (endscreen.png): {e}")
 
@@ -2350,18 +2413,18 @@ def show_win_screen(screen, total_time, total_seeds_collected_run):
             if ev.type == pygame.MOUSEBUTTONDOWN:
                  input_active = input_box_rect.collidepoint(ev.pos)
 
-        pygame.time.Clock().tick(FPS)
+        get_frame_pacer("menu").tick(FPS)
 # --- END NEW ---
 
 
 # --- Manwha Viewer Function ---
 def show_manwha_reader(screen):
-    clock = pygame.time.Clock()
+    clock = get_frame_pacer("menu"); clock.restart()
     manwha_images = []
     for img_path in MANWHA_IMAGES:
         if os.path.exists(img_path):
             try:
-                img = pygame.image.load(img_path).convert()
+                img = get_image(img_path, alpha=False)
                 # Scale manwha image to fit screen dimensions
                 img_w, img_h = img.get_size()
 
@@ -2427,8 +2490,7 @@ def show_manwha_reader(screen):
     bg_manwha = None
     if os.path.exists(MANWHA_BG_IMAGE):
         try:
-            bg_manwha = pygame.image.load(MANWHA_BG_IMAGE).convert()
-            bg_manwha = pygame.transform.scale(bg_manwha, (SCREEN_WIDTH, SCREEN_HEIGHT))
+            bg_manwha = get_scaled_image(MANWHA_BG_IMAGE, (SCREEN_WIDTH, SCREEN_HEIGHT), alpha=False)
         except pygame.error as e:
             print(f"Error loading Manwha background: {e}")
 
@@ -2580,6 +2642,71 @@ def draw_seed_doubler_timer(surface, remaining_time):
 
 # --- END NEW ---
 
+# --- NEW: Dirty-flag HUD compositor ---
+class HudCompositor:
+    """
+    Keeps the rendered surface of each run_level HUD widget together with the inputs it was drawn from
+    (its key) and only re-renders a widget when that key changes. begin()/end() time the HUD per frame.
+    """
+    def __init__(self, history=600):
+        self.entries = {} # name -> (key, value)
+        self.redraws = 0
+        self.cache_hits = 0
+        self.frame_ms = deque(maxlen=history)
+        self.frame_start = None
+
+    def get(self, name, key, render):
+        """Cached render() result for name, re-rendered only when key differs from last time."""
+        entry = self.entries.get(name)
+        if entry is not None and entry[0] == key:
+            self.cache_hits += 1
+            return entry[1]
+        value = render()
+        self.entries[name] = (key, value)
+        self.redraws += 1
+        return value
+
+    def widget(self, name, key, size, draw_func, *args):
+        """For the draw_*(surface, ...) widgets: returns (surface, draw_func's return value), cached by key."""
+        def render():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            return surface, draw_func(surface, *args)
+        return self.get(name, key, render)
+
+    def seed_doubler_timer(self, screen, pos, remaining_time):
+        """Same look as draw_seed_doubler_timer on a timer surface at pos, but the text is only re-rendered every 0.1s."""
+        if remaining_time <= 0: return None
+        text = f"Double Seeds: {remaining_time:.1f}s"
+        def render():
+            text_surf = FONT_SM.render(text, True, WHITE)
+            bg_rect = text_surf.get_rect(topleft=(0, 0)).inflate(10, 5).clip(pygame.Rect(0, 0, 10000, 10000)) # Part inside the timer surface
+            bg_surf = pygame.Surface(bg_rect.size); bg_surf.fill((220, 60, 60))
+            return text_surf, bg_surf, bg_rect
+        text_surf, bg_surf, bg_rect = self.get("seed_doubler_timer", text, render)
+        alpha = int(150 + 105 * abs(math.sin(time.time() * 4.0))) # Same pulse as draw_seed_doubler_timer
+        bg_surf.set_alpha(int(alpha * 0.5)); text_surf.set_alpha(alpha)
+        drawn = screen.blit(bg_surf, (pos[0] + bg_rect.x, pos[1] + bg_rect.y))
+        return drawn.union(screen.blit(text_surf, pos))
+
+    def begin(self):
+        self.frame_start = time.perf_counter()
+
+    def end(self):
+        if self.frame_start is not None: self.frame_ms.append((time.perf_counter() - self.frame_start) * 1000.0)
+        self.frame_start = None
+
+    def stats(self):
+        times = sorted(self.frame_ms)
+        return {"frames": len(times), "hud_ms_mean": sum(times) / len(times) if times else 0.0,
+                "hud_ms_p95": times[int(0.95 * (len(times) - 1))] if times else 0.0,
+                "redraws": self.redraws, "cache_hits": self.cache_hits}
+
+    def describe(self):
+        st = self.stats()
+        return (f"HUD: {st['hud_ms_mean']:.3f}ms/frame mean, p95 {st['hud_ms_p95']:.3f}ms over {st['frames']} frames, "
+                f"{st['redraws']} widget redraws, {st['cache_hits']} cache hits")
+# --- END NEW ---
+
 # --- NEW: Function for Screen Flash ---
 def draw_screen_flash(screen, duration=0.1, color=WHITE, alpha=180):
     """Draws a temporary screen flash overlay. Should be called within the main loop."""
@@ -2615,4 +2742,8 @@ def show_world_transition(screen, next_world_name):
     transition_text = FONT_LG.render(f"Entering: {next_world_name}", True, world_color) # Use world color
     screen.fill(BLACK)
     screen.blit(transition_text, transition_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)))
-    pygame.mouse.set_visible(True); pygame.display.flip(); pygame.time.wait(2500)
\ No newline at end of file
+    pygame.mouse.set_visible(True); pygame.display.flip()
+    # --- CHANGE: The new world's background loads during the announcement (counted against the 2.5s wait) ---
+    warm_start = time.time(); WORLD_BACKGROUND_CACHE.warm(next_world_name)
+    pygame.time.wait(max(0, 2500 - int((time.time() - warm_start) * 1000)))
+    # --- END CHANGE ---
\ No newline at end of file
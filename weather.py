@@ -0,0 +1,137 @@
+# --- START OF FILE weather.py ---
+# Weather particles (rain drops, snowflakes, wind streaks) kept in NumPy arrays: one vectorized step per frame and one
+# screen.blits() batch of pre-rendered stamps, instead of a pygame.draw call and list update per particle.
+# Without NumPy the same system steps plain Python lists. Purely visual: it has its own RNG, seeded from the level's.
+
+import random
+import pygame
+from settings import *
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+_STAMP_CACHE = {} # (kind, size, direction) -> pre-rendered Surface, shared by every level
+
+
+def get_weather_stamp(kind, size, direction=1):
+    """The pixels pygame.draw used to produce for one particle: a rain line, a snow circle or a wind streak."""
+    key = (kind, size, direction)
+    stamp = _STAMP_CACHE.get(key)
+    if stamp is None:
+        if kind == "rain": # draw.line((x, y), (x, y + length)) covers length + 1 pixels
+            stamp = pygame.Surface((1, size + 1)); stamp.fill(RAIN_COLOR)
+        elif kind == "snow": # draw.circle(center, radius) fills the 2r x 2r box around center
+            stamp = pygame.Surface((size * 2, size * 2)); stamp.fill(BLACK)
+            pygame.draw.circle(stamp, SNOW_COLOR, (size, size), size)
+            stamp.set_colorkey(BLACK, pygame.RLEACCEL)
+        else: # Horizontal streak of WIND_STREAK_LENGTH + 1 pixels
+            stamp = pygame.Surface((size + 1, 1)); stamp.fill(WIND_COLOR)
+        if pygame.display.get_surface() is not None: stamp = stamp.convert() # Keeps the colorkey
+        _STAMP_CACHE[key] = stamp
+    return stamp
+
+
+class WeatherSystem:
+    """
+    Structure-of-arrays particles for one level's weather. step(dt) moves every particle and respawns the ones that
+    left the track; draw(screen) blits all stamps in one batch (and returns their rects for dirty-rect mode).
+    """
+    def __init__(self, weather, rng=None, wind_direction=None, density=WEATHER_DENSITY):
+        self.weather = weather
+        self.direction = wind_direction or 1
+        seed = (rng or random).getrandbits(32)
+        self.np_rng = np.random.default_rng(seed) if NUMPY_AVAILABLE else None
+        self.py_rng = random.Random(seed)
+        if weather == "rain":
+            count = int(RAIN_DROP_COUNT * density)
+            x = self._ints(TRACK_LEFT, TRACK_RIGHT, count); y = self._ints(TRACK_TOP, TRACK_BOTTOM, count)
+            vx = [0.0] * count; vy = self._ints(RAIN_SPEED_MIN * 60, RAIN_SPEED_MAX * 60, count)
+            sizes = self._ints(RAIN_LENGTH_MIN, RAIN_LENGTH_MAX, count)
+        elif weather == "snow":
+            count = int(SNOW_FLAKE_COUNT * density)
+            x = self._ints(TRACK_LEFT, TRACK_RIGHT, count); y = self._ints(TRACK_TOP, TRACK_BOTTOM, count)
+            vx = [self.py_rng.uniform(-0.5, 0.5) * 60 for _ in range(count)]; vy = self._ints(SNOW_SPEED_MIN * 60, SNOW_SPEED_MAX * 60, count)
+            sizes = self._ints(SNOW_RADIUS_MIN, SNOW_RADIUS_MAX, count)
+        elif weather == "wind": # Streaks drift with the wind instead of being re-randomised every frame
+            count = int(WIND_STREAK_COUNT * density)
+            x = self._ints(TRACK_LEFT, TRACK_RIGHT, count); y = self._ints(TRACK_TOP, TRACK_BOTTOM, count)
+            vx = [self.direction * self.py_rng.uniform(0.8, 1.2) * WIND_STREAK_SPEED for _ in range(count)]; vy = [0.0] * count
+            sizes = [WIND_STREAK_LENGTH] * count
+        else:
+            count = 0; x = y = vx = vy = sizes = []
+        self.count = count
+        self.sizes = list(sizes)
+        if NUMPY_AVAILABLE:
+            self.x = np.array(x, dtype=np.float64); self.y = np.array(y, dtype=np.float64)
+            self.vx = np.array(vx, dtype=np.float64); self.vy = np.array(vy, dtype=np.float64)
+        else:
+            self.x = [float(v) for v in x]; self.y = [float(v) for v in y]; self.vx = list(vx); self.vy = list(vy)
+        self.stamps = None # Built on the first draw (the level may be constructed on the pregeneration thread)
+        self.offset_x = self.offset_y = None
+
+    def __len__(self):
+        return self.count
+
+    def _ints(self, low, high, count):
+        """count random ints in [low, high], as a list (both RNG paths produce the same layout type)."""
+        if self.np_rng is not None: return self.np_rng.integers(low, high + 1, count).tolist()
+        return [self.py_rng.randint(low, high) for _ in range(count)]
+
+    def _build_stamps(self):
+        kind = self.weather; direction = self.direction if kind == "wind" else 1
+        self.stamps = [get_weather_stamp(kind, size, direction) for size in self.sizes]
+        if kind == "snow": offset_x = [-s for s in self.sizes]; offset_y = [-s for s in self.sizes]
+        elif kind == "wind" and direction < 0: offset_x = [-s for s in self.sizes]; offset_y = [0] * self.count # Line ran from x to x - length
+        else: offset_x = [0] * self.count; offset_y = [0] * self.count
+        if NUMPY_AVAILABLE: self.offset_x = np.array(offset_x, dtype=np.float64); self.offset_y = np.array(offset_y, dtype=np.float64)
+        else: self.offset_x = offset_x; self.offset_y = offset_y
+
+    def step(self, dt):
+        """Moves every particle by its velocity and respawns the ones that left the track (same rules as before)."""
+        if not self.count or dt <= 0: return
+        if NUMPY_AVAILABLE: self._step_numpy(dt)
+        else: self._step_python(dt)
+
+    def _step_numpy(self, dt):
+        x = self.x; y = self.y; rng = self.np_rng
+        x += self.vx * dt; y += self.vy * dt
+        if self.weather == "wind":
+            gone = (x > TRACK_RIGHT) if self.direction > 0 else (x < TRACK_LEFT - WIND_STREAK_LENGTH)
+            n = int(np.count_nonzero(gone))
+            if n:
+                x[gone] = TRACK_LEFT - WIND_STREAK_LENGTH if self.direction > 0 else TRACK_RIGHT
+                y[gone] = rng.integers(TRACK_TOP, TRACK_BOTTOM + 1, n)
+            return
+        gone = y > TRACK_BOTTOM
+        n = int(np.count_nonzero(gone))
+        if n:
+            above = (5, 20) if self.weather == "rain" else (5, 10)
+            y[gone] = TRACK_TOP - rng.integers(above[0], above[1] + 1, n)
+            x[gone] = rng.integers(TRACK_LEFT, TRACK_RIGHT + 1, n)
+
+    def _step_python(self, dt):
+        x = self.x; y = self.y; vx = self.vx; vy = self.vy; rng = self.py_rng
+        above = (5, 20) if self.weather == "rain" else (5, 10)
+        for i in range(self.count):
+            x[i] += vx[i] * dt; y[i] += vy[i] * dt
+            if self.weather == "wind":
+                if (self.direction > 0 and x[i] > TRACK_RIGHT) or (self.direction < 0 and x[i] < TRACK_LEFT - WIND_STREAK_LENGTH):
+                    x[i] = TRACK_LEFT - WIND_STREAK_LENGTH if self.direction > 0 else TRACK_RIGHT; y[i] = rng.randint(TRACK_TOP, TRACK_BOTTOM)
+            elif y[i] > TRACK_BOTTOM:
+                y[i] = TRACK_TOP - rng.randint(*above); x[i] = rng.randint(TRACK_LEFT, TRACK_RIGHT)
+
+    def draw(self, screen, return_rects=False):
+        """Blits every particle in one screen.blits() call. Returns the drawn rects if return_rects, else an empty list."""
+        if not self.count: return []
+        if self.stamps is None: self._build_stamps()
+        if NUMPY_AVAILABLE:
+            xs = (self.x + self.offset_x).astype(np.int32).tolist(); ys = (self.y + self.offset_y).astype(np.int32).tolist()
+        else:
+            xs = [int(x + o) for x, o in zip(self.x, self.offset_x)]; ys = [int(y + o) for y, o in zip(self.y, self.offset_y)]
+        rects = screen.blits(list(zip(self.stamps, zip(xs, ys))), doreturn=return_rects)
+        return rects or []
+# --- END OF FILE weather.py ---